@@ -27,6 +27,18 @@ if not is_used_postgres:
     _remove(path)
     logger.info(f"directory '{path}' was deleted")
 
+    path = os.path.join(current_path, "tests", "unit", "db")
+    _remove(path)
+    logger.info(f"directory '{path}' was deleted")
+
+    path = os.path.join(current_path, "tests", "benchmarks", "bench_keyset_pagination.py")
+    _remove(path)
+    logger.info(f"directory '{path}' was deleted")
+
+    path = os.path.join(current_path, "tests", "benchmarks", "bench_bulk_writer.py")
+    _remove(path)
+    logger.info(f"directory '{path}' was deleted")
+
 if not is_used_postgres:
     path = os.path.join(current_path, "app", "infrastructure", "http")
     _remove(path)
@@ -49,3 +61,31 @@ if not is_used_kafka:
     path = os.path.join(current_path, "app", "consumer")
     _remove(path)
     logger.info(f"directory '{path}' was deleted")
+
+    path = os.path.join(current_path, "tests", "unit", "kafka")
+    _remove(path)
+    logger.info(f"directory '{path}' was deleted")
+
+    path = os.path.join(current_path, "tests", "utils", "fake_kafka.py")
+    _remove(path)
+    logger.info(f"directory '{path}' was deleted")
+
+    path = os.path.join(current_path, "tests", "utils", "fake_schema_registry.py")
+    _remove(path)
+    logger.info(f"directory '{path}' was deleted")
+
+    path = os.path.join(current_path, "tests", "benchmarks", "bench_batched_agent.py")
+    _remove(path)
+    logger.info(f"directory '{path}' was deleted")
+
+    path = os.path.join(current_path, "tests", "benchmarks", "bench_json_codec.py")
+    _remove(path)
+    logger.info(f"directory '{path}' was deleted")
+
+    path = os.path.join(current_path, "tests", "benchmarks", "bench_producer.py")
+    _remove(path)
+    logger.info(f"directory '{path}' was deleted")
+
+    path = os.path.join(current_path, "tests", "benchmarks", "bench_key_ordered.py")
+    _remove(path)
+    logger.info(f"directory '{path}' was deleted")
@@ -4,6 +4,9 @@ import structlog
 
 from consumer.app import app
 from consumer.dto.testing_variant import TestingJson
+{%- if cookiecutter.use_postgres == 'yes' %}
+from infrastructure.db.scope import db_session_scope
+{%- endif %}
 
 logger = structlog.get_logger(__name__)
 topic = app.topic("test_topic", value_type=TestingJson)
@@ -12,4 +15,10 @@ topic = app.topic("test_topic", value_type=TestingJson)
 @app.agent(topic)
 async def iterate(testings: AsyncIterable[TestingJson]):
     async for testing in testings:
+        {%- if cookiecutter.use_postgres == 'yes' %}
+        # Сессии из контейнера внутри области фиксируются после обработки сообщения
+        async with db_session_scope():
+            logger.info("testing", value=testing.to_representation())
+        {%- else %}
         logger.info("testing", value=testing.to_representation())
+        {%- endif %}
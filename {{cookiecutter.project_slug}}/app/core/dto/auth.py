@@ -11,3 +11,7 @@ class UserDTO(BaseModel):
     given_name: Optional[str] = None
     family_name: Optional[str] = None
     email: Optional[str] = None
+
+    class Config:
+        # Экземпляр переиспользуется между запросами через кэш токенов
+        allow_mutation = False
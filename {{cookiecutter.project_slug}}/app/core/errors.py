@@ -1,6 +1,5 @@
-import dataclasses
 from enum import Enum
-from typing import Any, Optional
+from typing import Any, ClassVar, Optional
 
 
 class ErrorCategories(Enum):
@@ -23,11 +22,22 @@ class BaseBusinessError(Exception):
 
     raw_type: str: НЕОБЯЗАТЕЛЬНОЕ ПОЛЕ (только для dev-а)! Тип исключения
     category: ErrorCategories: НЕОБЯЗАТЕЛЬНОЕ ПОЛЕ (только для dev-а)! Категория возникшего исключения.
+
+    Значения recovery_type, raw_type и category по умолчанию задаются атрибутами класса-наследника,
+    например `category = ErrorCategories.BUSINESS_EXCEPTION`, и доступны как атрибуты класса.
     """
+    # recovery_type, raw_type и category не входят в слоты: слот перекрывался бы атрибутом класса-наследника
+    __slots__ = ("status", "detail", "type", "data")
+
+    # Поля ответа в порядке сериализации, без слотов наследников
+    response_fields: ClassVar[tuple[str, ...]] = (
+        "status", "detail", "type", "data", "recovery_type", "raw_type", "category"
+    )
+
     status: str
     detail: str
     type: str
-    data: dict[str, Any] = dataclasses.field(default_factory=dict)
+    data: dict[str, Any]
     recovery_type: str = ""
     raw_type: str = ""
     category: Optional[ErrorCategories] = None
@@ -40,42 +50,57 @@ class BaseBusinessError(Exception):
         self.detail = detail
         self.type = error_type
         self.data = data or {}
-        self.recovery_type = recovery_type or self.recovery_type
-        self.raw_type = raw_type or self.raw_type
-        self.category = category or self.category
+        # Значения по умолчанию читаются из атрибутов класса, в экземпляре хранятся только переданные
+        if recovery_type:
+            self.recovery_type = recovery_type
+        if raw_type:
+            self.raw_type = raw_type
+        if category is not None:
+            self.category = category
 
-    def as_dict(self):
-        return dict(**vars(self))
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            **{name: getattr(self, name) for name in BaseBusinessError.response_fields},
+            **vars(self),
+        }
 
 
 class ExternalServiceBusinessError(BaseBusinessError):
-    ...
+    __slots__ = ()
 
 
 class BaseInternalBusinessError(BaseBusinessError):
+    __slots__ = ()
+
     def __init__(
         self, status: str, detail: str, error_type: str = "", data: dict = None, recovery_type: str = "",
         raw_type: str = "", category: Optional[ErrorCategories] = None
     ):
         super().__init__(status, detail, error_type, data, recovery_type, raw_type, category)
-        self.raw_type = self.raw_type or self.__class__.__name__
+        if not self.raw_type:
+            self.raw_type = self.__class__.__name__
 
 
 class ConfigurationBusinessError(BaseInternalBusinessError):
+    __slots__ = ()
     category = ErrorCategories.CONFIGURATION_EXCEPTION
 
 
 class SecurityBusinessError(BaseInternalBusinessError):
+    __slots__ = ()
     category = ErrorCategories.SECURITY_EXCEPTION
 
 
 class ValidationBusinessError(BaseInternalBusinessError):
+    __slots__ = ()
     category = ErrorCategories.VALIDATION_EXCEPTION
 
 
 class UnexpectedBusinessError(BaseInternalBusinessError):
+    __slots__ = ()
     category = ErrorCategories.UNEXPECTED_EXCEPTION
 
 
 class BusinessError(BaseInternalBusinessError):
+    __slots__ = ()
     category = ErrorCategories.BUSINESS_EXCEPTION
@@ -1,13 +1,26 @@
 from abc import ABC, abstractmethod
-from typing import Generic, TypeVar, Union
+from typing import AsyncGenerator, Generic, TypeVar, Union
 
 from core.usecases.base import BaseQuery, BaseResult
 
 TQuery = TypeVar("TQuery", bound=BaseQuery)
 TResult = TypeVar("TResult", bound=Union[BaseResult, list[BaseResult]])
+TItem = TypeVar("TItem", bound=BaseResult)
 
 
 class IQueryHandler(Generic[TQuery, TResult], ABC):
     @abstractmethod
     async def ask(self, query: TQuery) -> TResult:
         ...
+
+
+class IStreamingQueryHandler(Generic[TQuery, TItem], ABC):
+    """
+    Обработчик запросов, возвращающий результат по одному элементу без загрузки всего списка в память.
+    Используется для выгрузок и отчетов вместе с web.responses.ModelStreamingResponse
+    Результат - асинхронный генератор: при отключении клиента он закрывается через aclose
+    """
+
+    @abstractmethod
+    def stream(self, query: TQuery) -> AsyncGenerator[TItem, None]:
+        ...
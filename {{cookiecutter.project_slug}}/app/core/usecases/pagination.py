@@ -1,7 +1,19 @@
-from typing import Generic, TypeVar
+import base64
+import binascii
+import datetime
+import hashlib
+import hmac
+import uuid
+from decimal import Decimal
+from enum import Enum
+from functools import lru_cache
+from typing import Any, Callable, Generic, Optional, TypeVar, Union
 
+import orjson
+from pydantic import SecretStr, root_validator
 from pydantic.generics import GenericModel
 
+from core.errors import ConfigurationBusinessError, ValidationBusinessError
 from core.usecases.base import BaseResult, CustomModel
 
 ResultType = TypeVar("ResultType", bound=BaseResult)
@@ -12,12 +24,182 @@ class PaginationQuery(CustomModel):
     limit: int
 
 
+class CountStrategy(str, Enum):
+    """
+    Способ подсчета общего количества записей
+
+    EXACT - COUNT(*) по запросу
+    ESTIMATED - оценка планировщика или pg_class.reltuples, может отличаться от точного значения
+    CACHED - COUNT(*), сохраненный на время TTL для того же запроса и параметров
+    SKIPPED - количество не считается, есть только признак следующей страницы
+    """
+
+    EXACT = "exact"
+    ESTIMATED = "estimated"
+    CACHED = "cached"
+    SKIPPED = "skipped"
+
+
+class TotalCount(CustomModel):
+    value: Optional[int] = None
+    strategy: CountStrategy = CountStrategy.EXACT
+
+
 class PageInfo(CustomModel):
     page_number: int
     page_size: int
+    has_next_page: Optional[bool] = None
 
 
 class PaginationResult(GenericModel, CustomModel, Generic[ResultType]):
     items: list[ResultType]
-    total_count: int
+    # None при стратегии SKIPPED
+    total_count: Optional[int]
+    total_count_strategy: CountStrategy = CountStrategy.EXACT
     page: PageInfo
+
+    @root_validator(pre=True)
+    def _split_total_count(cls, values: dict[str, Any]) -> dict[str, Any]:
+        # TotalCount из PageCounter раскладывается на число и стратегию, формат totalCount остается прежним
+        total_count = values.get("total_count")
+        if isinstance(total_count, TotalCount):
+            return {**values, "total_count": total_count.value, "total_count_strategy": total_count.strategy}
+        return values
+
+
+class CursorPaginationQuery(CustomModel):
+    cursor: Optional[str] = None
+    limit: int
+
+
+class CursorPaginationResult(GenericModel, CustomModel, Generic[ResultType]):
+    items: list[ResultType]
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
+
+
+class CursorDirection(str, Enum):
+    NEXT = "next"
+    PREV = "prev"
+
+
+class Cursor:
+    """
+    Позиция в выборке: значения ключей сортировки граничной записи и направление перехода.
+
+    NEXT - записи после keys, PREV - записи перед keys.
+    """
+
+    __slots__ = ("keys", "direction")
+
+    def __init__(self, keys: tuple, direction: CursorDirection = CursorDirection.NEXT) -> None:
+        self.keys = tuple(keys)
+        self.direction = direction
+
+    def __eq__(self, other: Any) -> bool:
+        return isinstance(other, Cursor) and (self.keys, self.direction) == (other.keys, other.direction)
+
+    def __repr__(self) -> str:
+        return f"Cursor(keys={self.keys!r}, direction={self.direction.value!r})"
+
+
+_KEY_ENCODERS: dict[type, tuple[str, Callable[[Any], Any]]] = {
+    bool: ("b", bool),
+    int: ("i", int),
+    float: ("f", float),
+    str: ("s", str),
+    Decimal: ("n", str),
+    uuid.UUID: ("u", str),
+    datetime.datetime: ("t", datetime.datetime.isoformat),
+    datetime.date: ("d", datetime.date.isoformat),
+}
+_KEY_DECODERS: dict[str, Callable[[Any], Any]] = {
+    "b": bool,
+    "i": int,
+    "f": float,
+    "s": str,
+    "n": Decimal,
+    "u": uuid.UUID,
+    "t": datetime.datetime.fromisoformat,
+    "d": datetime.date.fromisoformat,
+}
+
+
+class CursorCodec:
+    """
+    Кодирование курсора в непрозрачную строку base64url(payload).base64url(hmac-sha256(payload)).
+
+    Типы значений ключей сохраняются, поэтому декодированный курсор можно подставлять в запрос.
+    """
+
+    __slots__ = ("_secret",)
+
+    def __init__(self, secret: Union[str, SecretStr, None]) -> None:
+        if isinstance(secret, SecretStr):
+            secret = secret.get_secret_value()
+        if not secret:
+            raise ConfigurationBusinessError(status="500", detail="PAGINATION_CURSOR_SECRET is not configured")
+        self._secret = secret.encode()
+
+    def encode(self, cursor: Cursor) -> str:
+        payload = orjson.dumps({"k": [self._encode_key(key) for key in cursor.keys], "d": cursor.direction.value})
+        return f"{_b64encode(payload)}.{_b64encode(self._sign(payload))}"
+
+    def decode(self, token: str) -> Cursor:
+        """
+        Декодирование курсора с проверкой подписи
+
+        :param token: Курсор из запроса
+        :return: Курсор
+        :raises ValidationBusinessError: Курсор поврежден или подписан другим ключом
+        """
+        try:
+            encoded_payload, encoded_signature = token.split(".")
+            payload = _b64decode(encoded_payload)
+            if not hmac.compare_digest(self._sign(payload), _b64decode(encoded_signature)):
+                raise ValueError("signature mismatch")
+
+            data = orjson.loads(payload)
+            return Cursor(tuple(self._decode_key(key) for key in data["k"]), direction=CursorDirection(data["d"]))
+        except (ValueError, KeyError, TypeError, binascii.Error) as e:
+            raise ValidationBusinessError(status="400", detail="Invalid pagination cursor") from e
+
+    def _sign(self, payload: bytes) -> bytes:
+        return hmac.new(self._secret, payload, hashlib.sha256).digest()
+
+    @staticmethod
+    def _encode_key(key: Any) -> Any:
+        if key is None:
+            return None
+        if isinstance(key, Enum):
+            # Элемент Enum подставляется в запрос своим значением
+            key = key.value
+        tag, encode = _resolve_key_encoder(type(key))
+        return [tag, encode(key)]
+
+    @staticmethod
+    def _decode_key(key: Any) -> Any:
+        if key is None:
+            return None
+        tag, value = key
+        return _KEY_DECODERS[tag](value)
+
+
+@lru_cache(maxsize=None)
+def _resolve_key_encoder(key_type: type) -> tuple[str, Callable[[Any], Any]]:
+    # Поиск по MRO: наследники поддерживаемых типов (например, подклассы datetime) кодируются как базовый тип
+    for klass in key_type.__mro__:
+        encoder = _KEY_ENCODERS.get(klass)
+        if encoder is not None:
+            return encoder
+    raise ConfigurationBusinessError(
+        status="500", detail=f"Pagination cursor key type {key_type.__name__} is not supported"
+    )
+
+
+def _b64encode(value: bytes) -> str:
+    return base64.urlsafe_b64encode(value).rstrip(b"=").decode()
+
+
+def _b64decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
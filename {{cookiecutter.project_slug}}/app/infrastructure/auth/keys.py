@@ -0,0 +1,203 @@
+import asyncio
+import time
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Callable, Optional, Union
+
+import httpx
+import orjson
+import structlog
+from jose import jwk
+from jose.backends.base import Key
+from jose.exceptions import JWKError, JWTError
+
+from core.errors import ConfigurationBusinessError
+from infrastructure.config import KeycloakConfig, config
+
+logger = structlog.get_logger(__name__)
+
+VerificationKey = Union[str, Key]
+
+
+class IKeyProvider(ABC):
+    @abstractmethod
+    async def get_key(self, kid: Optional[str]) -> VerificationKey:
+        """
+        Получение ключа для проверки подписи JWT
+
+        :param kid: Идентификатор ключа из заголовка токена
+        :return: Ключ проверки подписи
+        :raise: JWTError
+        """
+        ...
+
+
+class StaticKeyProvider(IKeyProvider):
+    """
+    Один статический публичный ключ из конфигурации
+    """
+
+    __slots__ = ("_public_key",)
+
+    def __init__(self, public_key: str) -> None:
+        self._public_key = public_key
+
+    async def get_key(self, kid: Optional[str]) -> VerificationKey:
+        return self._public_key
+
+
+class JWKSKeyProvider(IKeyProvider):
+    """
+    Ключи из JWKS документа, загруженного по URL или из локального файла.
+
+    Ключи индексируются по `kid` и хранятся в памяти. Документ перечитывается раз в `refresh_interval` секунд,
+    а при появлении неизвестного `kid` - не чаще, чем раз в `min_refresh_interval` секунд. Одновременные запросы
+    на обновление объединяются в одну загрузку.
+    """
+
+    __slots__ = (
+        "_source",
+        "_refresh_interval",
+        "_min_refresh_interval",
+        "_default_algorithm",
+        "_timeout",
+        "_clock",
+        "_keys",
+        "_loaded_at",
+        "_refresh_task",
+    )
+
+    def __init__(
+        self,
+        source: str,
+        *,
+        refresh_interval: float = 300.0,
+        min_refresh_interval: float = 10.0,
+        default_algorithm: str = "RS256",
+        timeout: float = 5.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._source = source
+        self._refresh_interval = refresh_interval
+        self._min_refresh_interval = min_refresh_interval
+        self._default_algorithm = default_algorithm
+        self._timeout = timeout
+        self._clock = clock
+        self._keys: dict[Optional[str], Key] = {}
+        self._loaded_at: Optional[float] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+
+    @property
+    def kids(self) -> list[Optional[str]]:
+        return list(self._keys)
+
+    async def get_key(self, kid: Optional[str]) -> VerificationKey:
+        if self._is_stale(self._refresh_interval):
+            await self.refresh()
+
+        key = self._keys.get(kid)
+
+        if key is None and self._is_stale(self._min_refresh_interval):
+            logger.info("Unknown JWKS key id, refreshing key set", kid=kid)
+            await self.refresh()
+            key = self._keys.get(kid)
+
+        if key is None:
+            raise JWTError(f"Unknown key id: {kid}")
+
+        return key
+
+    def _is_stale(self, max_age: float) -> bool:
+        """
+        Проверка возраста ключей. Ключи, которые еще не загружались, считаются устаревшими
+
+        :param max_age: Допустимый возраст в секундах
+        :return: Нужна ли перезагрузка
+        """
+        return self._loaded_at is None or self._clock() - self._loaded_at >= max_age
+
+    async def refresh(self) -> None:
+        """
+        Перезагрузка ключей. Если загрузка уже идет, то ожидается ее результат
+        """
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.ensure_future(self._refresh())
+            self._refresh_task.add_done_callback(self._reset_refresh_task)
+
+        await asyncio.shield(self._refresh_task)
+
+    def _reset_refresh_task(self, _: asyncio.Task) -> None:
+        self._refresh_task = None
+
+    async def _refresh(self) -> None:
+        try:
+            keys = self._parse_jwks(await self._load())
+        except (httpx.HTTPError, OSError, ValueError, JWKError) as e:
+            if not self._keys:
+                # Без ключей токен проверить нельзя: ошибка загрузки отклоняет токен, как неизвестный ключ
+                raise JWTError(f"Unable to load JWKS: {e}") from e
+            # Оставляем прежние ключи, следующая попытка будет после min_refresh_interval
+            logger.warning("Unable to refresh JWKS, using cached keys", source=self._source, error=str(e))
+            self._loaded_at = self._clock() - self._refresh_interval + self._min_refresh_interval
+            return
+
+        self._keys = keys
+        self._loaded_at = self._clock()
+        logger.info("JWKS was loaded", source=self._source, kids=self.kids)
+
+    async def _load(self) -> Any:
+        if self._source.startswith(("http://", "https://")):
+            async with httpx.AsyncClient(timeout=self._timeout) as client:
+                response = await client.get(self._source)
+                response.raise_for_status()
+                return orjson.loads(response.content)
+
+        path = Path(self._source.removeprefix("file://"))
+        return orjson.loads(await asyncio.to_thread(path.read_bytes))
+
+    def _parse_jwks(self, document: Any) -> dict[Optional[str], Key]:
+        if not isinstance(document, dict) or not isinstance(document.get("keys"), list):
+            raise ValueError("JWKS document must contain 'keys' list")
+
+        keys = {}
+        for key_data in document["keys"]:
+            if key_data.get("use", "sig") != "sig":
+                continue
+            keys[key_data.get("kid")] = jwk.construct(key_data, key_data.get("alg", self._default_algorithm))
+
+        return keys
+
+
+def create_key_provider(keycloak_config: KeycloakConfig) -> IKeyProvider:
+    """
+    Создание провайдера ключей по конфигурации: JWKS имеет приоритет над статическим ключом
+
+    :param keycloak_config: Конфигурация Keycloak
+    :return: Провайдер ключей
+    :raise: ConfigurationBusinessError
+    """
+    if keycloak_config.JWKS_URI:
+        return JWKSKeyProvider(
+            keycloak_config.JWKS_URI,
+            refresh_interval=keycloak_config.JWKS_REFRESH_INTERVAL,
+            min_refresh_interval=keycloak_config.JWKS_MIN_REFRESH_INTERVAL,
+            default_algorithm=keycloak_config.ALGORITHMS[0],
+        )
+
+    if keycloak_config.PUBLIC_KEY:
+        return StaticKeyProvider(keycloak_config.PUBLIC_KEY)
+
+    raise ConfigurationBusinessError(status="500", detail="Either KEYCLOAK_JWKS_URI or KEYCLOAK_PUBLIC_KEY must be set")
+
+
+@lru_cache(maxsize=None)
+def get_key_provider() -> IKeyProvider:
+    """
+    Провайдер ключей процесса. Создается при первой проверке токена, поэтому приложение без настроенных ключей
+    запускается, а ошибка конфигурации возвращается только защищенными эндпоинтами
+
+    :return: Провайдер ключей
+    :raise: ConfigurationBusinessError
+    """
+    return create_key_provider(config.KEYCLOAK_CONFIG)
@@ -0,0 +1,95 @@
+import hashlib
+import time
+from typing import Callable, Optional
+
+from core.dto.auth import UserDTO
+from infrastructure.cache.lru import CacheStats, TTLCache
+
+
+class CachedToken:
+    """
+    Результат проверки JWT токена
+
+    payload: dict: Payload токена
+    user: UserDTO: Пользователь, полученный из payload
+    roles: frozenset[str]: Роли пользователя (клиентские и realm)
+    expires_at: float: Время (unix timestamp), после которого запись считается недействительной
+    roles_masks: dict[tuple[int, int], int]: Битовые маски ролей по ключу (id реестра политик, версия реестра).
+        Кэш токенов общий для всех middleware, а биты ролей у разных реестров различаются
+    """
+
+    __slots__ = ("payload", "user", "roles", "expires_at", "roles_masks")
+
+    def __init__(self, payload: dict, user: UserDTO, roles: frozenset[str], expires_at: float) -> None:
+        self.payload = payload
+        self.user = user
+        self.roles = roles
+        self.expires_at = expires_at
+        self.roles_masks: dict[tuple[int, int], int] = {}
+
+
+class TokenCache:
+    """
+    Ограниченный LRU кэш проверенных JWT токенов.
+
+    Ключом является sha256 от токена, поэтому сами токены в памяти не хранятся. Запись живет не дольше
+    claim-а `exp` токена и не дольше `max_ttl` секунд.
+    """
+
+    __slots__ = ("_max_ttl", "_clock", "_entries")
+
+    def __init__(self, max_size: int = 1024, max_ttl: float = 300.0, clock: Callable[[], float] = time.time) -> None:
+        self._max_ttl = max_ttl
+        self._clock = clock
+        self._entries: TTLCache[bytes, CachedToken] = TTLCache(max_size, clock)
+
+    @property
+    def stats(self) -> CacheStats:
+        return self._entries.stats
+
+    @property
+    def enabled(self) -> bool:
+        return self._entries.enabled
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, token: str) -> Optional[CachedToken]:
+        """
+        Получение проверенного токена из кэша
+
+        :param token: JWT
+        :return: Запись кэша или None, если токена нет в кэше или срок его действия истек
+        """
+        if not self.enabled:
+            return None
+        return self._entries.get(self._make_key(token))
+
+    def put(self, token: str, *, payload: dict, user: UserDTO, roles: frozenset[str]) -> CachedToken:
+        """
+        Сохранение проверенного токена в кэш
+
+        :param token: JWT
+        :param payload: Проверенный payload токена
+        :param user: Пользователь из payload
+        :param roles: Роли пользователя
+        :return: Запись кэша
+        """
+        expires_at = self._clock() + self._max_ttl
+        exp = payload.get("exp")
+        if isinstance(exp, (int, float)):
+            expires_at = min(expires_at, float(exp))
+
+        entry = CachedToken(payload=payload, user=user, roles=roles, expires_at=expires_at)
+
+        if self.enabled:
+            self._entries.put(self._make_key(token), entry, expires_at)
+
+        return entry
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    @staticmethod
+    def _make_key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
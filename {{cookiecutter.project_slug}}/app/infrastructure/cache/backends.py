@@ -0,0 +1,163 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Callable, Iterable, Optional, Protocol, Set, Union
+
+
+class ICacheBackend(ABC):
+    """
+    Хранилище сериализованных результатов с привязкой записей к тегам
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float, tags: Iterable[str] = ()) -> None:
+        ...
+
+    @abstractmethod
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        """
+        Удаление записей, привязанных к тегам
+
+        :param tags: Теги
+        :return: Количество удаленных записей
+        """
+        ...
+
+
+class MemoryCacheBackend(ICacheBackend):
+    """
+    Ограниченный LRU кэш в памяти процесса. Запись живет не дольше ttl, переданного в set
+    """
+
+    __slots__ = ("_max_size", "_clock", "_entries", "_tags")
+
+    def __init__(self, max_size: int = 10_000, clock: Callable[[], float] = time.monotonic) -> None:
+        self._max_size = max_size
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[bytes, float, tuple[str, ...]]] = OrderedDict()
+        self._tags: dict[str, set[str]] = dict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+
+        value, expires_at, _ = entry
+        if expires_at <= self._clock():
+            self._remove(key)
+            return None
+
+        self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: float, tags: Iterable[str] = ()) -> None:
+        if self._max_size <= 0 or ttl <= 0:
+            return
+
+        if key in self._entries:
+            self._remove(key)
+
+        tags = tuple(tags)
+        self._entries[key] = (value, self._clock() + ttl, tags)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+
+        while len(self._entries) > self._max_size:
+            self._remove(next(iter(self._entries)))
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        count = 0
+        for tag in tags:
+            for key in self._tags.pop(tag, ()):
+                if key in self._entries:
+                    self._remove(key)
+                    count += 1
+        return count
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._tags.clear()
+
+    def _remove(self, key: str) -> None:
+        _, _, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class RemoteCacheClient(Protocol):
+    """
+    Подмножество команд redis.asyncio.Redis, используемое RemoteCacheBackend
+    """
+
+    async def get(self, name: str) -> Optional[bytes]:
+        ...
+
+    async def set(self, name: str, value: bytes, px: Optional[int] = None) -> object:
+        ...
+
+    async def delete(self, *names: str) -> int:
+        ...
+
+    async def sadd(self, name: str, *values: str) -> int:
+        ...
+
+    async def smembers(self, name: str) -> Set[Union[bytes, str]]:
+        ...
+
+    async def pexpire(self, name: str, time: int) -> object:
+        ...
+
+
+class RemoteCacheBackend(ICacheBackend):
+    """
+    Кэш во внешнем хранилище с redis-совместимым клиентом, общий для всех процессов и реплик сервиса.
+
+    Ключи записей тега хранятся в множестве `<prefix>tag:<tag>`, срок жизни которого продлевается при каждой записи
+    до max(ttl, tag_ttl). tag_ttl должен быть не меньше TTL любой записи, иначе часть записей не будет инвалидирована.
+    """
+
+    __slots__ = ("_client", "_prefix", "_tag_ttl")
+
+    def __init__(self, client: RemoteCacheClient, prefix: str = "query-cache:", tag_ttl: float = 86400.0) -> None:
+        self._client = client
+        self._prefix = prefix
+        self._tag_ttl = tag_ttl
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self._client.get(self._prefix + key)
+
+    async def set(self, key: str, value: bytes, ttl: float, tags: Iterable[str] = ()) -> None:
+        ttl_ms = int(ttl * 1000)
+        if ttl_ms <= 0:
+            return
+
+        key = self._prefix + key
+        for tag in tags:
+            tag_key = self._tag_key(tag)
+            await self._client.sadd(tag_key, key)
+            await self._client.pexpire(tag_key, max(ttl_ms, int(self._tag_ttl * 1000)))
+        await self._client.set(key, value, px=ttl_ms)
+
+    async def invalidate_tags(self, tags: Iterable[str]) -> int:
+        count = 0
+        for tag in tags:
+            tag_key = self._tag_key(tag)
+            keys = [key.decode() if isinstance(key, bytes) else key for key in await self._client.smembers(tag_key)]
+            if keys:
+                count += await self._client.delete(*keys)
+            await self._client.delete(tag_key)
+        return count
+
+    def _tag_key(self, tag: str) -> str:
+        return f"{self._prefix}tag:{tag}"
@@ -0,0 +1,93 @@
+from collections import OrderedDict
+from typing import Callable, Generic, Hashable, Optional, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class CacheStats:
+    __slots__ = ("hits", "misses", "evictions")
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def as_dict(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions}
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Ограниченный LRU кэш в памяти процесса со сроком жизни записей.
+
+    Срок жизни задается при записи абсолютным временем по `clock`. Устаревшая запись удаляется при чтении,
+    при переполнении удаляется запись, которая дольше всех не читалась. Кэш с `max_size` <= 0 отключен.
+    """
+
+    __slots__ = ("_max_size", "_clock", "_entries", "_stats")
+
+    def __init__(self, max_size: int, clock: Callable[[], float]) -> None:
+        self._max_size = max_size
+        self._clock = clock
+        self._entries: OrderedDict[K, tuple[V, float]] = OrderedDict()
+        self._stats = CacheStats()
+
+    @property
+    def stats(self) -> CacheStats:
+        return self._stats
+
+    @property
+    def enabled(self) -> bool:
+        return self._max_size > 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: K) -> Optional[V]:
+        """
+        Получение значения из кэша
+
+        :param key: Ключ
+        :return: Значение или None, если записи нет или срок ее жизни истек
+        """
+        if not self.enabled:
+            return None
+
+        entry = self._entries.get(key)
+        if entry is None:
+            self._stats.misses += 1
+            return None
+
+        value, expires_at = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self._stats.evictions += 1
+            self._stats.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self._stats.hits += 1
+        return value
+
+    def put(self, key: K, value: V, expires_at: float) -> None:
+        """
+        Сохранение значения в кэш
+
+        :param key: Ключ
+        :param value: Значение
+        :param expires_at: Время по clock, после которого запись считается недействительной
+        :return:
+        """
+        if not self.enabled or expires_at <= self._clock():
+            return
+
+        self._entries[key] = (value, expires_at)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+            self._stats.evictions += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
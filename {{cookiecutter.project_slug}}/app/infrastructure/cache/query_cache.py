@@ -0,0 +1,293 @@
+import asyncio
+import hashlib
+import typing
+from functools import lru_cache{% if cookiecutter.use_postgres == 'yes' %}, partial{% endif %}
+from typing import Any, Awaitable, Callable, Generic, Iterable, Optional, Union
+
+import orjson
+import structlog
+from opentelemetry import metrics
+from pydantic import parse_obj_as
+from pydantic.json import pydantic_encoder
+
+from core.interfaces.query import IQueryHandler, TQuery, TResult
+from core.usecases.base import BaseQuery
+from infrastructure.cache.backends import ICacheBackend
+{%- if cookiecutter.use_postgres == 'yes' %}
+from infrastructure.db.scope import get_current_scope
+{%- endif %}
+
+logger = structlog.get_logger(__name__)
+
+_meter = metrics.get_meter(__name__)
+_lookups_counter = _meter.create_counter(
+    "query_cache.lookups", description="Обращения к кэшу результатов запросов по исходу: hit, miss, coalesced"
+)
+
+Tags = Union[Iterable[str], Callable[[Any], Iterable[str]]]
+
+
+class QueryCacheStats:
+    __slots__ = ("hits", "misses", "coalesced", "errors")
+
+    def __init__(self) -> None:
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.errors = 0
+
+    @property
+    def hit_ratio(self) -> float:
+        lookups = self.hits + self.misses + self.coalesced
+        return (self.hits + self.coalesced) / lookups if lookups else 0.0
+
+    def as_dict(self) -> dict[str, Union[int, float]]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "hit_ratio": self.hit_ratio,
+        }
+
+
+class QueryCache:
+    """
+    Кэш результатов query handlers поверх ICacheBackend.
+
+    Одновременные промахи по одному ключу в процессе выполняют запрос один раз (single-flight), остальные вызовы
+    ждут его результат, восстановленный из JSON. Ошибки хранилища не прерывают запрос: результат берется
+    из обработчика.
+    Инвалидация тега во время выполнения запроса с этим тегом отменяет сохранение его результата в кэш.
+    """
+
+    __slots__ = ("_backend", "_namespace", "_in_flight", "_loading_tags", "_stats")
+
+    def __init__(self, backend: ICacheBackend, namespace: str = "") -> None:
+        self._backend = backend
+        self._namespace = namespace
+        self._in_flight: dict[str, asyncio.Future] = dict()
+        # тег -> [количество выполняющихся запросов с тегом, номер инвалидации тега]
+        self._loading_tags: dict[str, list[int]] = dict()
+        self._stats = QueryCacheStats()
+
+    @property
+    def stats(self) -> QueryCacheStats:
+        return self._stats
+
+    def make_key(self, query: BaseQuery) -> str:
+        """
+        Ключ кэша запроса: класс запроса и sha256 от значений его полей
+
+        :param query: Запрос
+        :return: Ключ
+        """
+        payload = orjson.dumps(query.dict(), default=pydantic_encoder, option=orjson.OPT_SORT_KEYS)
+        query_class = type(query)
+        return (
+            f"{self._namespace}{query_class.__module__}.{query_class.__qualname__}:"
+            f"{hashlib.sha256(payload).hexdigest()}"
+        )
+
+    async def get_or_load(
+            self,
+            key: str,
+            load: Callable[[], Awaitable[Any]],
+            result_type: Any,
+            ttl: float,
+            tags: Iterable[str] = (),
+            name: str = "",
+    ) -> Any:
+        """
+        Результат из кэша или из load с сохранением в кэш
+
+        :param key: Ключ
+        :param load: Выполнение запроса
+        :param result_type: Тип результата для восстановления из кэша
+        :param ttl: Время жизни записи в секундах
+        :param tags: Теги записи для инвалидации
+        :param name: Имя обработчика в метриках
+        :return: Результат
+        """
+        while True:
+            flight = self._in_flight.get(key)
+            if flight is None:
+                break
+
+            await asyncio.wait([flight])
+            # Выполнявший запрос вызов был отменен - запрос выполнит один из ожидавших
+            if not flight.cancelled():
+                self._record("coalesced", name)
+                return parse_obj_as(result_type, orjson.loads(flight.result()))
+
+        cached = await self._get(key)
+        if cached is not None:
+            self._record("hits", name)
+            return parse_obj_as(result_type, orjson.loads(cached))
+
+        self._record("misses", name)
+        return await self._load(key, load, ttl, tags)
+
+    async def invalidate(self, *tags: str) -> {% if cookiecutter.use_postgres == 'yes' %}Optional[int]{% else %}int{% endif %}:
+        """
+        Удаление результатов, сохраненных с тегами.
+{%- if cookiecutter.use_postgres == 'yes' %}
+        Внутри db_session_scope удаление откладывается до фиксации транзакций области и не выполняется
+        при откате: запрос, выполненный до фиксации, прочитает старые данные и снова сохранит их в кэш.
+        Вне области результаты удаляются сразу
+{%- endif %}
+
+        :param tags: Теги
+        :return: Количество удаленных записей
+{%- if cookiecutter.use_postgres == 'yes' %} или None, если удаление отложено{% endif %}
+        """
+{%- if cookiecutter.use_postgres == 'yes' %}
+        scope = get_current_scope()
+        if scope is not None:
+            scope.after_commit(partial(self.invalidate_now, *tags))
+            return None
+{%- endif %}
+        return await self.invalidate_now(*tags)
+
+    async def invalidate_now(self, *tags: str) -> int:
+        """
+        Немедленное удаление результатов, сохраненных с тегами. Выполняющиеся в процессе запросы с этими тегами
+        не сохраняют результат. Запросы других процессов с общим хранилищем не отслеживаются: результат,
+        прочитанный ими до фиксации изменений, может остаться в кэше до истечения ttl
+
+        :param tags: Теги
+        :return: Количество удаленных записей
+        """
+        for tag in tags:
+            loading = self._loading_tags.get(tag)
+            if loading is not None:
+                loading[1] += 1
+        return await self._backend.invalidate_tags(tags)
+
+    async def _load(self, key: str, load: Callable[[], Awaitable[Any]], ttl: float, tags: Iterable[str]) -> Any:
+        flight = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = flight
+        tags = tuple(tags)
+        generations = self._track_tags(tags)
+
+        try:
+            result = await load()
+            payload = orjson.dumps(result, default=pydantic_encoder)
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except BaseException as e:
+            flight.set_exception(e)
+            # Исключение получает вызывающий, ожидающие получат его из flight.result()
+            flight.exception()
+            raise
+        else:
+            flight.set_result(payload)
+        finally:
+            del self._in_flight[key]
+            is_fresh = self._release_tags(tags) == generations
+
+        if is_fresh:
+            await self._set(key, payload, ttl, tags)
+        return result
+
+    def _track_tags(self, tags: tuple[str, ...]) -> list[int]:
+        generations = []
+        for tag in tags:
+            loading = self._loading_tags.setdefault(tag, [0, 0])
+            loading[0] += 1
+            generations.append(loading[1])
+        return generations
+
+    def _release_tags(self, tags: tuple[str, ...]) -> list[int]:
+        # Счетчики тегов без выполняющихся запросов удаляются, чтобы словарь не рос с количеством тегов
+        generations = []
+        for tag in tags:
+            loading = self._loading_tags[tag]
+            generations.append(loading[1])
+            loading[0] -= 1
+            if not loading[0]:
+                del self._loading_tags[tag]
+        return generations
+
+    async def _get(self, key: str) -> Optional[bytes]:
+        try:
+            return await self._backend.get(key)
+        except Exception:
+            self._stats.errors += 1
+            logger.exception("Query cache read failed", key=key)
+            return None
+
+    async def _set(self, key: str, value: bytes, ttl: float, tags: Iterable[str]) -> None:
+        try:
+            await self._backend.set(key, value, ttl, tags)
+        except Exception:
+            self._stats.errors += 1
+            logger.exception("Query cache write failed", key=key)
+
+    def _record(self, outcome: str, name: str) -> None:
+        setattr(self._stats, outcome, getattr(self._stats, outcome) + 1)
+        _lookups_counter.add(1, {"handler": name, "result": outcome})
+
+
+class CachedQueryHandler(IQueryHandler[TQuery, TResult], Generic[TQuery, TResult]):
+    """
+    Обработчик запросов, возвращающий результат обернутого обработчика из QueryCache.
+
+    Результаты хранятся сериализованными, поэтому вызовы не разделяют экземпляры моделей.
+    Настраивается для каждого обработчика в QueriesContainer:
+
+        items_query_handler = providers.Factory(
+            CachedQueryHandler,
+            handler=providers.Factory(ItemsQueryHandler, session=db_session),
+            cache=query_cache,
+            ttl=30,
+            tags=lambda query: ["items", f"items:{query.owner_id}"],
+        )
+    """
+
+    __slots__ = ("_handler", "_cache", "_ttl", "_tags", "_result_type", "_name")
+
+    def __init__(
+            self,
+            handler: IQueryHandler[TQuery, TResult],
+            cache: QueryCache,
+            ttl: float,
+            tags: Tags = (),
+            result_type: Any = None,
+    ) -> None:
+        """
+        :param handler: Обернутый обработчик
+        :param cache: Кэш
+        :param ttl: Время жизни результата в секундах
+        :param tags: Теги результата или функция, получающая их из запроса
+        :param result_type: Тип результата, по умолчанию из IQueryHandler[TQuery, TResult] обработчика
+        """
+        self._handler = handler
+        self._cache = cache
+        self._ttl = ttl
+        self._tags = tags
+        self._result_type = result_type or _get_result_type(type(handler))
+        self._name = type(handler).__name__
+
+    async def ask(self, query: TQuery) -> TResult:
+        tags = self._tags(query) if callable(self._tags) else self._tags
+        return await self._cache.get_or_load(
+            self._cache.make_key(query),
+            lambda: self._handler.ask(query),
+            self._result_type,
+            self._ttl,
+            tags,
+            self._name,
+        )
+
+
+@lru_cache(maxsize=None)
+def _get_result_type(handler_class: type) -> Any:
+    for klass in handler_class.__mro__:
+        for base in getattr(klass, "__orig_bases__", ()):
+            if typing.get_origin(base) is IQueryHandler:
+                result_type = typing.get_args(base)[1]
+                if not isinstance(result_type, typing.TypeVar):
+                    return result_type
+    raise TypeError(f"Cannot infer result type of {handler_class.__name__}, pass result_type explicitly")
@@ -1,8 +1,9 @@
 import uuid
-from typing import Any, Optional
+from typing import Any, Literal, Optional
 
-from pydantic import AnyUrl, BaseSettings, Extra, HttpUrl, validator, Field
+from pydantic import AnyUrl, BaseSettings, Extra, HttpUrl, validator, Field, SecretStr
 
+from infrastructure.instrumentation import TracingLevel
 from infrastructure.log import LogLevel, LogFormat
 
 
@@ -25,6 +26,25 @@ class PostgresConfig(BaseProjectConfig):
     PASSWORD: str
     DB: str
     URI: Optional[_AsyncPostgresDsn] = None
+    REPLICA_URI: Optional[_AsyncPostgresDsn] = None
+
+    POOL_SIZE: int = 5
+    POOL_MAX_OVERFLOW: int = 10
+    POOL_TIMEOUT: float = 30.0
+    POOL_RECYCLE: int = -1
+    POOL_PRE_PING: bool = True
+    STATEMENT_CACHE_SIZE: int = 100
+    PREPARED_STATEMENT_CACHE_SIZE: int = 100
+    SERVER_SETTINGS: dict[str, str] = {}
+    BULK_BATCH_SIZE: int = 10_000
+    STREAM_CHUNK_SIZE: int = 1000
+
+    SLOW_QUERY_LOG_ENABLED: bool = True
+    SLOW_QUERY_THRESHOLD_MS: float = 500.0
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = Field(0.0, ge=0.0, le=1.0)
+    SLOW_QUERY_REDACT_PARAMETERS: bool = True
+    QUERY_STATS_MAX_STATEMENTS: int = 1000
+    QUERY_STATS_SAMPLES: int = 1000
 
     @validator("URI", pre=True, allow_reuse=True)
     def assemble_async_db_connection(cls, v: Optional[str], values: dict[str, Any]) -> Any:
@@ -58,11 +78,22 @@ class TracingConfig(BaseProjectConfig):
     NAMESPACE: str = "default"
     INSTANCE_ID: str = Field(default=str(uuid.uuid4()))
     VERSION: str = "1.0.0"
+    LEVEL: TracingLevel = TracingLevel.COARSE
 
     class Config(BaseProjectConfig.Config):
         env_prefix = "TRACING_"
 
 
+class MetricsConfig(BaseProjectConfig):
+    # Адрес OpenTelemetry Collector, без него метрики не экспортируются
+    OTLP_ENDPOINT: Optional[str] = None
+    OTLP_INSECURE: bool = True
+    EXPORT_INTERVAL_MS: int = Field(60_000, gt=0)
+
+    class Config(BaseProjectConfig.Config):
+        env_prefix = "METRICS_"
+
+
 class LogConfig(BaseProjectConfig):
     LEVEL: LogLevel = LogLevel.INFO
     FORMAT: LogFormat = LogFormat.PLAIN
@@ -91,6 +122,19 @@ class KafkaConfig(BaseProjectConfig):
     SCHEMA_REGISTRY_URL: str = "https://test.com"
     SCHEMA_REGISTRY_USER: Optional[str] = None
     SCHEMA_REGISTRY_PASSWORD: Optional[str] = None
+    # Файл кэша схем реестра для запуска без обращений к реестру (без него кэш только в памяти)
+    SCHEMA_CACHE_PATH: Optional[str] = None
+    # Проверка сообщений кодека по схеме: always, sampled (CODEC_VALIDATION_PERCENT% сообщений) или off
+    CODEC_VALIDATION: Literal["always", "sampled", "off"] = "always"
+    CODEC_VALIDATION_PERCENT: float = Field(1.0, ge=0, le=100)
+
+    # producer: задержка для сбора пачки, размер пачки партиции в байтах, сжатие (gzip, lz4, zstd),
+    # подтверждения (0, 1, -1 - все реплики) и максимум неподтвержденных сообщений KafkaProducerService
+    PRODUCER_LINGER_MS: int = Field(0, ge=0)
+    PRODUCER_MAX_BATCH_SIZE: int = Field(16384, gt=0)
+    PRODUCER_COMPRESSION: Optional[str] = Field(None, regex="^(gzip|lz4|zstd)$")
+    PRODUCER_ACKS: int = Field(-1, ge=-1, le=1)
+    PRODUCER_MAX_IN_FLIGHT: int = Field(10_000, gt=0)
 
     # topics
     TOPIC_TEST: str
@@ -103,14 +147,62 @@ class KafkaConfig(BaseProjectConfig):
         env_prefix = "KAFKA_"
 
 {% endif %}
+class KeycloakConfig(BaseProjectConfig):
+    PUBLIC_KEY: Optional[str] = None
+    ALGORITHMS: list[str] = ["RS256"]
+    CLIENT_ID: str
+
+    # JWKS: URL (http/https) или путь до локального файла. Имеет приоритет над PUBLIC_KEY
+    JWKS_URI: Optional[str] = None
+    JWKS_REFRESH_INTERVAL: float = 300.0
+    JWKS_MIN_REFRESH_INTERVAL: float = 10.0
+
+    # Кэш проверенных токенов (0 - кэш отключен)
+    TOKEN_CACHE_SIZE: int = 1024
+    TOKEN_CACHE_MAX_TTL: float = 300.0
+
+    class Config(BaseProjectConfig.Config):
+        env_prefix = "KEYCLOAK_"
+
+
 class HealthCheckConfig(BaseProjectConfig):
     PERCENTAGE_MINIMUM_FOR_WORKING_CAPACITY: float = 80.0
     PERCENTAGE_MAXIMUM_FOR_WORKING_CAPACITY: float = 100.0
+    COMMAND_TIMEOUT: Optional[float] = 3.0
+    PROBE_TIMEOUT: float = 5.0
+    CACHE_ENABLED: bool = False
+    CACHE_REFRESH_INTERVAL: float = 5.0
+    CACHE_MAX_STALENESS: float = 15.0
 
     class Config:
         env_prefix = "HEALTHCHECK_"
 
 
+class PaginationConfig(BaseProjectConfig):
+    CURSOR_SECRET: Optional[SecretStr] = None
+    COUNT_CACHE_SIZE: int = 1024
+    COUNT_CACHE_TTL: float = 60.0
+
+    class Config(BaseProjectConfig.Config):
+        env_prefix = "PAGINATION_"
+
+
+class QueryCacheConfig(BaseProjectConfig):
+    MAX_SIZE: int = 10_000
+    NAMESPACE: str = ""
+
+    class Config(BaseProjectConfig.Config):
+        env_prefix = "QUERY_CACHE_"
+
+
+class AdminConfig(BaseProjectConfig):
+    ENABLED: bool = False
+    ROLES: list[str] = ["admin"]
+
+    class Config(BaseProjectConfig.Config):
+        env_prefix = "ADMIN_"
+
+
 class Config(BaseProjectConfig):
     PROJECT_NAME: str
     ENVIRONMENT: str = "dev"
@@ -119,7 +211,12 @@ class Config(BaseProjectConfig):
     LOG: LogConfig = LogConfig()
     CORS_CONFIG: CORSConfig = CORSConfig()
     TRACING_CONFIG: TracingConfig = TracingConfig()
+    METRICS_CONFIG: MetricsConfig = MetricsConfig()
     HEALTHCHECK_CONFIG: HealthCheckConfig = HealthCheckConfig()
+    KEYCLOAK_CONFIG: KeycloakConfig = KeycloakConfig()
+    PAGINATION_CONFIG: PaginationConfig = PaginationConfig()
+    QUERY_CACHE_CONFIG: QueryCacheConfig = QueryCacheConfig()
+    ADMIN_CONFIG: AdminConfig = AdminConfig()
     SENTRY_CONFIG: SentryConfig = SentryConfig() {% if cookiecutter.use_kafka == 'yes' %}
     KAFKA_CONFIG: KafkaConfig = KafkaConfig()
 {% endif %} {% if cookiecutter.use_postgres == 'yes' %}
@@ -0,0 +1,133 @@
+import itertools
+import uuid
+from typing import Any, Iterable, Iterator, Optional, Sequence, Union
+
+from sqlalchemy import Table
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+TableLike = Union[Table, type]
+
+
+class BulkWriter:
+    """
+    Массовая запись строк через COPY (asyncpg copy_records_to_table).
+
+    Запись выполняется на соединении сессии и в ее транзакции: строки видны остальным запросам сессии
+    и фиксируются или откатываются вместе с областью db_session_scope. Перед COPY выполняется flush сессии,
+    поэтому ожидающие изменения ORM записываются раньше.
+    COPY не проходит через ORM: события, значения по умолчанию на стороне Python и identity map не используются.
+    """
+
+    __slots__ = ("_session", "_batch_size")
+
+    def __init__(self, session: AsyncSession, batch_size: int = 10_000) -> None:
+        if batch_size <= 0:
+            raise ValueError("batch_size must be positive")
+        self._session = session
+        self._batch_size = batch_size
+
+    async def copy(
+            self, table: TableLike, rows: Iterable[Sequence[Any]], columns: Optional[Sequence[str]] = None
+    ) -> int:
+        """
+        Вставка строк через COPY пачками по batch_size
+
+        :param table: Таблица или ORM модель
+        :param rows: Строки, значения в порядке columns
+        :param columns: Колонки, по умолчанию все колонки таблицы
+        :return: Количество записанных строк
+        """
+        table = _get_table(table)
+        columns = list(columns or table.columns.keys())
+        connection = await self._get_connection()
+        return await self._copy(connection, table.name, table.schema, rows, columns)
+
+    async def upsert(
+            self,
+            table: TableLike,
+            rows: Iterable[Sequence[Any]],
+            conflict_columns: Sequence[str],
+            columns: Optional[Sequence[str]] = None,
+            update_columns: Optional[Sequence[str]] = None,
+    ) -> int:
+        """
+        Вставка или обновление строк: COPY во временную таблицу и INSERT ... ON CONFLICT из нее.
+        Строки не должны повторять значения conflict_columns, иначе Postgres отклонит INSERT ... ON CONFLICT
+
+        :param table: Таблица или ORM модель
+        :param rows: Строки, значения в порядке columns
+        :param conflict_columns: Колонки уникального ограничения
+        :param columns: Колонки, по умолчанию все колонки таблицы
+        :param update_columns: Обновляемые при конфликте колонки, по умолчанию columns без conflict_columns.
+            Пустой список - DO NOTHING
+        :return: Количество вставленных или обновленных строк
+        """
+        table = _get_table(table)
+        columns = list(columns or table.columns.keys())
+        if update_columns is None:
+            update_columns = [column for column in columns if column not in conflict_columns]
+
+        connection = await self._get_connection()
+        quote = connection.dialect.identifier_preparer.quote
+        target = connection.dialect.identifier_preparer.format_table(table)
+        staging = f"bulk_upsert_{uuid.uuid4().hex}"
+
+        # Временная таблица живет до конца транзакции даже при ошибке, DROP ниже освобождает ее раньше
+        await connection.exec_driver_sql(
+            f"CREATE TEMP TABLE {staging} ON COMMIT DROP AS SELECT {', '.join(map(quote, columns))} "
+            f"FROM {target} WITH NO DATA"
+        )
+        await self._copy(connection, staging, None, rows, columns)
+
+        column_list = ", ".join(map(quote, columns))
+        if update_columns:
+            assignments = ", ".join(f"{quote(column)} = EXCLUDED.{quote(column)}" for column in update_columns)
+            on_conflict = f"DO UPDATE SET {assignments}"
+        else:
+            on_conflict = "DO NOTHING"
+
+        result = await connection.exec_driver_sql(
+            f"INSERT INTO {target} ({column_list}) SELECT {column_list} FROM {staging} "
+            f"ON CONFLICT ({', '.join(map(quote, conflict_columns))}) {on_conflict}"
+        )
+        await connection.exec_driver_sql(f"DROP TABLE {staging}")
+        return result.rowcount
+
+    async def _get_connection(self) -> AsyncConnection:
+        await self._session.flush()
+        connection = await self._session.connection()
+
+        # asyncpg диалект начинает транзакцию при первом запросе, COPY должен выполняться уже внутри нее
+        raw_connection = await connection.get_raw_connection()
+        if not raw_connection.driver_connection.is_in_transaction():
+            await connection.exec_driver_sql("SELECT 1")
+
+        return connection
+
+    async def _copy(
+            self,
+            connection: AsyncConnection,
+            table_name: str,
+            schema_name: Optional[str],
+            rows: Iterable[Sequence[Any]],
+            columns: Sequence[str],
+    ) -> int:
+        driver_connection = (await connection.get_raw_connection()).driver_connection
+
+        count = 0
+        for batch in _batched(rows, self._batch_size):
+            await driver_connection.copy_records_to_table(
+                table_name, records=batch, columns=columns, schema_name=schema_name
+            )
+            count += len(batch)
+        return count
+
+
+def _get_table(table: TableLike) -> Table:
+    return table if isinstance(table, Table) else table.__table__
+
+
+def _batched(rows: Iterable[Sequence[Any]], size: int) -> Iterator[list[Sequence[Any]]]:
+    iterator = iter(rows)
+    while batch := list(itertools.islice(iterator, size)):
+        yield batch
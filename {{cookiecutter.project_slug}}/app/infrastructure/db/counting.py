@@ -0,0 +1,182 @@
+import hashlib
+import time
+from typing import Any, Callable, Generic, Optional, TypeVar
+
+import orjson
+from sqlalchemy import Table, func, select, text
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.base import Executable
+from sqlalchemy.sql.compiler import SQLCompiler
+from sqlalchemy.sql.elements import ClauseElement
+
+from core.usecases.pagination import CountStrategy, PageInfo, PaginationQuery, TotalCount
+from infrastructure.cache.lru import CacheStats, TTLCache
+
+RowType = TypeVar("RowType")
+
+
+class _ExplainJSON(Executable, ClauseElement):
+    inherit_cache = False
+
+    def __init__(self, statement: Select) -> None:
+        self.statement = statement
+
+
+@compiles(_ExplainJSON, "postgresql")
+def _compile_explain_json(element: _ExplainJSON, compiler: SQLCompiler, **kwargs: Any) -> str:
+    return f"EXPLAIN (FORMAT JSON) {compiler.process(element.statement, **kwargs)}"
+
+
+class CountCache:
+    """
+    Ограниченный LRU кэш результатов COUNT(*).
+
+    Ключом является отпечаток запроса: sha256 от SQL и значений параметров, поэтому разные фильтры
+    хранятся отдельно. Запись живет не дольше `ttl` секунд.
+    """
+
+    __slots__ = ("_ttl", "_clock", "_entries")
+
+    def __init__(self, max_size: int = 1024, ttl: float = 60.0, clock: Callable[[], float] = time.monotonic) -> None:
+        self._ttl = ttl
+        self._clock = clock
+        self._entries: TTLCache[bytes, int] = TTLCache(max_size, clock)
+
+    @property
+    def stats(self) -> CacheStats:
+        return self._entries.stats
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, fingerprint: bytes) -> Optional[int]:
+        return self._entries.get(fingerprint)
+
+    def put(self, fingerprint: bytes, value: int) -> None:
+        self._entries.put(fingerprint, value, self._clock() + self._ttl)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+
+def fingerprint_statement(statement: Select) -> bytes:
+    """
+    Отпечаток запроса для кэша количества записей
+
+    :param statement: Запрос
+    :return: sha256 от SQL и параметров
+    """
+    compiled = statement.compile(dialect=postgresql.dialect())
+    params = sorted((name, repr(value)) for name, value in compiled.params.items())
+    return hashlib.sha256(str(compiled).encode() + orjson.dumps(params)).digest()
+
+
+class PageCounter:
+    """
+    Подсчет общего количества записей запроса выбранной стратегией
+    """
+
+    __slots__ = ("_cache",)
+
+    def __init__(self, cache: Optional[CountCache] = None) -> None:
+        self._cache = cache if cache is not None else CountCache()
+
+    async def count(self, session: AsyncSession, statement: Select, strategy: CountStrategy) -> TotalCount:
+        """
+        Количество записей запроса
+
+        :param session: Сессия
+        :param statement: Запрос страницы, ORDER BY, LIMIT и OFFSET игнорируются
+        :param strategy: Стратегия подсчета
+        :return: Количество и стратегия, которой оно получено
+        """
+        statement = statement.order_by(None).limit(None).offset(None)
+
+        if strategy == CountStrategy.SKIPPED:
+            return TotalCount(value=None, strategy=strategy)
+        if strategy == CountStrategy.ESTIMATED:
+            return TotalCount(value=await self._count_estimated(session, statement), strategy=strategy)
+        if strategy == CountStrategy.CACHED:
+            return TotalCount(value=await self._count_cached(session, statement), strategy=strategy)
+        return TotalCount(value=await self._count_exact(session, statement), strategy=CountStrategy.EXACT)
+
+    @staticmethod
+    async def _count_exact(session: AsyncSession, statement: Select) -> int:
+        return (await session.execute(select(func.count()).select_from(statement.subquery()))).scalar_one()
+
+    async def _count_cached(self, session: AsyncSession, statement: Select) -> int:
+        fingerprint = fingerprint_statement(statement)
+        value = self._cache.get(fingerprint)
+        if value is None:
+            value = await self._count_exact(session, statement)
+            self._cache.put(fingerprint, value)
+        return value
+
+    @staticmethod
+    async def _count_estimated(session: AsyncSession, statement: Select) -> int:
+        # Запрос без фильтров по одной таблице - оценка из статистики таблицы, иначе - из плана запроса
+        froms = statement.get_final_froms()
+        if statement.whereclause is None and len(froms) == 1 and isinstance(froms[0], Table):
+            reltuples = (await session.execute(
+                text("SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(:name)"),
+                {"name": froms[0].fullname},
+            )).scalar()
+            # -1 - таблица еще не анализировалась
+            if reltuples is not None and reltuples >= 0:
+                return reltuples
+
+        plan = (await session.execute(_ExplainJSON(statement))).scalar_one()
+        if isinstance(plan, (str, bytes)):
+            plan = orjson.loads(plan)
+        return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class OffsetPage(Generic[RowType]):
+    """
+    Страница выборки по offset/limit
+    """
+
+    __slots__ = ("rows", "total_count", "page")
+
+    def __init__(self, rows: list[RowType], total_count: TotalCount, page: PageInfo) -> None:
+        self.rows = rows
+        self.total_count = total_count
+        self.page = page
+
+
+async def fetch_offset_page(
+        session: AsyncSession,
+        statement: Select,
+        query: PaginationQuery,
+        counter: PageCounter,
+        strategy: CountStrategy = CountStrategy.EXACT,
+        scalars: bool = False,
+) -> OffsetPage:
+    """
+    Выполнение запроса страницы и подсчет количества записей.
+    Запрашивается на одну запись больше страницы, поэтому has_next_page известен при любой стратегии
+
+    :param session: Сессия
+    :param statement: Запрос с ORDER BY, без LIMIT и OFFSET
+    :param query: Смещение и размер страницы
+    :param counter: Подсчет количества
+    :param strategy: Стратегия подсчета
+    :param scalars: Вернуть первые элементы строк (ORM объекты для select(Model))
+    :return: Страница
+    """
+    result = await session.execute(statement.offset(query.offset).limit(query.limit + 1))
+    rows: list[Any] = result.scalars().all() if scalars else result.all()
+    has_next_page = len(rows) > query.limit
+
+    return OffsetPage(
+        rows[:query.limit],
+        await counter.count(session, statement, strategy),
+        PageInfo(
+            page_number=query.offset // query.limit + 1 if query.limit else 1,
+            page_size=query.limit,
+            has_next_page=has_next_page,
+        ),
+    )
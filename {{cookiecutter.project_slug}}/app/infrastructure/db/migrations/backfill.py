@@ -0,0 +1,354 @@
+import datetime
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Iterator, Optional, Sequence, Union
+
+import structlog
+from alembic import op
+from sqlalchemy import BigInteger, Column, DateTime, MetaData, String, Table, Text, bindparam, cast, func, select, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.sql.dml import Delete, Update
+
+logger = structlog.get_logger(__name__)
+
+CHECKPOINT_TABLE_NAME = "backfill_checkpoints"
+# lock_not_available (lock_timeout), query_canceled (statement_timeout), deadlock_detected
+_RETRYABLE_SQLSTATES = frozenset(("55P03", "57014", "40P01"))
+_RETRY_BASE_DELAY = 0.5
+_RETRY_MAX_DELAY = 30.0
+
+checkpoint_metadata = MetaData()
+checkpoints = Table(
+    CHECKPOINT_TABLE_NAME,
+    checkpoint_metadata,
+    Column("name", String(255), primary_key=True),
+    Column("last_key", Text),
+    Column("rows_processed", BigInteger, nullable=False, default=0),
+    Column("updated_at", DateTime(timezone=True), nullable=False),
+    Column("finished_at", DateTime(timezone=True)),
+)
+
+
+class BackfillProgress:
+    __slots__ = ("name", "last_key", "rows", "batches", "retries", "finished")
+
+    def __init__(self, name: str, last_key: Optional[str] = None, rows: int = 0, finished: bool = False) -> None:
+        self.name = name
+        self.last_key = last_key
+        self.rows = rows
+        self.batches = 0
+        self.retries = 0
+        self.finished = finished
+
+
+class BatchedBackfill:
+    """
+    Изменение данных таблицы пачками по диапазонам первичного ключа, каждая пачка в отдельной транзакции.
+
+    Диапазон (last_key, upper] пачки содержит не больше `batch_size` строк, верхняя граница берется из индекса ключа,
+    поэтому пропуски в ключах не дают пустых пачек. Граница последней пачки - максимальный ключ на момент запуска:
+    строки, добавленные позже, должен заполнять уже новый код приложения.
+
+    Пачка выполняется с SET LOCAL lock_timeout и statement_timeout. Пачки, прерванные по таймауту или deadlock,
+    повторяются с экспоненциальной задержкой. Последний обработанный ключ сохраняется в таблицу
+    backfill_checkpoints в транзакции пачки, поэтому прерванная миграция продолжается с места остановки.
+    Изменение должно быть идемпотентным: повторный запуск завершенного изменения пропускается, но пачка
+    может повториться при ошибке фиксации.
+    """
+
+    __slots__ = (
+        "_name",
+        "_statement",
+        "_key_column",
+        "_batch_size",
+        "_pause",
+        "_lock_timeout",
+        "_statement_timeout",
+        "_max_retries",
+        "_progress_interval",
+        "_sleep",
+        "_clock",
+    )
+
+    def __init__(
+            self,
+            name: str,
+            statement: Union[Update, Delete],
+            key_column: Column,
+            batch_size: int = 1000,
+            pause: float = 0.1,
+            lock_timeout: str = "2s",
+            statement_timeout: str = "30s",
+            max_retries: int = 5,
+            progress_interval: float = 10.0,
+            sleep: Callable[[float], None] = time.sleep,
+            clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        :param name: Уникальное имя изменения, ключ контрольной точки
+        :param statement: UPDATE или DELETE таблицы ключа, условие диапазона ключей добавляется к нему
+        :param key_column: Столбец первичного ключа (или другого уникального индексированного ключа)
+        :param batch_size: Количество строк в пачке
+        :param pause: Пауза между пачками в секундах для снижения нагрузки на базу и реплики
+        :param lock_timeout: lock_timeout пачки
+        :param statement_timeout: statement_timeout пачки
+        :param max_retries: Количество повторов пачки, прерванной по таймауту или deadlock
+        :param progress_interval: Интервал логирования прогресса в секундах
+        """
+        self._name = name
+        self._statement = statement
+        self._key_column = key_column
+        self._batch_size = batch_size
+        self._pause = pause
+        self._lock_timeout = lock_timeout
+        self._statement_timeout = statement_timeout
+        self._max_retries = max_retries
+        self._progress_interval = progress_interval
+        self._sleep = sleep
+        self._clock = clock
+
+    def run(self, connection: Connection) -> BackfillProgress:
+        """
+        Выполнение изменения на соединении без открытой транзакции
+
+        :param connection: Соединение
+        :return: Прогресс
+        """
+        with connection.begin():
+            checkpoint_metadata.create_all(connection, checkfirst=True)
+            progress = self._load_progress(connection)
+            max_key = connection.execute(select(cast(func.max(self._key_column), Text))).scalar()
+
+        if progress.finished:
+            logger.info("Backfill already finished", backfill=self._name, rows=progress.rows)
+            return progress
+        if max_key is None:
+            with connection.begin():
+                self._save_checkpoint(connection, None, 0, finished=True)
+            progress.finished = True
+            logger.info("Backfill finished", backfill=self._name, rows=progress.rows, batches=0)
+            return progress
+
+        started_at = logged_at = self._clock()
+        start_rows = progress.rows
+        while not progress.finished:
+            self._run_batch_with_retries(connection, progress, max_key)
+            if progress.finished:
+                break
+
+            now = self._clock()
+            if now - logged_at >= self._progress_interval:
+                logged_at = now
+                self._log_progress("Backfill progress", progress, progress.rows - start_rows, now - started_at)
+            if self._pause > 0:
+                self._sleep(self._pause)
+
+        self._log_progress("Backfill finished", progress, progress.rows - start_rows, self._clock() - started_at)
+        return progress
+
+    def _run_batch_with_retries(self, connection: Connection, progress: BackfillProgress, max_key: str) -> None:
+        attempt = 0
+        while True:
+            try:
+                with connection.begin():
+                    upper_key, rows = self._run_batch(connection, progress, max_key)
+                break
+            except DBAPIError as e:
+                sqlstate = getattr(e.orig, "pgcode", None) or getattr(e.orig, "sqlstate", None)
+                if sqlstate not in _RETRYABLE_SQLSTATES or attempt >= self._max_retries:
+                    raise
+                attempt += 1
+                progress.retries += 1
+                delay = min(_RETRY_MAX_DELAY, _RETRY_BASE_DELAY * 2 ** (attempt - 1))
+                logger.warning(
+                    "Backfill batch interrupted, retrying",
+                    backfill=self._name,
+                    last_key=progress.last_key,
+                    sqlstate=sqlstate,
+                    attempt=attempt,
+                    delay=delay,
+                )
+                self._sleep(delay)
+
+        progress.last_key = upper_key
+        progress.rows += rows
+        progress.batches += 1
+        progress.finished = upper_key == max_key
+
+    def _run_batch(self, connection: Connection, progress: BackfillProgress, max_key: str) -> tuple[str, int]:
+        if connection.dialect.name == "postgresql":
+            connection.execute(
+                text(
+                    "SELECT set_config('lock_timeout', :lock_timeout, true), "
+                    "set_config('statement_timeout', :statement_timeout, true)"
+                ),
+                {"lock_timeout": self._lock_timeout, "statement_timeout": self._statement_timeout},
+            )
+
+        upper_key = self._next_upper_key(connection, progress.last_key, max_key)
+        rows = max(connection.execute(self._statement.where(*self._range(progress.last_key, upper_key))).rowcount, 0)
+        self._save_checkpoint(connection, upper_key, rows, finished=upper_key == max_key)
+        return upper_key, rows
+
+    def _next_upper_key(self, connection: Connection, last_key: Optional[str], max_key: str) -> str:
+        upper_key = connection.execute(
+            select(cast(self._key_column, Text))
+            .where(*self._range(last_key, max_key))
+            .order_by(self._key_column)
+            .offset(self._batch_size - 1)
+            .limit(1)
+        ).scalar()
+        return max_key if upper_key is None else upper_key
+
+    def _range(self, lower_key: Optional[str], upper_key: str) -> list[Any]:
+        # Ключи хранятся текстом и приводятся к типу столбца в базе
+        key_type = self._key_column.type
+        criteria = [self._key_column <= cast(bindparam("upper_key", upper_key, type_=Text, unique=True), key_type)]
+        if lower_key is not None:
+            criteria.append(
+                self._key_column > cast(bindparam("lower_key", lower_key, type_=Text, unique=True), key_type)
+            )
+        return criteria
+
+    def _load_progress(self, connection: Connection) -> BackfillProgress:
+        row = connection.execute(select(checkpoints).where(checkpoints.c.name == self._name)).first()
+        if row is None:
+            connection.execute(checkpoints.insert().values(name=self._name, rows_processed=0, updated_at=_now()))
+            return BackfillProgress(self._name)
+        return BackfillProgress(self._name, row.last_key, row.rows_processed, finished=row.finished_at is not None)
+
+    def _save_checkpoint(self, connection: Connection, last_key: Optional[str], rows: int, finished: bool) -> None:
+        now = _now()
+        connection.execute(
+            checkpoints.update()
+            .where(checkpoints.c.name == self._name)
+            .values(
+                last_key=last_key,
+                rows_processed=checkpoints.c.rows_processed + rows,
+                updated_at=now,
+                finished_at=now if finished else None,
+            )
+        )
+
+    def _log_progress(self, event: str, progress: BackfillProgress, rows: int, elapsed: float) -> None:
+        logger.info(
+            event,
+            backfill=self._name,
+            rows=progress.rows,
+            batches=progress.batches,
+            retries=progress.retries,
+            last_key=progress.last_key,
+            rows_per_second=round(rows / elapsed, 1) if elapsed > 0 else None,
+        )
+
+
+def _now() -> datetime.datetime:
+    return datetime.datetime.now(datetime.timezone.utc)
+
+
+def run_backfill(backfill: BatchedBackfill) -> BackfillProgress:
+    """
+    Выполнение изменения из миграции. Транзакция миграции фиксируется перед изменением, пачки выполняются
+    в транзакциях отдельного соединения:
+
+        def upgrade() -> None:
+            op.add_column("users", sa.Column("full_name", sa.Text(), nullable=True))
+            users = sa.table("users", sa.column("id", sa.Integer), sa.column("full_name"), sa.column("name"))
+            run_backfill(
+                BatchedBackfill(
+                    "users_full_name",
+                    sa.update(users).values(full_name=users.c.name).where(users.c.full_name.is_(None)),
+                    key_column=users.c.id,
+                    batch_size=5000,
+                )
+            )
+
+    :param backfill: Изменение
+    :return: Прогресс
+    """
+    _require_online_mode("run_backfill")
+    with op.get_context().autocommit_block():
+        with op.get_bind().engine.connect() as connection:
+            return backfill.run(connection)
+
+
+def reset_backfill(name: str) -> None:
+    """
+    Удаление контрольной точки изменения, например в downgrade, чтобы повторный upgrade выполнил его заново
+
+    :param name: Имя изменения
+    :return:
+    """
+    bind = op.get_bind()
+    if bind.dialect.has_table(bind, CHECKPOINT_TABLE_NAME):
+        op.execute(checkpoints.delete().where(checkpoints.c.name == name))
+
+
+def create_index_concurrently(
+        index_name: str, table_name: str, columns: Sequence[Any], unique: bool = False, **kwargs: Any
+) -> None:
+    """
+    CREATE INDEX CONCURRENTLY вне транзакции миграции. Невалидный индекс, оставшийся после прерванного
+    построения, удаляется и строится заново, валидный индекс не пересоздается
+
+    :param index_name: Имя индекса
+    :param table_name: Имя таблицы
+    :param columns: Столбцы или выражения
+    :param unique: Уникальный индекс
+    :param kwargs: Параметры op.create_index, например postgresql_where
+    :return:
+    """
+    _require_online_mode("create_index_concurrently")
+    schema = kwargs.get("schema")
+    with op.get_context().autocommit_block(), _without_statement_timeout():
+        is_valid = _get_index_validity(index_name, schema)
+        if is_valid:
+            logger.info("Index already exists", index=index_name)
+            return
+        if is_valid is not None:
+            logger.warning("Dropping invalid index before rebuilding", index=index_name)
+            op.drop_index(index_name, table_name=table_name, schema=schema, postgresql_concurrently=True)
+        op.create_index(index_name, table_name, columns, unique=unique, postgresql_concurrently=True, **kwargs)
+
+
+def drop_index_concurrently(index_name: str, table_name: str, schema: Optional[str] = None) -> None:
+    """
+    DROP INDEX CONCURRENTLY вне транзакции миграции, отсутствующий индекс пропускается
+
+    :param index_name: Имя индекса
+    :param table_name: Имя таблицы
+    :param schema: Схема
+    :return:
+    """
+    _require_online_mode("drop_index_concurrently")
+    with op.get_context().autocommit_block(), _without_statement_timeout():
+        if _get_index_validity(index_name, schema) is not None:
+            op.drop_index(index_name, table_name=table_name, schema=schema, postgresql_concurrently=True)
+
+
+def _get_index_validity(index_name: str, schema: Optional[str]) -> Optional[bool]:
+    return op.get_bind().execute(
+        text(
+            "SELECT i.indisvalid FROM pg_index i "
+            "JOIN pg_class c ON c.oid = i.indexrelid "
+            "JOIN pg_namespace n ON n.oid = c.relnamespace "
+            "WHERE c.relname = :index_name AND n.nspname = coalesce(:schema, current_schema())"
+        ),
+        {"index_name": index_name, "schema": schema},
+    ).scalar()
+
+
+@contextmanager
+def _without_statement_timeout() -> Iterator[None]:
+    # Построение индекса на большой таблице дольше statement_timeout из POSTGRES_SERVER_SETTINGS
+    op.execute("SET statement_timeout = 0")
+    try:
+        yield
+    finally:
+        op.execute("RESET statement_timeout")
+
+
+def _require_online_mode(operation: str) -> None:
+    if op.get_context().as_sql:
+        raise RuntimeError(f"{operation} cannot be rendered in offline (--sql) mode")
@@ -1,12 +1,15 @@
 import asyncio
 from logging.config import fileConfig
+from typing import Optional
 
 from alembic import context
 from sqlalchemy import engine_from_config, pool
 from sqlalchemy.engine import Connection
 from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.sql.schema import SchemaItem
 
 from infrastructure.config import config as app_config
+from infrastructure.db.migrations.backfill import CHECKPOINT_TABLE_NAME
 from infrastructure.db.models.base import metadata_obj
 
 # this is the Alembic Config object, which provides
@@ -27,6 +30,13 @@ if config.config_file_name is not None:
 target_metadata = metadata_obj
 
 
+def include_object(
+        obj: SchemaItem, name: Optional[str], type_: str, reflected: bool, compare_to: Optional[SchemaItem]
+) -> bool:
+    # Таблица контрольных точек BatchedBackfill создается при первом запуске и не описана в моделях
+    return not (type_ == "table" and name == CHECKPOINT_TABLE_NAME)
+
+
 # other values from the config, defined by the needs of env.py,
 # can be acquired:
 # my_important_option = config.get_main_option("my_important_option")
@@ -49,6 +59,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -58,7 +69,7 @@ def run_migrations_offline() -> None:
 
 
 def do_run_migrations(connection: Connection) -> None:
-    context.configure(connection=connection, target_metadata=target_metadata)
+    context.configure(connection=connection, target_metadata=target_metadata, include_object=include_object)
 
     with context.begin_transaction():
         context.run_migrations()
@@ -0,0 +1,167 @@
+from typing import Any, Callable, Generic, Optional, Sequence, TypeVar
+
+from sqlalchemy import and_, or_, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select, operators
+from sqlalchemy.sql.elements import ColumnElement, UnaryExpression
+
+from core.errors import ConfigurationBusinessError, ValidationBusinessError
+from core.usecases.pagination import Cursor, CursorCodec, CursorDirection, CursorPaginationQuery
+
+RowType = TypeVar("RowType")
+
+
+class KeysetPage(Generic[RowType]):
+    """
+    Страница выборки и курсоры соседних страниц
+    """
+
+    __slots__ = ("rows", "next_cursor", "prev_cursor")
+
+    def __init__(self, rows: list[RowType], next_cursor: Optional[str], prev_cursor: Optional[str]) -> None:
+        self.rows = rows
+        self.next_cursor = next_cursor
+        self.prev_cursor = prev_cursor
+
+
+class KeysetPaginator:
+    """
+    Пагинация по ключу (keyset): вместо OFFSET запрос получает условие "строки после/до ключа последней записи",
+    поэтому стоимость страницы не зависит от ее номера при наличии индекса по колонкам сортировки.
+
+    Колонки сортировки должны быть NOT NULL, а их набор - уникальным (последней обычно идет первичный ключ).
+    Для сортировки в одном направлении используется сравнение кортежей `(a, b) > (:a, :b)`, которое Postgres
+    выполняет по составному индексу, для смешанных направлений - раскрытие в OR.
+    """
+
+    __slots__ = ("_columns", "_descending", "_codec", "_key_getter")
+
+    def __init__(
+            self,
+            order_by: Sequence[ColumnElement],
+            codec: CursorCodec,
+            key_getter: Optional[Callable[[Any], tuple]] = None,
+    ) -> None:
+        """
+        :param order_by: Колонки сортировки, допускаются asc()/desc()
+        :param codec: Кодировщик курсоров
+        :param key_getter: Получение значений колонок сортировки из строки результата,
+            по умолчанию по колонке из Row или по имени атрибута из ORM объекта
+        """
+        if not order_by:
+            raise ValueError("Keyset pagination requires at least one order_by column")
+
+        columns, descending = [], []
+        for clause in order_by:
+            column, is_descending = _parse_ordering(clause)
+            columns.append(column)
+            descending.append(is_descending)
+
+        self._columns: tuple[ColumnElement, ...] = tuple(columns)
+        self._descending: tuple[bool, ...] = tuple(descending)
+        self._codec = codec
+        self._key_getter = key_getter or self._get_keys
+
+    def apply(self, statement: Select, cursor: Optional[Cursor], limit: int) -> Select:
+        """
+        Добавление в запрос условия по курсору, сортировки и лимита (на одну запись больше страницы,
+        чтобы узнать о наличии следующей)
+
+        :param statement: Запрос без ORDER BY, LIMIT и OFFSET
+        :param cursor: Декодированный курсор или None для первой страницы
+        :param limit: Размер страницы
+        :return: Запрос
+        """
+        backwards = cursor is not None and cursor.direction == CursorDirection.PREV
+        descending = [is_descending != backwards for is_descending in self._descending]
+
+        if cursor is not None:
+            if len(cursor.keys) != len(self._columns):
+                raise ValidationBusinessError(status="400", detail="Pagination cursor does not match ordering")
+            statement = statement.where(self._build_predicate(cursor.keys, descending))
+
+        orderings = [column.desc() if is_descending else column.asc()
+                     for column, is_descending in zip(self._columns, descending)]
+        return statement.order_by(*orderings).limit(limit + 1)
+
+    def build_page(self, rows: Sequence[RowType], cursor: Optional[Cursor], limit: int) -> KeysetPage[RowType]:
+        """
+        Формирование страницы из результата запроса, построенного apply
+
+        :param rows: Строки результата
+        :param cursor: Курсор, переданный в apply
+        :param limit: Размер страницы
+        :return: Страница с курсорами
+        """
+        has_more = len(rows) > limit
+        page = list(rows[:limit])
+
+        if cursor is not None and cursor.direction == CursorDirection.PREV:
+            page.reverse()
+            has_next, has_prev = True, has_more
+        else:
+            has_next, has_prev = has_more, cursor is not None
+
+        if not page:
+            return KeysetPage(page, None, None)
+
+        return KeysetPage(
+            page,
+            self._encode(page[-1], CursorDirection.NEXT) if has_next else None,
+            self._encode(page[0], CursorDirection.PREV) if has_prev else None,
+        )
+
+    async def paginate(
+            self, session: AsyncSession, statement: Select, query: CursorPaginationQuery, scalars: bool = False
+    ) -> KeysetPage:
+        """
+        Выполнение запроса страницы
+
+        :param session: Сессия
+        :param statement: Запрос без ORDER BY, LIMIT и OFFSET
+        :param query: Курсор и размер страницы
+        :param scalars: Вернуть первые элементы строк (ORM объекты для select(Model))
+        :return: Страница с курсорами
+        :raises ValidationBusinessError: Курсор поврежден или не соответствует сортировке
+        """
+        cursor = self._codec.decode(query.cursor) if query.cursor else None
+        result = await session.execute(self.apply(statement, cursor, query.limit))
+        rows = result.scalars().all() if scalars else result.all()
+        return self.build_page(rows, cursor, query.limit)
+
+    def _build_predicate(self, keys: tuple, descending: Sequence[bool]) -> ColumnElement:
+        if all(descending) or not any(descending):
+            columns, values = tuple_(*self._columns), tuple_(*keys)
+            return columns < values if descending[0] else columns > values
+
+        # (a > :a) OR (a = :a AND b < :b) OR ...
+        conditions = []
+        for index, (column, key, is_descending) in enumerate(zip(self._columns, keys, descending)):
+            equalities = [self._columns[i] == keys[i] for i in range(index)]
+            conditions.append(and_(*equalities, column < key if is_descending else column > key))
+        return or_(*conditions)
+
+    def _get_keys(self, row: Any) -> tuple:
+        mapping = getattr(row, "_mapping", None)
+        if mapping is not None:
+            try:
+                return tuple(mapping[column] for column in self._columns)
+            except KeyError:
+                # Row(Model,) из select(Model) без scalars: значения берутся из ORM объекта
+                if len(row) == 1:
+                    row = row[0]
+        try:
+            return tuple(getattr(row, column.key) for column in self._columns)
+        except AttributeError as e:
+            raise ConfigurationBusinessError(
+                status="500", detail="Pagination order_by columns are missing in result rows, pass key_getter"
+            ) from e
+
+    def _encode(self, row: Any, direction: CursorDirection) -> str:
+        return self._codec.encode(Cursor(self._key_getter(row), direction))
+
+
+def _parse_ordering(clause: ColumnElement) -> tuple[ColumnElement, bool]:
+    if isinstance(clause, UnaryExpression) and clause.modifier in (operators.desc_op, operators.asc_op):
+        return clause.element, clause.modifier is operators.desc_op
+    return clause, False
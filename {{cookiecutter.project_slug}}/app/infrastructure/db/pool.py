@@ -0,0 +1,91 @@
+import time
+from typing import Any, Iterable
+
+from opentelemetry import metrics, trace
+from opentelemetry.metrics import CallbackOptions, Observation
+from sqlalchemy.engine import Engine
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+_meter = metrics.get_meter(__name__)
+
+_wait_time_histogram = _meter.create_histogram(
+    "db.client.connections.wait_time", unit="ms", description="Время ожидания соединения из пула"
+)
+_age_histogram = _meter.create_histogram(
+    "db.client.connections.age", unit="s", description="Возраст соединения при выдаче из пула"
+)
+
+
+class InstrumentedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Пул соединений, записывающий время ожидания соединения и возраст выданного соединения
+    в метрики и в атрибуты текущего спана.
+    """
+
+    pool_name = "default"
+
+    def _do_get(self) -> Any:
+        start = time.perf_counter()
+        record = super()._do_get()
+        wait_time = (time.perf_counter() - start) * 1000
+        age = time.time() - record.starttime if record.starttime else 0.0
+
+        attributes = {"pool.name": self.pool_name}
+        _wait_time_histogram.record(wait_time, attributes)
+        _age_histogram.record(age, attributes)
+
+        span = trace.get_current_span()
+        if span.is_recording():
+            span.set_attributes(
+                {
+                    "db.pool.name": self.pool_name,
+                    "db.pool.wait_time_ms": wait_time,
+                    "db.pool.connection_age_s": age,
+                    "db.pool.checked_out": self.checkedout(),
+                    "db.pool.overflow": max(self.overflow(), 0),
+                }
+            )
+
+        return record
+
+    def recreate(self) -> "InstrumentedAsyncAdaptedQueuePool":
+        pool = super().recreate()
+        pool.pool_name = self.pool_name
+        return pool
+
+
+_instrumented_engines: dict[str, Engine] = dict()
+
+
+def instrument_engine_pool(engine: AsyncEngine, pool_name: str) -> None:
+    """
+    Публикация метрик пула соединений движка: занятые и свободные соединения, overflow.
+    Время ожидания и возраст соединений записывает InstrumentedAsyncAdaptedQueuePool.
+    Повторный вызов с тем же именем (например, после fork) заменяет движок
+
+    :param engine: Движок с пулом InstrumentedAsyncAdaptedQueuePool
+    :param pool_name: Имя пула в атрибуте pool.name
+    :return:
+    """
+    engine.sync_engine.pool.pool_name = pool_name
+
+    if not _instrumented_engines:
+        _meter.create_observable_gauge(
+            "db.client.connections.usage", callbacks=[_observe_usage], description="Соединения пула по состоянию"
+        )
+        _meter.create_observable_gauge(
+            "db.client.connections.overflow", callbacks=[_observe_overflow], description="Соединения сверх POOL_SIZE"
+        )
+    _instrumented_engines[pool_name] = engine.sync_engine
+
+
+def _observe_usage(_: CallbackOptions) -> Iterable[Observation]:
+    for pool_name, engine in _instrumented_engines.items():
+        yield Observation(engine.pool.checkedout(), {"pool.name": pool_name, "state": "used"})
+        yield Observation(engine.pool.checkedin(), {"pool.name": pool_name, "state": "idle"})
+
+
+def _observe_overflow(_: CallbackOptions) -> Iterable[Observation]:
+    for pool_name, engine in _instrumented_engines.items():
+        yield Observation(max(engine.pool.overflow(), 0), {"pool.name": pool_name})
@@ -0,0 +1,297 @@
+import hashlib
+import random
+import re
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Callable, Iterator, Optional
+
+import structlog
+from opentelemetry import trace
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine, ExceptionContext, ExecutionContext
+
+logger = structlog.get_logger(__name__)
+
+_STRING_LITERAL_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL_RE = re.compile(r"(?<![\w$])-?\d+(?:\.\d+)?\b")
+_PLACEHOLDER_LIST_RE = re.compile(r"\((?:\s*(?:%s|\$\d+|\?|%\(\w+\)s)\s*,)+\s*(?:%s|\$\d+|\?|%\(\w+\)s)\s*\)")
+_WHITESPACE_RE = re.compile(r"\s+")
+_START_TIMES_KEY = "query_log_start_times"
+_EXPLAIN_SAVEPOINT = "slow_query_explain"
+
+_use_case: ContextVar[Optional[str]] = ContextVar("db_use_case", default=None)
+
+
+@contextmanager
+def use_case(name: str) -> Iterator[None]:
+    """
+    Имя сценария (use case), выполняющего запросы внутри блока, для журнала медленных запросов
+
+    :param name: Имя сценария, например имя command или query handler
+    :return:
+    """
+    token = _use_case.set(name)
+    try:
+        yield
+    finally:
+        _use_case.reset(token)
+
+
+def normalize_sql(statement: str) -> str:
+    """
+    Нормализация SQL для группировки: литералы заменяются на ?, списки параметров IN сворачиваются
+
+    :param statement: SQL
+    :return: Нормализованный SQL
+    """
+    statement = _STRING_LITERAL_RE.sub("?", statement)
+    statement = _NUMBER_LITERAL_RE.sub("?", statement)
+    statement = _PLACEHOLDER_LIST_RE.sub("(...)", statement)
+    return _WHITESPACE_RE.sub(" ", statement).strip()
+
+
+def fingerprint_sql(normalized_statement: str) -> str:
+    return hashlib.sha1(normalized_statement.encode()).hexdigest()[:16]
+
+
+@lru_cache(maxsize=4096)
+def _describe_statement(statement: str) -> tuple[str, str]:
+    # Строки запросов повторяются благодаря кэшу компиляции SQLAlchemy
+    normalized_statement = normalize_sql(statement)
+    return normalized_statement, fingerprint_sql(normalized_statement)
+
+
+class QueryStats:
+    """
+    Статистика одного нормализованного запроса. Процентили считаются по последним `samples` выполнениям
+    """
+
+    __slots__ = ("statement", "count", "slow_count", "total_ms", "max_ms", "_durations")
+
+    def __init__(self, statement: str, samples: int) -> None:
+        self.statement = statement
+        self.count = 0
+        self.slow_count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self._durations: deque[float] = deque(maxlen=samples)
+
+    def record(self, duration_ms: float, is_slow: bool) -> None:
+        self.count += 1
+        self.slow_count += is_slow
+        self.total_ms += duration_ms
+        self.max_ms = max(self.max_ms, duration_ms)
+        self._durations.append(duration_ms)
+
+    def percentile(self, percent: float) -> float:
+        if not self._durations:
+            return 0.0
+        durations = sorted(self._durations)
+        return durations[min(len(durations) - 1, int(len(durations) * percent / 100))]
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "statement": self.statement,
+            "count": self.count,
+            "slow_count": self.slow_count,
+            "total_ms": round(self.total_ms, 3),
+            "mean_ms": round(self.total_ms / self.count, 3) if self.count else 0.0,
+            "max_ms": round(self.max_ms, 3),
+            "p50_ms": round(self.percentile(50), 3),
+            "p99_ms": round(self.percentile(99), 3),
+        }
+
+
+class QueryStatsRegistry:
+    """
+    Статистика запросов процесса по отпечаткам нормализованного SQL.
+    Хранится не больше `max_statements` запросов, дольше всех не выполнявшиеся вытесняются
+    """
+
+    __slots__ = ("_max_statements", "_samples", "_stats")
+
+    def __init__(self, max_statements: int = 1000, samples: int = 1000) -> None:
+        self._max_statements = max_statements
+        self._samples = samples
+        self._stats: OrderedDict[str, QueryStats] = OrderedDict()
+
+    def configure(self, max_statements: int, samples: int) -> None:
+        self._max_statements = max_statements
+        self._samples = samples
+
+    def record(self, fingerprint: str, normalized_statement: str, duration_ms: float, is_slow: bool) -> None:
+        stats = self._stats.get(fingerprint)
+        if stats is None:
+            if self._max_statements <= 0:
+                return
+            stats = self._stats[fingerprint] = QueryStats(normalized_statement, self._samples)
+            while len(self._stats) > self._max_statements:
+                self._stats.popitem(last=False)
+        else:
+            self._stats.move_to_end(fingerprint)
+        stats.record(duration_ms, is_slow)
+
+    def dump(self, limit: Optional[int] = None) -> list[dict[str, Any]]:
+        """
+        Статистика запросов по убыванию суммарного времени
+
+        :param limit: Количество запросов
+        :return: Статистика с отпечатками запросов
+        """
+        stats = sorted(self._stats.items(), key=lambda item: item[1].total_ms, reverse=True)
+        return [{"fingerprint": fingerprint, **value.as_dict()} for fingerprint, value in stats[:limit]]
+
+    def reset(self) -> None:
+        self._stats.clear()
+
+
+query_stats = QueryStatsRegistry()
+
+
+class SlowQueryLog:
+    """
+    Замер времени каждого запроса движка через события before/after_cursor_execute.
+
+    Запросы дольше `threshold_ms` логируются с нормализованным SQL, параметрами, количеством строк и сценарием.
+    Доля `explain_sample_rate` медленных SELECT повторно выполняется с EXPLAIN (ANALYZE, BUFFERS) в той же
+    транзакции, план добавляется в запись журнала. Повторное выполнение увеличивает время ответа, поэтому
+    доля должна быть небольшой.
+    """
+
+    __slots__ = ("_threshold_ms", "_explain_sample_rate", "_redact_parameters", "_registry", "_random")
+
+    def __init__(
+            self,
+            threshold_ms: float = 500.0,
+            explain_sample_rate: float = 0.0,
+            redact_parameters: bool = True,
+            registry: QueryStatsRegistry = query_stats,
+            random_: Callable[[], float] = random.random,
+    ) -> None:
+        self._threshold_ms = threshold_ms
+        self._explain_sample_rate = explain_sample_rate
+        self._redact_parameters = redact_parameters
+        self._registry = registry
+        self._random = random_
+
+    def install(self, engine: Engine) -> None:
+        """
+        Подписка на события синхронного движка (AsyncEngine.sync_engine)
+
+        :param engine: Движок
+        :return:
+        """
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(engine, "handle_error", self._handle_error)
+
+    @staticmethod
+    def _before_cursor_execute(
+        conn: Connection,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Optional[ExecutionContext],
+        executemany: bool,
+    ) -> None:
+        conn.info.setdefault(_START_TIMES_KEY, []).append(time.perf_counter())
+
+    def _after_cursor_execute(
+        self,
+        conn: Connection,
+        cursor: Any,
+        statement: str,
+        parameters: Any,
+        context: Optional[ExecutionContext],
+        executemany: bool,
+    ) -> None:
+        start_times = conn.info.get(_START_TIMES_KEY)
+        if not start_times:
+            return
+        duration_ms = (time.perf_counter() - start_times.pop()) * 1000
+
+        normalized_statement, fingerprint = _describe_statement(statement)
+        is_slow = duration_ms >= self._threshold_ms
+        self._registry.record(fingerprint, normalized_statement, duration_ms, is_slow)
+
+        if not is_slow:
+            return
+
+        plan = None
+        if self._should_explain(statement, executemany):
+            plan = self._explain(conn, statement, parameters)
+
+        logger.warning(
+            "Slow query",
+            fingerprint=fingerprint,
+            statement=normalized_statement,
+            parameters=self._format_parameters(parameters),
+            duration_ms=round(duration_ms, 3),
+            row_count=getattr(cursor, "rowcount", -1),
+            use_case=_use_case.get() or _current_span_name(),
+            plan=plan,
+        )
+
+    @staticmethod
+    def _handle_error(context: ExceptionContext) -> None:
+        # Запрос с ошибкой не доходит до after_cursor_execute
+        start_times = context.connection.info.get(_START_TIMES_KEY) if context.connection is not None else None
+        if start_times:
+            start_times.pop()
+
+    def _should_explain(self, statement: str, executemany: bool) -> bool:
+        return (
+            self._explain_sample_rate > 0
+            and not executemany
+            and statement.lstrip().upper().startswith("SELECT")
+            and self._random() < self._explain_sample_rate
+        )
+
+    @staticmethod
+    def _explain(conn: Connection, statement: str, parameters: Any) -> Any:
+        # Выполняется курсором DBAPI, чтобы не вызывать события движка повторно. Ошибка EXPLAIN (например,
+        # statement_timeout) прерывает транзакцию Postgres, поэтому в транзакции он выполняется в точке сохранения
+        use_savepoint = conn.in_transaction()
+        try:
+            cursor = conn.connection.cursor()
+            try:
+                if use_savepoint:
+                    cursor.execute(f"SAVEPOINT {_EXPLAIN_SAVEPOINT}")
+                try:
+                    cursor.execute(f"EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) {statement}", parameters)
+                    row = cursor.fetchone()
+                except Exception:
+                    if use_savepoint:
+                        cursor.execute(f"ROLLBACK TO SAVEPOINT {_EXPLAIN_SAVEPOINT}")
+                        cursor.execute(f"RELEASE SAVEPOINT {_EXPLAIN_SAVEPOINT}")
+                    raise
+                if use_savepoint:
+                    cursor.execute(f"RELEASE SAVEPOINT {_EXPLAIN_SAVEPOINT}")
+            finally:
+                cursor.close()
+        except Exception as e:
+            logger.warning("EXPLAIN of slow query failed", error=repr(e))
+            return None
+        return row[0] if row else None
+
+    def _format_parameters(self, parameters: Any) -> Any:
+        if self._redact_parameters:
+            return _redact(parameters)
+        return parameters
+
+
+def _redact(parameters: Any) -> Any:
+    # Значения заменяются на имена типов, структура параметров (в том числе executemany) сохраняется
+    if isinstance(parameters, dict):
+        return {name: _redact(value) for name, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        return [_redact(value) for value in parameters]
+    return "NULL" if parameters is None else f"<{type(parameters).__name__}>"
+
+
+def _current_span_name() -> Optional[str]:
+    span = trace.get_current_span()
+    return getattr(span, "name", None) if span.is_recording() else None
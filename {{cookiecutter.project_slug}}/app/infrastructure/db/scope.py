@@ -0,0 +1,133 @@
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+import structlog
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = structlog.get_logger(__name__)
+
+SessionFactory = Callable[[], AsyncSession]
+AfterCommitCallback = Callable[[], Awaitable[Any]]
+
+
+class DBSessionScope:
+    """
+    Сессии одного запроса или сообщения Kafka.
+
+    Сессия создается при первом обращении к фабрике, соединение из пула берется при первом запросе сессии
+    и возвращается при завершении области.
+    """
+
+    __slots__ = ("_sessions", "_finished", "_after_commit")
+
+    def __init__(self) -> None:
+        self._sessions: dict[SessionFactory, AsyncSession] = dict()
+        self._finished = False
+        self._after_commit: list[AfterCommitCallback] = []
+
+    def get_session(self, session_factory: SessionFactory) -> AsyncSession:
+        session = self._sessions.get(session_factory)
+        if session is None:
+            session = self._sessions[session_factory] = session_factory()
+        return session
+
+    def after_commit(self, callback: AfterCommitCallback) -> None:
+        """
+        Вызов после фиксации транзакций всех сессий области, например инвалидация кэша.
+        При откате или ошибке commit не вызывается
+
+        :param callback: Асинхронная функция без аргументов
+        :return:
+        """
+        if self._finished:
+            raise RuntimeError("DB session scope is already finished")
+        self._after_commit.append(callback)
+
+    async def finish(self, commit: bool) -> None:
+        """
+        Фиксация или откат транзакций всех сессий области и вызов функций after_commit после фиксации.
+        Повторные вызовы игнорируются
+
+        :param commit: True - commit, False - rollback
+        :return:
+        """
+        if self._finished:
+            return
+        self._finished = True
+
+        sessions = list(self._sessions.values())
+        callbacks, self._after_commit = self._after_commit, []
+        if not commit:
+            for session in sessions:
+                await session.rollback()
+            return
+
+        for index, session in enumerate(sessions):
+            try:
+                await session.commit()
+            except BaseException:
+                for not_committed_session in sessions[index:]:
+                    await not_committed_session.rollback()
+                raise
+
+        # Изменения уже зафиксированы: ошибка одной функции не отменяет остальные и не меняет ответ
+        for callback in callbacks:
+            try:
+                await callback()
+            except Exception:
+                logger.exception("After commit callback failed", callback=repr(callback))
+
+    async def close(self) -> None:
+        for session in self._sessions.values():
+            await session.close()
+        self._sessions.clear()
+
+
+_current_scope: ContextVar[Optional[DBSessionScope]] = ContextVar("db_session_scope", default=None)
+
+
+@asynccontextmanager
+async def db_session_scope() -> AsyncIterator[DBSessionScope]:
+    """
+    Область сессий: commit при успешном завершении блока, rollback при исключении, затем закрытие сессий.
+    Вложенная область создает собственные сессии
+
+    :return: Область сессий
+    """
+    scope = DBSessionScope()
+    token = _current_scope.set(scope)
+    try:
+        yield scope
+    except BaseException:
+        await scope.finish(commit=False)
+        raise
+    else:
+        await scope.finish(commit=True)
+    finally:
+        try:
+            await scope.close()
+        finally:
+            _current_scope.reset(token)
+
+
+def get_current_scope() -> Optional[DBSessionScope]:
+    """
+    Текущая область db_session_scope
+
+    :return: Область или None вне области
+    """
+    return _current_scope.get()
+
+
+def get_scoped_session(session_factory: SessionFactory) -> AsyncSession:
+    """
+    Сессия фабрики в текущей области db_session_scope
+
+    :param session_factory: Фабрика сессий
+    :return: Сессия
+    """
+    scope = _current_scope.get()
+    if scope is None:
+        raise RuntimeError("DB session requested outside of db_session_scope()")
+    return scope.get_session(session_factory)
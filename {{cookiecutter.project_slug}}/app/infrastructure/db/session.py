@@ -1,22 +1,280 @@
-from typing import AsyncGenerator
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, AsyncIterator, Iterator, Optional, Union
+from weakref import WeakSet
 
 import structlog
-from opentelemetry.instrumentation.sqlalchemy import SQLAlchemyInstrumentor
+from opentelemetry import trace
+from opentelemetry.trace import TracerProvider
+from sqlalchemy.engine import Connection, Engine
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.sql import ClauseElement
+from sqlalchemy.sql.dml import UpdateBase
 
-from infrastructure.config import config
+from infrastructure.config import PostgresConfig, config
+from infrastructure.db.pool import InstrumentedAsyncAdaptedQueuePool, instrument_engine_pool
+from infrastructure.db.query_log import SlowQueryLog, query_stats
+from infrastructure.db.scope import get_scoped_session
 
 logger = structlog.get_logger(__name__)
 
-_async_engine: AsyncEngine = create_async_engine(config.POSTGRES_CONFIG.URI, echo=config.DEBUG, pool_pre_ping=True)
-SQLAlchemyInstrumentor().instrument(engine=_async_engine.sync_engine)
 
-_async_session = sessionmaker(
-    autocommit=False, autoflush=True, bind=_async_engine, expire_on_commit=False, class_=AsyncSession
-)
+_primary_reads: ContextVar[bool] = ContextVar("primary_reads", default=False)
 
 
-async def init_db_session() -> AsyncGenerator[AsyncSession, None]:
-    async with _async_session() as session:
-        yield session
+@contextmanager
+def read_your_writes() -> Iterator[None]:
+    """
+    Сессия реплики, запрошенная внутри блока, заменяется сессией primary текущей области, поэтому чтение видит
+    незафиксированные записи этой области, например сразу после записи
+
+    :return:
+    """
+    token = _primary_reads.set(True)
+    try:
+        yield
+    finally:
+        _primary_reads.reset(token)
+
+
+def require_primary_reads() -> None:
+    """
+    Замена сессии реплики сессией primary до конца текущего контекста (запроса или задачи)
+
+    :return:
+    """
+    _primary_reads.set(True)
+
+
+class RoutingSession(Session):
+    """
+    Сессия, выполняющая чтение на реплике, а flush и DML на primary.
+    Выбор соединения происходит при первом запросе транзакции.
+    """
+
+    def __init__(self, *args: Any, primary_bind: Engine, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._primary_bind = primary_bind
+
+    def get_bind(
+        self, mapper: Optional[Any] = None, clause: Optional[ClauseElement] = None, **kwargs: Any
+    ) -> Union[Engine, Connection]:
+        if self._flushing or isinstance(clause, UpdateBase):
+            return self._primary_bind
+        return super().get_bind(mapper, clause, **kwargs)
+
+
+def trace_engine(engine: AsyncEngine, tracer_provider: Optional[TracerProvider] = None) -> None:
+    """
+    Трассировка запросов движка. SQLAlchemyInstrumentor инструментирует только движок первого вызова instrument,
+    поэтому трассировка подключается к каждому движку отдельно: к primary, реплике и движкам, созданным заново
+
+    :param engine: Движок
+    :param tracer_provider: Провайдер трассировки, по умолчанию глобальный
+    :return:
+    """
+    # Импорт инструментации откладывается до создания первого движка
+    from opentelemetry.instrumentation.sqlalchemy.engine import EngineTracer
+    from opentelemetry.instrumentation.sqlalchemy.version import __version__
+
+    tracer = trace.get_tracer("opentelemetry.instrumentation.sqlalchemy", __version__, tracer_provider=tracer_provider)
+    EngineTracer(tracer, engine.sync_engine, enable_commenter=False)
+
+
+def create_engine(
+    postgres_config: PostgresConfig, pool_name: str, echo: bool = False, uri: Optional[str] = None
+) -> AsyncEngine:
+    """
+    Создание движка с настройками пула и соединений из конфигурации
+
+    :param postgres_config: Конфигурация Postgres
+    :param pool_name: Имя пула в метриках
+    :param echo: Логирование запросов
+    :param uri: Адрес базы, по умолчанию POSTGRES_URI
+    :return: Движок
+    """
+    engine = create_async_engine(
+        uri or postgres_config.URI,
+        echo=echo,
+        poolclass=InstrumentedAsyncAdaptedQueuePool,
+        pool_size=postgres_config.POOL_SIZE,
+        max_overflow=postgres_config.POOL_MAX_OVERFLOW,
+        pool_timeout=postgres_config.POOL_TIMEOUT,
+        pool_recycle=postgres_config.POOL_RECYCLE,
+        pool_pre_ping=postgres_config.POOL_PRE_PING,
+        connect_args={
+            "statement_cache_size": postgres_config.STATEMENT_CACHE_SIZE,
+            "prepared_statement_cache_size": postgres_config.PREPARED_STATEMENT_CACHE_SIZE,
+            "server_settings": postgres_config.SERVER_SETTINGS,
+        },
+    )
+    trace_engine(engine)
+    instrument_engine_pool(engine, pool_name)
+
+    if postgres_config.SLOW_QUERY_LOG_ENABLED:
+        query_stats.configure(postgres_config.QUERY_STATS_MAX_STATEMENTS, postgres_config.QUERY_STATS_SAMPLES)
+        SlowQueryLog(
+            threshold_ms=postgres_config.SLOW_QUERY_THRESHOLD_MS,
+            explain_sample_rate=postgres_config.SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+            redact_parameters=postgres_config.SLOW_QUERY_REDACT_PARAMETERS,
+        ).install(engine.sync_engine)
+
+    return engine
+
+
+class Database:
+    """
+    Движки primary и реплики и фабрики сессий одного процесса.
+
+    Движки создаются при первом обращении. В дочернем процессе после fork пулы родителя отбрасываются без закрытия
+    соединений, и движки создаются заново.
+    """
+
+    __slots__ = (
+        "_config",
+        "_echo",
+        "_pid",
+        "_engine",
+        "_replica_engine",
+        "_session",
+        "_replica_session",
+        "__weakref__",
+    )
+
+    def __init__(self, postgres_config: PostgresConfig, echo: bool = False) -> None:
+        self._config = postgres_config
+        self._echo = echo
+        self._pid: Optional[int] = None
+        self._engine: Optional[AsyncEngine] = None
+        self._replica_engine: Optional[AsyncEngine] = None
+        self._session: Optional[sessionmaker] = None
+        self._replica_session: Optional[sessionmaker] = None
+        _databases.add(self)
+
+    @property
+    def engine(self) -> AsyncEngine:
+        self._ensure_initialized()
+        assert self._engine is not None
+        return self._engine
+
+    @property
+    def session_factory(self) -> sessionmaker:
+        self._ensure_initialized()
+        assert self._session is not None
+        return self._session
+
+    @property
+    def replica_session_factory(self) -> sessionmaker:
+        self._ensure_initialized()
+        assert self._replica_session is not None
+        return self._replica_session
+
+    @property
+    def is_initialized(self) -> bool:
+        return self._pid == os.getpid()
+
+    def _ensure_initialized(self) -> None:
+        if self._pid == os.getpid():
+            return
+        if self._pid is not None:
+            self.forget()
+
+        self._engine = create_engine(self._config, pool_name="primary", echo=self._echo)
+        self._session = sessionmaker(
+            autocommit=False, autoflush=True, bind=self._engine, expire_on_commit=False, class_=AsyncSession
+        )
+
+        if self._config.REPLICA_URI:
+            self._replica_engine = create_engine(
+                self._config, pool_name="replica", echo=self._echo, uri=self._config.REPLICA_URI
+            )
+            self._replica_session = sessionmaker(
+                autocommit=False,
+                autoflush=True,
+                bind=self._replica_engine,
+                expire_on_commit=False,
+                class_=AsyncSession,
+                sync_session_class=RoutingSession,
+                primary_bind=self._engine.sync_engine,
+            )
+        else:
+            self._replica_session = self._session
+
+        self._pid = os.getpid()
+
+    def forget(self) -> None:
+        """
+        Сброс движков без закрытия соединений, которые принадлежат родительскому процессу
+
+        :return:
+        """
+        for engine in (self._engine, self._replica_engine):
+            if engine is not None:
+                engine.sync_engine.dispose(close=False)
+        self._reset()
+
+    async def dispose(self) -> None:
+        """
+        Закрытие соединений пулов текущего процесса
+
+        :return:
+        """
+        if self.is_initialized:
+            for engine in (self._engine, self._replica_engine):
+                if engine is not None:
+                    await engine.dispose()
+        self._reset()
+
+    def _reset(self) -> None:
+        self._pid = self._engine = self._replica_engine = self._session = self._replica_session = None
+
+
+_databases: "WeakSet[Database]" = WeakSet()
+
+
+def _forget_databases_after_fork() -> None:
+    for database in list(_databases):
+        database.forget()
+
+
+os.register_at_fork(after_in_child=_forget_databases_after_fork)
+
+
+def create_database() -> Database:
+    return Database(config.POSTGRES_CONFIG, echo=config.DEBUG)
+
+
+async def init_database(database: Database) -> AsyncIterator[Database]:
+    """
+    Ресурс контейнера: пулы закрываются при shutdown_resources
+
+    :param database: База данных
+    :return: База данных
+    """
+    yield database
+    await database.dispose()
+
+
+def get_db_session(database: Database) -> AsyncSession:
+    """
+    Сессия primary текущей области db_session_scope (запроса или сообщения)
+
+    :param database: База данных
+    :return: Сессия
+    """
+    return get_scoped_session(database.session_factory)
+
+
+def get_replica_db_session(database: Database) -> AsyncSession:
+    """
+    Сессия реплики текущей области db_session_scope (запроса или сообщения).
+    В режиме read_your_writes возвращается сессия primary той же области, чтобы чтение шло в ее транзакции
+
+    :param database: База данных
+    :return: Сессия
+    """
+    if _primary_reads.get():
+        return get_scoped_session(database.session_factory)
+    return get_scoped_session(database.replica_session_factory)
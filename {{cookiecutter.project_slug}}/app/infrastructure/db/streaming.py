@@ -0,0 +1,80 @@
+from abc import abstractmethod
+from contextlib import aclosing
+from typing import Any, AsyncGenerator, Generic, Sequence
+
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Executable
+
+from core.interfaces.query import IStreamingQueryHandler, TItem, TQuery
+
+
+async def stream_partitions(
+        session: AsyncSession, statement: Executable, chunk_size: int = 1000, scalars: bool = False
+) -> AsyncGenerator[Sequence[Any], None]:
+    """
+    Чтение результата запроса пачками через серверный курсор.
+
+    Следующая пачка запрашивается у базы только после того, как потребитель обработал предыдущую, поэтому
+    в памяти находится не больше `chunk_size` строк. Курсор живет внутри транзакции сессии и закрывается
+    при завершении или прерывании итерации.
+
+    :param session: Сессия
+    :param statement: Запрос
+    :param chunk_size: Количество строк в пачке
+    :param scalars: Возвращать первый столбец вместо строк, например ORM модели для select(Model)
+    :return: Пачки строк
+    """
+    result = await session.stream(statement.execution_options(yield_per=chunk_size))
+    if scalars:
+        result = result.scalars()
+    try:
+        async for partition in result.partitions(chunk_size):
+            yield partition
+    finally:
+        await result.close()
+
+
+class StreamingQueryHandler(IStreamingQueryHandler[TQuery, TItem], Generic[TQuery, TItem]):
+    """
+    Обработчик запросов, читающий строки select через серверный курсор и преобразующий их в результаты по одной.
+
+        class ExportItemsQueryHandler(StreamingQueryHandler[ExportItemsQuery, ItemResult]):
+            def build_statement(self, query: ExportItemsQuery) -> Executable:
+                return select(Item.id, Item.name).where(Item.owner_id == query.owner_id).order_by(Item.id)
+
+            def to_result(self, row: Row) -> ItemResult:
+                return ItemResult(item_id=row.id, name=row.name)
+
+    Регистрируется в QueriesContainer:
+
+        export_items_query_handler = providers.Factory(
+            ExportItemsQueryHandler, session=db_session, chunk_size=config.POSTGRES_CONFIG.STREAM_CHUNK_SIZE
+        )
+    """
+
+    __slots__ = ("_session", "_chunk_size")
+
+    def __init__(self, session: AsyncSession, chunk_size: int = 1000) -> None:
+        """
+        :param session: Сессия
+        :param chunk_size: Количество строк, читаемых из курсора за раз
+        """
+        self._session = session
+        self._chunk_size = chunk_size
+
+    @abstractmethod
+    def build_statement(self, query: TQuery) -> Executable:
+        ...
+
+    @abstractmethod
+    def to_result(self, row: Row) -> TItem:
+        ...
+
+    async def stream(self, query: TQuery) -> AsyncGenerator[TItem, None]:
+        partitions = stream_partitions(self._session, self.build_statement(query), self._chunk_size)
+        # Курсор закрывается сразу при прерывании выгрузки, например после отключения клиента
+        async with aclosing(partitions):
+            async for partition in partitions:
+                for row in partition:
+                    yield self.to_result(row)
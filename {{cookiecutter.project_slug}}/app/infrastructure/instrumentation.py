@@ -0,0 +1,76 @@
+from enum import Enum
+from functools import wraps
+from inspect import iscoroutinefunction
+from typing import Any, Callable, Optional, TypeVar
+
+from opentelemetry import trace
+
+F = TypeVar("F", bound=Callable[..., Any])
+
+
+class TracingLevel(str, Enum):
+    OFF = "off"
+    COARSE = "coarse"
+    FINE = "fine"
+
+
+_RANKS = {TracingLevel.OFF: 0, TracingLevel.COARSE: 1, TracingLevel.FINE: 2}
+
+
+class _InstrumentationState:
+    __slots__ = ("rank",)
+
+    def __init__(self) -> None:
+        self.rank = _RANKS[TracingLevel.COARSE]
+
+
+_state = _InstrumentationState()
+
+
+def configure_instrumentation(level: TracingLevel) -> None:
+    """
+    Установка уровня детализации трассировки. Спаны с уровнем выше заданного не создаются
+
+    :param level: Уровень трассировки
+    :return:
+    """
+    _state.rank = _RANKS[level]
+
+
+def traced(name: Optional[str] = None, level: TracingLevel = TracingLevel.FINE) -> Callable[[F], F]:
+    """
+    Декоратор, оборачивающий вызов функции в спан с учетом уровня трассировки.
+    Если уровень спана выше заданного, то функция вызывается напрямую.
+
+    :param name: Имя спана, по умолчанию __qualname__ функции
+    :param level: Уровень спана
+    :return: Декоратор
+    """
+
+    def decorator(func: F) -> F:
+        span_name = name or func.__qualname__
+        tracer = trace.get_tracer(func.__module__)
+        rank = _RANKS[level]
+
+        if iscoroutinefunction(func):
+
+            @wraps(func)
+            async def async_wrapper(*args: Any, **kwargs: Any) -> Any:
+                if rank > _state.rank:
+                    return await func(*args, **kwargs)
+                with tracer.start_as_current_span(span_name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper  # type: ignore
+
+        @wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if rank > _state.rank:
+                return func(*args, **kwargs)
+            with tracer.start_as_current_span(span_name):
+                return func(*args, **kwargs)
+
+        return wrapper  # type: ignore
+
+    return decorator
+
@@ -1,5 +1,21 @@
-from dependency_injector import containers
+from dependency_injector import containers, providers
+{%- if cookiecutter.use_postgres == 'yes' %}
+
+from infrastructure.db.bulk import BulkWriter
+from infrastructure.db.session import get_db_session
+{%- endif %}
 
 
 class CommandsContainer(containers.DeclarativeContainer):
-    ...
+    config = providers.Configuration()
+    # Кэш результатов запросов для инвалидации по тегам: await query_cache.invalidate("tag")
+    query_cache = providers.Dependency()
+    {%- if cookiecutter.use_postgres == 'yes' %}
+    database = providers.Dependency()
+    # Сессия primary для command handlers
+    db_session = providers.Factory(get_db_session, database=database)
+    # Запись через COPY в транзакции сессии db_session
+    bulk_writer = providers.Factory(
+        BulkWriter, session=db_session, batch_size=config.POSTGRES_CONFIG.BULK_BATCH_SIZE
+    )
+    {%- endif %}
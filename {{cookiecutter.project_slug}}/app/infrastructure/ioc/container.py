@@ -1,7 +1,13 @@
 from dependency_injector import containers, providers
 
+from core.usecases.pagination import CursorCodec
+from infrastructure.cache.backends import MemoryCacheBackend
+from infrastructure.cache.query_cache import QueryCache
 from infrastructure.config import config
-from infrastructure.db.session import init_db_session
+{% if cookiecutter.use_postgres == 'yes' -%}
+from infrastructure.db.counting import CountCache, PageCounter
+from infrastructure.db.session import create_database, get_db_session, init_database
+{% endif -%}
 from infrastructure.ioc.commands_container import CommandsContainer
 
 {% if cookiecutter.use_kafka == 'yes' %}
@@ -21,12 +27,42 @@ class Container(containers.DeclarativeContainer):
             "infrastructure.queries",
         ]
     )
+    # Создается при первом использовании, без PAGINATION_CURSOR_SECRET выбрасывает ConfigurationBusinessError
+    cursor_codec = providers.Singleton(CursorCodec, secret=config.PAGINATION_CONFIG.CURSOR_SECRET)
+    # Для общего кэша нескольких процессов хранилище заменяется на RemoteCacheBackend:
+    # container.query_cache_backend.override(providers.Singleton(RemoteCacheBackend, client=redis_client))
+    query_cache_backend = providers.Singleton(MemoryCacheBackend, max_size=config.QUERY_CACHE_CONFIG.MAX_SIZE)
+    query_cache = providers.Singleton(
+        QueryCache, backend=query_cache_backend, namespace=config.QUERY_CACHE_CONFIG.NAMESPACE
+    )
     {% if cookiecutter.use_postgres == 'yes' %}
-    db_session = providers.Resource(init_db_session)
+    # Движки создаются при первой сессии, пулы закрываются ресурсом database_lifecycle
+    database = providers.Singleton(create_database)
+    database_lifecycle = providers.Resource(init_database, database=database)
+    # Сессия текущей области db_session_scope (запроса или сообщения)
+    db_session = providers.Factory(get_db_session, database=database)
+    page_counter = providers.Singleton(
+        PageCounter,
+        cache=providers.Singleton(
+            CountCache,
+            max_size=config.PAGINATION_CONFIG.COUNT_CACHE_SIZE,
+            ttl=config.PAGINATION_CONFIG.COUNT_CACHE_TTL,
+        ),
+    )
     {% endif %}
 
-    queries = providers.Container(QueriesContainer)
-    commands = providers.Container(CommandsContainer)
+    queries = providers.Container(
+        QueriesContainer,
+        config=config,
+        query_cache=query_cache,{% if cookiecutter.use_postgres == 'yes' %}
+        database=database,{% endif %}
+    )
+    commands = providers.Container(
+        CommandsContainer,
+        config=config,
+        query_cache=query_cache,{% if cookiecutter.use_postgres == 'yes' %}
+        database=database,{% endif %}
+    )
     {% if cookiecutter.use_kafka == 'yes' %}
     kafka = providers.Container(KafkaContainer, config=config)
     {% endif %}
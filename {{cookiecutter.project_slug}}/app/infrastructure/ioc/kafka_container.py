@@ -2,11 +2,18 @@ from dependency_injector import containers, providers
 from schema_registry.client import Auth, SchemaRegistryClient
 
 from infrastructure.kafka.app import create_producer_app
+from infrastructure.kafka.producer import KafkaProducerService
+from infrastructure.kafka.schema_store import SchemaStore
 
 
 class KafkaContainer(containers.DeclarativeContainer):
     config = providers.Configuration()
     producer_app = providers.Resource(create_producer_app)
+    producer = providers.Singleton(
+        KafkaProducerService,
+        app=producer_app,
+        max_in_flight=config.KAFKA_CONFIG.PRODUCER_MAX_IN_FLIGHT,
+    )
     registry_client = providers.Singleton(
         SchemaRegistryClient,
         url=config.KAFKA_CONFIG.SCHEMA_REGISTRY_URL,
@@ -19,3 +26,8 @@ class KafkaContainer(containers.DeclarativeContainer):
         if not config.KAFKA_CONFIG.LOCAL
         else None,
     )
+    schema_store = providers.Singleton(
+        SchemaStore,
+        client=registry_client,
+        cache_path=config.KAFKA_CONFIG.SCHEMA_CACHE_PATH,
+    )
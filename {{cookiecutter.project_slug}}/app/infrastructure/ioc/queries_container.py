@@ -1,5 +1,17 @@
-from dependency_injector import containers
+from dependency_injector import containers, providers
+{%- if cookiecutter.use_postgres == 'yes' %}
+
+from infrastructure.db.session import get_replica_db_session
+{%- endif %}
 
 
 class QueriesContainer(containers.DeclarativeContainer):
-    ...
+    config = providers.Configuration()
+    # Кэш результатов, обработчики оборачиваются в CachedQueryHandler
+    query_cache = providers.Dependency()
+    {%- if cookiecutter.use_postgres == 'yes' %}
+    database = providers.Dependency()
+    # Сессия реплики (или primary, если POSTGRES_REPLICA_URI не задан) для query handlers
+    db_session = providers.Factory(get_replica_db_session, database=database)
+    # Потоковые обработчики (StreamingQueryHandler) получают chunk_size=config.POSTGRES_CONFIG.STREAM_CHUNK_SIZE
+    {%- endif %}
@@ -65,6 +65,10 @@ def create_producer_app() -> App:
         broker_credentials=credentials,
         autodiscover=True,
         origin="consumer",
+        producer_linger=config.KAFKA_CONFIG.PRODUCER_LINGER_MS / 1000,
+        producer_max_batch_size=config.KAFKA_CONFIG.PRODUCER_MAX_BATCH_SIZE,
+        producer_compression_type=config.KAFKA_CONFIG.PRODUCER_COMPRESSION,
+        producer_acks=config.KAFKA_CONFIG.PRODUCER_ACKS,
     )
     app.producer_only = True
     app.tracer = FaustTracer(config=config)
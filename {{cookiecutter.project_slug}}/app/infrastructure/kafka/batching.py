@@ -0,0 +1,284 @@
+import asyncio
+from contextlib import nullcontext
+from typing import (
+    Any,
+    AsyncContextManager,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Generic,
+    Optional,
+    Sequence,
+    TypeVar,
+)
+
+import structlog
+from faust import App
+from faust.types import AgentT, ChannelT, StreamT
+
+logger = structlog.get_logger(__name__)
+
+T = TypeVar("T")
+
+BulkHandler = Callable[[Sequence[T]], Awaitable[Any]]
+FailureHandler = Callable[[T, Exception], Awaitable[Any]]
+ScopeFactory = Callable[[], AsyncContextManager[Any]]
+ErrorPredicate = Callable[[Exception], bool]
+
+
+_END = object()
+
+
+class _SourceError:
+    __slots__ = ("error",)
+
+    def __init__(self, error: BaseException) -> None:
+        self.error = error
+
+
+async def _read(items: AsyncIterable[Any], queue: asyncio.Queue) -> None:
+    try:
+        async for item in items:
+            await queue.put(item)
+    except Exception as e:
+        await queue.put(_SourceError(e))
+    else:
+        await queue.put(_END)
+
+
+async def iterate_batches(items: AsyncIterable[T], max_size: int, max_wait: float) -> AsyncIterator[list[T]]:
+    """
+    Группировка элементов в пачки: пачка отдается, когда набрано `max_size` элементов или прошло `max_wait` секунд
+    с получения первого элемента пачки.
+
+    Элементы читаются отдельной задачей в очередь не больше `max_size` элементов, поэтому чтение источника
+    не прерывается по таймауту пачки, а следующая пачка набирается во время обработки текущей.
+
+    :param items: Элементы
+    :param max_size: Максимальный размер пачки
+    :param max_wait: Максимальное ожидание пачки в секундах
+    :return: Пачки
+    """
+    loop = asyncio.get_running_loop()
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_size)
+    reader = asyncio.ensure_future(_read(items, queue))
+    try:
+        item = await queue.get()
+        while item is not _END:
+            batch: list[T] = []
+            deadline = loop.time() + max_wait
+            while item is not _END:
+                if isinstance(item, _SourceError):
+                    raise item.error
+                batch.append(item)
+                if len(batch) >= max_size:
+                    item = None
+                    break
+                if not queue.empty():
+                    item = queue.get_nowait()
+                    continue
+                timeout = deadline - loop.time()
+                try:
+                    if timeout <= 0:
+                        raise asyncio.TimeoutError
+                    item = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    item = None
+                    break
+            yield batch
+            if item is None:
+                item = await queue.get()
+    finally:
+        reader.cancel()
+
+
+def is_poison_error(error: Exception) -> bool:
+    """
+    Ошибка, вызванная содержимым сообщений, а не недоступностью внешних систем.
+    Временными считаются сетевые ошибки, таймауты и ошибки SQLAlchemy с разорванным соединением
+
+    :param error: Ошибка обработчика
+    :return: True - ошибка сообщения, False - временная ошибка
+    """
+    return not isinstance(error, (OSError, asyncio.TimeoutError)) and not getattr(
+        error, "connection_invalidated", False
+    )
+
+
+class BatchProcessor(Generic[T]):
+    """
+    Обработка пачки сообщений одним вызовом bulk handler.
+
+    Каждый вызов выполняется в отдельной области `scope` (например db_session_scope), поэтому при ошибке изменения
+    вызова откатываются. Пачка с ошибкой сообщения (`is_poison`) делится пополам, пока ошибка не будет
+    локализована в одном сообщении: остальные сообщения обрабатываются, сообщение с ошибкой передается
+    в on_failure. Без on_failure ошибка выбрасывается, и пачка не подтверждается.
+
+    Временная ошибка (например, недоступность базы) не делит пачку: вызов повторяется для всей пачки
+    до `max_retries` раз с экспоненциальной задержкой, затем ошибка выбрасывается без передачи сообщений
+    в on_failure, и пачка не подтверждается.
+    """
+
+    __slots__ = ("_handler", "_on_failure", "_scope", "_is_poison", "_max_retries", "_retry_delay")
+
+    def __init__(
+            self,
+            handler: BulkHandler[T],
+            on_failure: Optional[FailureHandler[T]] = None,
+            scope: ScopeFactory = nullcontext,
+            is_poison: ErrorPredicate = is_poison_error,
+            max_retries: int = 3,
+            retry_delay: float = 1.0,
+    ) -> None:
+        """
+        :param handler: Обработчик списка сообщений
+        :param on_failure: Обработчик сообщения, которое не удалось обработать, например отправка в DLQ топик
+        :param scope: Фабрика области одного вызова handler
+        :param is_poison: Проверка, что ошибка вызвана сообщениями пачки, а не временной недоступностью
+        :param max_retries: Количество повторов пачки при временной ошибке
+        :param retry_delay: Задержка перед первым повтором в секундах, удваивается с каждым повтором
+        """
+        self._handler = handler
+        self._on_failure = on_failure
+        self._scope = scope
+        self._is_poison = is_poison
+        self._max_retries = max_retries
+        self._retry_delay = retry_delay
+
+    async def process(self, batch: Sequence[T]) -> int:
+        """
+        Обработка пачки
+
+        :param batch: Сообщения
+        :return: Количество сообщений, переданных в on_failure
+        """
+        if not batch:
+            return 0
+        error = await self._call(batch)
+        if error is None:
+            return 0
+
+        if len(batch) > 1:
+            logger.warning("Batch failed, splitting", size=len(batch), error=repr(error))
+            middle = len(batch) // 2
+            return await self.process(batch[:middle]) + await self.process(batch[middle:])
+
+        logger.error("Message failed", message=repr(batch[0]), exc_info=error)
+        if self._on_failure is None:
+            raise error
+        await self._on_failure(batch[0], error)
+        return 1
+
+    async def _call(self, batch: Sequence[T]) -> Optional[Exception]:
+        # Временные ошибки повторяются и выбрасываются, ошибка сообщений возвращается для деления пачки
+        attempt = 0
+        while True:
+            try:
+                async with self._scope():
+                    await self._handler(batch)
+                return None
+            except Exception as e:
+                if self._is_poison(e):
+                    return e
+                if attempt >= self._max_retries:
+                    raise
+                delay = self._retry_delay * 2 ** attempt
+                attempt += 1
+                logger.warning(
+                    "Batch failed with transient error, retrying",
+                    size=len(batch),
+                    attempt=attempt,
+                    delay=delay,
+                    error=repr(e),
+                )
+            await asyncio.sleep(delay)
+
+
+async def consume_batches(
+        events: AsyncIterable[tuple[T, Any]],
+        ack: Callable[[Any], Awaitable[Any]],
+        processor: BatchProcessor[T],
+        max_size: int,
+        max_wait: float,
+) -> AsyncIterator[int]:
+    """
+    Обработка потока пачками с подтверждением событий пачки после ее обработки
+
+    :param events: Пары (сообщение, событие для подтверждения)
+    :param ack: Подтверждение события
+    :param processor: Обработчик пачек
+    :param max_size: Максимальный размер пачки
+    :param max_wait: Максимальное ожидание пачки в секундах
+    :return: Размеры обработанных пачек
+    """
+    async for batch in iterate_batches(events, max_size, max_wait):
+        await processor.process([value for value, _ in batch])
+        for _, event in batch:
+            await ack(event)
+        yield len(batch)
+
+
+async def stream_events(stream: StreamT) -> AsyncIterator[tuple[Any, Any]]:
+    """
+    Сообщения потока faust вместе с событиями для подтверждения
+
+    :param stream: Поток, обычно stream.noack()
+    :return: Пары (сообщение, событие)
+    """
+    async for value in stream:
+        yield value, stream.current_event
+
+
+def batched_agent(
+        app: App,
+        channel: ChannelT,
+        handler: BulkHandler[T],
+        max_size: int = 500,
+        max_wait: float = 1.0,
+        on_failure: Optional[FailureHandler[T]] = None,
+        scope: ScopeFactory = nullcontext,
+        is_poison: ErrorPredicate = is_poison_error,
+        max_retries: int = 3,
+        retry_delay: float = 1.0,
+        name: Optional[str] = None,
+) -> AgentT:
+    """
+    Агент, передающий сообщения топика в bulk handler пачками и возвращающий размеры обработанных пачек.
+    Смещения фиксируются только после успешной обработки всей пачки (at-least-once):
+
+        batched_agent(app, topic, handle_testings, max_size=500, max_wait=1.0, scope=db_session_scope)
+
+    :param app: Приложение faust из create_consumer_app
+    :param channel: Топик
+    :param handler: Обработчик списка сообщений
+    :param max_size: Максимальный размер пачки
+    :param max_wait: Максимальное ожидание пачки в секундах
+    :param on_failure: Обработчик сообщения, которое не удалось обработать
+    :param scope: Фабрика области одного вызова handler, например db_session_scope
+    :param is_poison: Проверка, что ошибка вызвана сообщениями пачки, а не временной недоступностью
+    :param max_retries: Количество повторов пачки при временной ошибке
+    :param retry_delay: Задержка перед первым повтором в секундах
+    :param name: Имя агента, по умолчанию имя handler
+    :return: Агент
+    """
+    processor = BatchProcessor(
+        handler,
+        on_failure=on_failure,
+        scope=scope,
+        is_poison=is_poison,
+        max_retries=max_retries,
+        retry_delay=retry_delay,
+    )
+
+    async def process_batches(stream: StreamT) -> AsyncIterator[int]:
+        # Подтверждение событий отключено, события подтверждаются после обработки пачки
+        noack_stream = stream.noack()
+        async for size in consume_batches(
+            stream_events(noack_stream), noack_stream.ack, processor, max_size, max_wait
+        ):
+            yield size
+
+    if name is None:
+        name = f"{handler.__module__}.{getattr(handler, '__qualname__', type(handler).__qualname__)}"
+    return app.agent(channel, name=name)(process_batches)
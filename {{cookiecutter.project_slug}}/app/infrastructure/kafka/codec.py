@@ -0,0 +1,120 @@
+import random
+import struct
+from enum import Enum
+from typing import Any, Callable, Optional
+
+import fastjsonschema
+import orjson
+from faust import Codec, Record
+from schema_registry.client.schema import BaseSchema
+from schema_registry.client.utils import JSON_SCHEMA_TYPE
+from schema_registry.serializers.errors import SerializerError
+
+from infrastructure.kafka.schema_store import SchemaStore
+
+# Формат Schema Registry: магический байт 0 и ID схемы (4 байта big-endian) перед телом сообщения
+_MAGIC_BYTE = 0
+_HEADER = struct.Struct(">bI")
+
+Validator = Callable[[Any], Any]
+
+
+class ValidationMode(str, Enum):
+    """
+    Проверка сообщений по JSON Schema
+
+    ALWAYS - каждое сообщение
+    SAMPLED - случайная доля сообщений
+    OFF - без проверки, схема при чтении не загружается
+    """
+
+    ALWAYS = "always"
+    SAMPLED = "sampled"
+    OFF = "off"
+
+
+class FastJsonCodec(Codec):
+    """
+    JSON кодек faust в формате Schema Registry, совместимый с FaustJsonSerializer в обе стороны.
+
+    Тело сообщения кодируется orjson, проверка выполняется функцией fastjsonschema, скомпилированной один раз
+    для каждого ID схемы. Ошибка проверки выбрасывает fastjsonschema.JsonSchemaValueException, ошибка формата
+    сообщения - SerializerError.
+    """
+
+    def __init__(
+            self,
+            store: SchemaStore,
+            subject: str,
+            schema: BaseSchema,
+            validation: ValidationMode = ValidationMode.ALWAYS,
+            sample_percent: float = 100.0,
+            random_: Callable[[], float] = random.random,
+    ) -> None:
+        """
+        :param store: Кэш схем реестра
+        :param subject: Subject схемы записываемых сообщений
+        :param schema: Схема записываемых сообщений
+        :param validation: Режим проверки
+        :param sample_percent: Процент проверяемых сообщений для режима SAMPLED
+        :param random_: Источник случайных чисел от 0 до 1 для выборки
+        """
+        self._store = store
+        self._subject = subject
+        self._schema = schema
+        self._validation = ValidationMode(validation)
+        self._sample_rate = sample_percent / 100
+        self._random = random_
+        self._header: Optional[bytes] = None
+        self._writer_schema_id: Optional[int] = None
+        self._validators: dict[int, Validator] = dict()
+        super().__init__()
+
+    def _dumps(self, payload: Any) -> bytes:
+        header, writer_schema_id = self._header, self._writer_schema_id
+        if header is None or writer_schema_id is None:
+            # ID схемы запрашивается при первой записи, а не при регистрации кодека
+            writer_schema_id = self._store.register(self._subject, self._schema, schema_type=JSON_SCHEMA_TYPE)
+            header = self._header = _HEADER.pack(_MAGIC_BYTE, writer_schema_id)
+            self._writer_schema_id = writer_schema_id
+        body = orjson.dumps(payload, default=_serialize_record)
+        if self._should_validate():
+            # Проверяется записываемый JSON: вложенные модели faust уже преобразованы в словари
+            self._validator(writer_schema_id)(orjson.loads(body))
+        return header + body
+
+    def _loads(self, message: bytes) -> Any:
+        if len(message) <= _HEADER.size:
+            raise SerializerError("message is too small to decode")
+        magic_byte, schema_id = _HEADER.unpack_from(message)
+        if magic_byte != _MAGIC_BYTE:
+            raise SerializerError("message does not start with magic byte")
+
+        payload = orjson.loads(memoryview(message)[_HEADER.size:])
+        if self._should_validate():
+            self._validator(schema_id)(payload)
+        return payload
+
+    def _should_validate(self) -> bool:
+        if self._validation is ValidationMode.ALWAYS:
+            return True
+        if self._validation is ValidationMode.OFF:
+            return False
+        return self._random() < self._sample_rate
+
+    def _validator(self, schema_id: int) -> Validator:
+        validator = self._validators.get(schema_id)
+        if validator is None:
+            schema = self._store.get_by_id(schema_id)
+            if schema is None:
+                raise SerializerError(f"unable to fetch schema with id {schema_id}")
+            validator = self._validators[schema_id] = fastjsonschema.compile(schema.raw_schema)
+        return validator
+
+
+def _serialize_record(value: Any) -> Any:
+    # orjson вызывает функцию только для неизвестных типов, например вложенных моделей faust
+    if isinstance(value, Record):
+        return value.to_representation()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
@@ -0,0 +1,226 @@
+import asyncio
+from collections import defaultdict, deque
+from contextlib import nullcontext
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Hashable, Optional, TypeVar
+
+import structlog
+from faust import App
+from faust.types import AgentT, ChannelT, EventT, StreamT
+
+from infrastructure.kafka.batching import FailureHandler, ScopeFactory, stream_events
+
+logger = structlog.get_logger(__name__)
+
+T = TypeVar("T")
+
+MessageHandler = Callable[[T], Awaitable[Any]]
+KeyFunction = Callable[[T, Any], Optional[Hashable]]
+PartitionFunction = Callable[[Any], Hashable]
+
+
+class ContiguousAcks:
+    """
+    Подтверждение событий в порядке получения внутри партиции: событие подтверждается, когда обработаны оно
+    и все полученные раньше события той же партиции. Фиксируемое смещение не обгоняет необработанные сообщения,
+    поэтому после перезапуска они будут прочитаны снова (at-least-once)
+    """
+
+    __slots__ = ("_ack", "_pending", "_lock")
+
+    def __init__(self, ack: Callable[[Any], Awaitable[Any]]) -> None:
+        """
+        :param ack: Подтверждение события
+        """
+        self._ack = ack
+        # партиция -> [событие, обработано] в порядке получения
+        self._pending: defaultdict[Hashable, deque[list]] = defaultdict(deque)
+        self._lock = asyncio.Lock()
+
+    def track(self, partition: Hashable, event: Any) -> list:
+        """
+        Регистрация полученного события
+
+        :param partition: Партиция события
+        :param event: Событие
+        :return: Запись события для complete
+        """
+        entry = [event, False]
+        self._pending[partition].append(entry)
+        return entry
+
+    async def complete(self, partition: Hashable, entry: list) -> None:
+        """
+        Отметка об обработке события и подтверждение непрерывного начала очереди партиции
+
+        :param partition: Партиция события
+        :param entry: Запись события из track
+        :return:
+        """
+        entry[1] = True
+        # Блокировка сохраняет порядок подтверждений при одновременном завершении нескольких сообщений
+        async with self._lock:
+            pending = self._pending[partition]
+            while pending and pending[0][1]:
+                await self._ack(pending.popleft()[0])
+
+    def pending_count(self) -> int:
+        return sum(len(pending) for pending in self._pending.values())
+
+
+async def consume_key_ordered(
+        events: AsyncIterable[tuple[T, Any]],
+        ack: Callable[[Any], Awaitable[Any]],
+        handler: MessageHandler[T],
+        max_in_flight: int,
+        key: KeyFunction[T],
+        partition: PartitionFunction = lambda event: None,
+        on_failure: Optional[FailureHandler[T]] = None,
+        scope: ScopeFactory = nullcontext,
+) -> AsyncIterator[T]:
+    """
+    Параллельная обработка до `max_in_flight` сообщений. Сообщения с одинаковым ключом обрабатываются
+    по одному в порядке получения, сообщения без ключа (None) - без ограничений порядка.
+    События подтверждаются через ContiguousAcks.
+
+    Ошибка без on_failure или ошибка самого on_failure выбрасывается после завершения уже начатых сообщений:
+    сообщение с ошибкой и все следующие не подтверждаются, следующие сообщения не обрабатываются.
+
+    :param events: Пары (сообщение, событие для подтверждения)
+    :param ack: Подтверждение события
+    :param handler: Обработчик сообщения
+    :param max_in_flight: Максимальное количество одновременно обрабатываемых сообщений
+    :param key: Ключ порядка сообщения
+    :param partition: Партиция события
+    :param on_failure: Обработчик сообщения, которое не удалось обработать
+    :param scope: Фабрика области обработки одного сообщения, например db_session_scope
+    :return: Обработанные сообщения в порядке завершения
+    """
+    acks = ContiguousAcks(ack)
+    slots = asyncio.Semaphore(max_in_flight)
+    # ключ -> задача последнего сообщения с этим ключом
+    tails: dict[Hashable, asyncio.Task] = dict()
+    tasks: set[asyncio.Task] = set()
+    completed: deque[T] = deque()
+    errors: list[Exception] = []
+
+    async def process(
+            value: T,
+            message_key: Optional[Hashable],
+            event_partition: Hashable,
+            entry: list,
+            previous: Optional[asyncio.Task],
+    ) -> None:
+        try:
+            if previous is not None:
+                await asyncio.wait([previous])
+            if errors:
+                return
+            try:
+                async with scope():
+                    await handler(value)
+            except Exception as e:
+                logger.exception("Message failed", message=repr(value))
+                if on_failure is None:
+                    errors.append(e)
+                    return
+                try:
+                    await on_failure(value, e)
+                except Exception as failure_error:
+                    logger.exception("Failure handler failed", message=repr(value))
+                    errors.append(failure_error)
+                    return
+            await acks.complete(event_partition, entry)
+            completed.append(value)
+        finally:
+            slots.release()
+            if tails.get(message_key) is asyncio.current_task():
+                del tails[message_key]
+
+    try:
+        async for value, event in events:
+            await slots.acquire()
+            if errors:
+                slots.release()
+                break
+            message_key = key(value, event)
+            event_partition = partition(event)
+            entry = acks.track(event_partition, event)
+            previous = tails.get(message_key) if message_key is not None else None
+            task = asyncio.ensure_future(process(value, message_key, event_partition, entry, previous))
+            task.add_done_callback(tasks.discard)
+            tasks.add(task)
+            if message_key is not None:
+                tails[message_key] = task
+            while completed:
+                yield completed.popleft()
+
+        if tasks:
+            await asyncio.wait(set(tasks))
+        if errors:
+            raise errors[0]
+        while completed:
+            yield completed.popleft()
+    finally:
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.wait(set(tasks))
+        if acks.pending_count():
+            logger.info("Unprocessed messages are not acked", count=acks.pending_count())
+
+
+def _message_key(value: Any, event: EventT) -> Optional[Hashable]:
+    # Ключ сообщения в байтах: десериализованный ключ может быть нехешируемой моделью
+    return event.message.key
+
+
+def _message_partition(event: EventT) -> Hashable:
+    return event.message.tp
+
+
+def key_ordered_agent(
+        app: App,
+        channel: ChannelT,
+        handler: MessageHandler[T],
+        max_in_flight: int = 10,
+        key: KeyFunction[T] = _message_key,
+        on_failure: Optional[FailureHandler[T]] = None,
+        scope: ScopeFactory = nullcontext,
+        name: Optional[str] = None,
+) -> AgentT:
+    """
+    Агент, обрабатывающий сообщения партиции параллельно с сохранением порядка сообщений с одинаковым ключом.
+    В отличие от concurrency агента faust, сообщения одного ключа не обрабатываются одновременно и не меняются
+    местами. Фиксируется смещение только непрерывно обработанных сообщений:
+
+        key_ordered_agent(app, topic, handle_testing, max_in_flight=50, scope=db_session_scope)
+
+    :param app: Приложение faust из create_consumer_app
+    :param channel: Топик
+    :param handler: Обработчик сообщения
+    :param max_in_flight: Максимальное количество одновременно обрабатываемых сообщений
+    :param key: Ключ порядка сообщения, по умолчанию ключ сообщения Kafka
+    :param on_failure: Обработчик сообщения, которое не удалось обработать
+    :param scope: Фабрика области обработки одного сообщения, например db_session_scope
+    :param name: Имя агента, по умолчанию имя handler
+    :return: Агент
+    """
+
+    async def process_messages(stream: StreamT) -> AsyncIterator[T]:
+        # Подтверждение событий отключено, события подтверждаются ContiguousAcks
+        noack_stream = stream.noack()
+        async for value in consume_key_ordered(
+            stream_events(noack_stream),
+            noack_stream.ack,
+            handler,
+            max_in_flight,
+            key=key,
+            partition=_message_partition,
+            on_failure=on_failure,
+            scope=scope,
+        ):
+            yield value
+
+    if name is None:
+        name = f"{handler.__module__}.{getattr(handler, '__qualname__', type(handler).__qualname__)}"
+    return app.agent(channel, name=name)(process_messages)
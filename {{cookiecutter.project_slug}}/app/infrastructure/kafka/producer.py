@@ -0,0 +1,131 @@
+import asyncio
+from typing import Any, AsyncIterable, Iterable, Optional, Union
+
+import structlog
+from faust import App
+from faust.types import CodecArg, HeadersArg, RecordMetadata, TopicT
+
+logger = structlog.get_logger(__name__)
+
+
+class ProducerRecord:
+    """
+    Сообщение для отправки
+    """
+
+    __slots__ = ("value", "key", "partition", "headers", "timestamp")
+
+    def __init__(
+            self,
+            value: Any,
+            key: Any = None,
+            partition: Optional[int] = None,
+            headers: HeadersArg = None,
+            timestamp: Optional[float] = None,
+    ) -> None:
+        self.value = value
+        self.key = key
+        self.partition = partition
+        self.headers = headers
+        self.timestamp = timestamp
+
+    def __repr__(self) -> str:
+        return f"ProducerRecord(key={self.key!r}, partition={self.partition!r})"
+
+
+class KafkaProducerService:
+    """
+    Отправка сообщений через producer приложения faust.
+
+    Сообщения передаются в буфер producer без ожидания подтверждения брокера: producer собирает их в пачки
+    по PRODUCER_LINGER_MS и PRODUCER_MAX_BATCH_SIZE. Количество неподтвержденных сообщений сервиса ограничено
+    `max_in_flight`: при заполнении отправка ждет подтверждений, так что память не растет быстрее, чем брокер
+    принимает сообщения. Кроме того, producer ждет, пока освободится место в буфере партиции.
+    """
+
+    __slots__ = ("_app", "_in_flight")
+
+    def __init__(self, app: App, max_in_flight: int = 10_000) -> None:
+        """
+        :param app: Приложение faust из create_producer_app
+        :param max_in_flight: Максимальное количество отправленных и еще не подтвержденных сообщений
+        """
+        self._app = app
+        self._in_flight = asyncio.BoundedSemaphore(max_in_flight)
+
+    async def send_many(
+            self,
+            topic: Union[str, TopicT],
+            records: Union[Iterable[ProducerRecord], AsyncIterable[ProducerRecord]],
+            value_serializer: CodecArg = None,
+            key_serializer: CodecArg = None,
+    ) -> list["asyncio.Future[RecordMetadata]"]:
+        """
+        Конвейерная отправка сообщений. Метод завершается, когда все сообщения переданы в буфер producer,
+        подтверждения брокера приходят в futures в порядке сообщений:
+
+            futures = await producer.send_many("events", (ProducerRecord(event, key=event["id"]) for ...))
+            results = await asyncio.gather(*futures, return_exceptions=True)
+
+        Ошибка отправки (в том числе сериализации) одного сообщения не прерывает отправку остальных
+        и выбрасывается при ожидании его future.
+
+        :param topic: Топик или его имя
+        :param records: Сообщения
+        :param value_serializer: Кодек значений, по умолчанию кодек топика
+        :param key_serializer: Кодек ключей, по умолчанию кодек топика
+        :return: Futures с метаданными записанных сообщений
+        """
+        if isinstance(topic, str):
+            topic = self._app.topic(topic)
+
+        futures: list[asyncio.Future[RecordMetadata]] = []
+        if isinstance(records, AsyncIterable):
+            async for record in records:
+                futures.append(await self._send(topic, record, value_serializer, key_serializer))
+        else:
+            for record in records:
+                futures.append(await self._send(topic, record, value_serializer, key_serializer))
+        return futures
+
+    async def flush(self) -> None:
+        """
+        Ожидание отправки всех сообщений буфера producer
+
+        :return:
+        """
+        await self._app.producer.flush()
+
+    async def _send(
+            self, topic: TopicT, record: ProducerRecord, value_serializer: CodecArg, key_serializer: CodecArg
+    ) -> "asyncio.Future[RecordMetadata]":
+        await self._in_flight.acquire()
+        try:
+            # force: внутри агента сообщение отправляется сразу, а не после подтверждения входящего события
+            pending = await topic.send(
+                key=record.key,
+                value=record.value,
+                partition=record.partition,
+                headers=record.headers,
+                timestamp=record.timestamp,
+                key_serializer=key_serializer,
+                value_serializer=value_serializer,
+                force=True,
+            )
+            future = asyncio.ensure_future(pending)
+        except Exception as e:
+            self._in_flight.release()
+            logger.warning("Message was not sent", record=repr(record), error=repr(e))
+            failed: "asyncio.Future[RecordMetadata]" = asyncio.get_running_loop().create_future()
+            failed.set_exception(e)
+            return failed
+        except BaseException:
+            # Отмена отправки (CancelledError) не должна занимать место в лимите
+            self._in_flight.release()
+            raise
+
+        future.add_done_callback(self._release)
+        return future
+
+    def _release(self, future: asyncio.Future) -> None:
+        self._in_flight.release()
@@ -1,7 +1,20 @@
+from dependency_injector.wiring import Provide, inject
 from faust.serializers import codecs
 
-from infrastructure.kafka.serializer import get_sample_serializer
+from infrastructure.config import config
+from infrastructure.kafka.schema_store import SchemaStore
+from infrastructure.kafka.serializer import get_codec, get_sample_serializer
 
 
-def register_consumer_schemas() -> None:
+@inject
+def register_consumer_schemas(store: SchemaStore = Provide["kafka.schema_store"]) -> None:
+    # Схемы всех кодеков загружаются одним параллельным запросом до создания сериалайзеров
+    store.prefetch(
+        schema_ids=[config.KAFKA_CONFIG.SCHEMA_TEST_ID],
+        subjects=[config.KAFKA_CONFIG.SCHEMA_TEST_SUBJECT],
+    )
     codecs.register("json_testing", get_sample_serializer())
+    # Кодек orjson + fastjsonschema для нагруженных топиков, формат сообщений тот же
+    codecs.register(
+        "fast_json_testing", get_codec(config.KAFKA_CONFIG.SCHEMA_TEST_SUBJECT, config.KAFKA_CONFIG.SCHEMA_TEST_ID)
+    )
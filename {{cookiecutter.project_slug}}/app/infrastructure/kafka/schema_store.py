@@ -0,0 +1,255 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Iterable, Optional, Union
+
+import httpx
+import structlog
+from schema_registry.client import SchemaRegistryClient
+from schema_registry.client.errors import ClientError
+from schema_registry.client.schema import BaseSchema, SchemaFactory
+from schema_registry.client.utils import AVRO_SCHEMA_TYPE, SchemaVersion
+
+logger = structlog.get_logger(__name__)
+
+_CACHE_FORMAT_VERSION = 1
+_LATEST = "latest"
+_REGISTRY_ERRORS = (httpx.HTTPError, ClientError, OSError)
+
+
+class SchemaNotAvailableError(Exception):
+    """
+    Схема не найдена ни в реестре, ни в кэше
+    """
+
+
+class SchemaStore:
+    """
+    Кэш схем Schema Registry поверх SchemaRegistryClient, совместимый с ним для сериализаторов
+    schema_registry.serializers (методы get_by_id и register).
+
+    Схемы по ID и ID по subject и версии не меняются, поэтому хранятся в памяти без срока жизни и сохраняются
+    в файл `cache_path`. Файл читается при создании: процесс запускается без обращений к реестру
+    и при его недоступности, если нужные схемы уже были загружены ранее. Версия latest запрашивается
+    у реестра, кэш используется только при его недоступности.
+    """
+
+    __slots__ = ("_client", "_cache_path", "_lock", "_schemas", "_subjects", "_dirty")
+
+    def __init__(self, client: SchemaRegistryClient, cache_path: Optional[str] = None) -> None:
+        """
+        :param client: Клиент Schema Registry
+        :param cache_path: Путь к файлу кэша, без него схемы хранятся только в памяти
+        """
+        self._client = client
+        self._cache_path = cache_path
+        self._lock = threading.RLock()
+        # schema_id -> схема
+        self._schemas: dict[int, BaseSchema] = dict()
+        # subject -> {"versions": {version: schema_id}, "registered": {отпечаток схемы: schema_id}}
+        self._subjects: dict[str, dict[str, dict[str, int]]] = dict()
+        self._dirty = False
+        self._load()
+
+    def get_by_id(self, schema_id: int, **kwargs: Any) -> Optional[BaseSchema]:
+        """
+        Схема по ID
+
+        :param schema_id: ID схемы
+        :return: Схема или None, если реестр ее не знает
+        """
+        schema = self._schemas.get(schema_id)
+        if schema is None:
+            schema = self._fetch_by_id(schema_id)
+            self._flush()
+        return schema
+
+    def get_schema(self, subject: str, version: Union[int, str] = _LATEST) -> Optional[SchemaVersion]:
+        """
+        Схема subject указанной версии
+
+        :param subject: Subject
+        :param version: Номер версии или latest
+        :return: Схема с ID и версией или None, если реестр ее не знает
+        """
+        if version != _LATEST:
+            cached = self._cached_version(subject, str(version))
+            if cached is not None:
+                return cached
+
+        result = self._fetch_version(subject, version)
+        self._flush()
+        return result
+
+    def register(
+            self, subject: str, schema: Union[BaseSchema, str], schema_type: str = AVRO_SCHEMA_TYPE, **kwargs: Any
+    ) -> int:
+        """
+        ID схемы subject. Схема регистрируется в реестре, если еще не зарегистрирована
+
+        :param subject: Subject
+        :param schema: Схема
+        :param schema_type: Тип схемы, если схема передана строкой
+        :return: ID схемы
+        """
+        if isinstance(schema, str):
+            schema = SchemaFactory.create_schema(schema, schema_type)
+        fingerprint = _fingerprint(schema)
+
+        schema_id = self._subjects.get(subject, {}).get("registered", {}).get(fingerprint)
+        if schema_id is not None:
+            return schema_id
+
+        schema_id = self._client.register(subject, schema, schema_type=schema_type, **kwargs)
+        with self._lock:
+            self._remember_schema(schema_id, schema)
+            self._subject(subject)["registered"][fingerprint] = schema_id
+        self._flush()
+        return schema_id
+
+    def prefetch(
+            self, schema_ids: Iterable[int] = (), subjects: Iterable[str] = (), max_workers: int = 8
+    ) -> None:
+        """
+        Параллельная загрузка схем, отсутствующих в кэше, и последних версий subjects с одной записью кэша.
+        При недоступности реестра используются схемы из кэша, недостающие схемы загрузятся при первом обращении
+
+        :param schema_ids: ID схем
+        :param subjects: Subjects, последние версии которых загружаются
+        :param max_workers: Количество одновременных запросов
+        :return:
+        """
+        missing_ids = sorted({schema_id for schema_id in schema_ids if schema_id not in self._schemas})
+        subjects = sorted(set(subjects))
+        if not missing_ids and not subjects:
+            return
+
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="schema-prefetch") as executor:
+            futures = [executor.submit(self._fetch_by_id, schema_id) for schema_id in missing_ids]
+            futures += [executor.submit(self._fetch_version, subject, _LATEST) for subject in subjects]
+            for future in futures:
+                try:
+                    future.result()
+                except SchemaNotAvailableError as e:
+                    logger.warning("Schema prefetch failed", error=str(e))
+
+        self._flush()
+        logger.info("Schemas prefetched", schema_ids=missing_ids, subjects=subjects)
+
+    def _fetch_by_id(self, schema_id: int) -> Optional[BaseSchema]:
+        try:
+            schema = self._client.get_by_id(schema_id)
+        except _REGISTRY_ERRORS as e:
+            raise SchemaNotAvailableError(f"Schema {schema_id} is not cached and registry is unavailable: {e!r}")
+        if schema is not None:
+            with self._lock:
+                self._remember_schema(schema_id, schema)
+        return schema
+
+    def _fetch_version(self, subject: str, version: Union[int, str]) -> Optional[SchemaVersion]:
+        try:
+            # Клиент возвращает None и для отсутствующей версии, и для ошибки реестра
+            result = self._client.get_schema(subject, version)
+            error = None if result is not None else f"registry returned no {subject} version {version}"
+        except _REGISTRY_ERRORS as e:
+            result, error = None, repr(e)
+
+        if result is None:
+            cached = self._cached_version(subject, str(version))
+            if cached is None:
+                raise SchemaNotAvailableError(f"Schema {subject} version {version} is not available: {error}")
+            logger.warning("Schema registry is unavailable, using cached schema", subject=subject, version=version)
+            return cached
+
+        with self._lock:
+            self._remember_schema(result.schema_id, result.schema)
+            versions = self._subject(subject)["versions"]
+            versions[str(result.version)] = result.schema_id
+            if version == _LATEST:
+                versions[_LATEST] = result.schema_id
+        return SchemaVersion(subject, result.schema_id, self._schemas[result.schema_id], result.version)
+
+    def _cached_version(self, subject: str, version: str) -> Optional[SchemaVersion]:
+        versions = self._subjects.get(subject, {}).get("versions", {})
+        schema_id = versions.get(version)
+        if schema_id is None or schema_id not in self._schemas:
+            return None
+        if version == _LATEST:
+            # Номер последней версии восстанавливается по ID среди сохраненных версий
+            version = next((key for key, value in versions.items() if value == schema_id and key != _LATEST), version)
+        return SchemaVersion(
+            subject, schema_id, self._schemas[schema_id], int(version) if version.isdigit() else version
+        )
+
+    def _remember_schema(self, schema_id: int, schema: BaseSchema) -> None:
+        if schema_id not in self._schemas:
+            self._schemas[schema_id] = schema
+        self._dirty = True
+
+    def _subject(self, subject: str) -> dict[str, dict[str, int]]:
+        return self._subjects.setdefault(subject, {"versions": {}, "registered": {}})
+
+    def _load(self) -> None:
+        if self._cache_path is None or not os.path.exists(self._cache_path):
+            return
+        try:
+            with open(self._cache_path, "rb") as file:
+                data = json.load(file)
+            if data.get("format") != _CACHE_FORMAT_VERSION:
+                raise ValueError(f"unsupported cache format {data.get('format')!r}")
+            schemas = {
+                int(schema_id): SchemaFactory.create_schema(value["schema"], value["type"])
+                for schema_id, value in data["schemas"].items()
+            }
+            subjects = {
+                subject: {"versions": dict(value["versions"]), "registered": dict(value["registered"])}
+                for subject, value in data["subjects"].items()
+            }
+        except Exception as e:
+            # Поврежденный кэш не мешает запуску: схемы загружаются из реестра
+            logger.warning("Schema cache is ignored", path=self._cache_path, error=repr(e))
+            return
+
+        self._schemas.update(schemas)
+        self._subjects.update(subjects)
+        logger.info("Schema cache loaded", path=self._cache_path, schemas=len(schemas))
+
+    def _flush(self) -> None:
+        if self._cache_path is None or not self._dirty:
+            return
+        with self._lock:
+            data = {
+                "format": _CACHE_FORMAT_VERSION,
+                "schemas": {
+                    str(schema_id): {"type": schema.schema_type, "schema": json.dumps(schema.raw_schema)}
+                    for schema_id, schema in self._schemas.items()
+                },
+                "subjects": self._subjects,
+            }
+            self._dirty = False
+            try:
+                _write_atomically(self._cache_path, json.dumps(data).encode())
+            except OSError as e:
+                logger.warning("Schema cache is not saved", path=self._cache_path, error=repr(e))
+
+
+def _fingerprint(schema: BaseSchema) -> str:
+    canonical = json.dumps(schema.raw_schema, sort_keys=True, separators=(",", ":"))
+    return f"{schema.schema_type}:{hashlib.sha256(canonical.encode()).hexdigest()}"
+
+
+def _write_atomically(path: str, content: bytes) -> None:
+    # Несколько процессов пишут файл одновременно: читатели видят либо старую, либо новую версию
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(dir=directory, prefix=".schema-cache-")
+    try:
+        with os.fdopen(fd, "wb") as file:
+            file.write(content)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.unlink(temp_path)
+        raise
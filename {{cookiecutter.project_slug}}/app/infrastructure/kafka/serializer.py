@@ -1,13 +1,38 @@
 from dependency_injector.wiring import Provide, inject
-from schema_registry.client import SchemaRegistryClient
 from schema_registry.client.schema import JsonSchema
 from schema_registry.serializers.faust import FaustJsonSerializer
 
 from infrastructure.config import config
+from infrastructure.kafka.codec import FastJsonCodec, ValidationMode
+from infrastructure.kafka.schema_store import SchemaNotAvailableError, SchemaStore
 
 
 # TODO: Удалить после реализации бизнес сериалайзеров
 @inject
-def get_sample_serializer(client: SchemaRegistryClient = Provide["kafka.registry_client"]) -> FaustJsonSerializer:
-    test_schema: JsonSchema = client.get_by_id(config.KAFKA_CONFIG.SCHEMA_TEST_ID)
-    return FaustJsonSerializer(client, config.KAFKA_CONFIG.SCHEMA_TEST_SUBJECT, test_schema.schema)
+def get_sample_serializer(store: SchemaStore = Provide["kafka.schema_store"]) -> FaustJsonSerializer:
+    test_schema: JsonSchema = store.get_by_id(config.KAFKA_CONFIG.SCHEMA_TEST_ID)
+    # Сериалайзер получает схемы через кэш, а не напрямую из реестра
+    return FaustJsonSerializer(store, config.KAFKA_CONFIG.SCHEMA_TEST_SUBJECT, test_schema.schema)
+
+
+@inject
+def get_codec(subject: str, schema_id: int, store: SchemaStore = Provide["kafka.schema_store"]) -> FastJsonCodec:
+    """
+    Кодек сообщений топика с настройками проверки из конфигурации
+
+    :param subject: Subject схемы записываемых сообщений
+    :param schema_id: ID схемы записываемых сообщений
+    :param store: Кэш схем реестра
+    :return: Кодек
+    :raise: SchemaNotAvailableError
+    """
+    schema = store.get_by_id(schema_id)
+    if schema is None:
+        raise SchemaNotAvailableError(f"Schema {schema_id} is not registered")
+    return FastJsonCodec(
+        store,
+        subject,
+        schema,
+        validation=ValidationMode(config.KAFKA_CONFIG.CODEC_VALIDATION),
+        sample_percent=config.KAFKA_CONFIG.CODEC_VALIDATION_PERCENT,
+    )
@@ -2,21 +2,25 @@ from typing import Any, ContextManager, Optional
 
 from fastapi import FastAPI
 from faust.types.app import TracerT  # noqa
-from opentelemetry import trace
+from opentelemetry import metrics, trace
 from opentelemetry.exporter.jaeger.thrift import JaegerExporter
 from opentelemetry.instrumentation.fastapi import FastAPIInstrumentor
 from opentelemetry.instrumentation.logging import LoggingInstrumentor
+from opentelemetry.sdk.metrics import MeterProvider
+from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
 from opentelemetry.sdk.resources import SERVICE_INSTANCE_ID, SERVICE_NAME, SERVICE_NAMESPACE, SERVICE_VERSION, Resource
 from opentelemetry.sdk.trace import TracerProvider
 from opentelemetry.sdk.trace.export import BatchSpanProcessor
 
 from infrastructure.config import Config
+from infrastructure.instrumentation import configure_instrumentation
 
 {% if cookiecutter.use_kafka == 'yes' %}
 from opentelemetry.shim.opentracing_shim import TracerShim
 {% endif %}
 
 def init_tracing(config: Config) -> TracerProvider:
+    configure_instrumentation(config.TRACING_CONFIG.LEVEL)
     resource = Resource(
         attributes={
             SERVICE_NAME: config.PROJECT_NAME,
@@ -25,6 +29,7 @@ def init_tracing(config: Config) -> TracerProvider:
             SERVICE_VERSION: config.TRACING_CONFIG.VERSION,
         }
     )
+    init_metrics(config, resource)
     tracer = TracerProvider(resource=resource)
     trace.set_tracer_provider(tracer)
     tracer.add_span_processor(
@@ -40,6 +45,31 @@ def init_tracing(config: Config) -> TracerProvider:
     return tracer
 
 
+def init_metrics(config: Config, resource: Resource) -> Optional[MeterProvider]:
+    """
+    Экспорт метрик (пулы соединений, кэш запросов) в OpenTelemetry Collector по OTLP.
+    Без METRICS_OTLP_ENDPOINT провайдер метрик не создается и метрики не собираются
+
+    :param config: Конфигурация
+    :param resource: Описание сервиса
+    :return: Провайдер метрик или None
+    """
+    metrics_config = config.METRICS_CONFIG
+    if not metrics_config.OTLP_ENDPOINT:
+        return None
+
+    # Импорт grpc откладывается до включения экспорта метрик
+    from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import OTLPMetricExporter
+
+    reader = PeriodicExportingMetricReader(
+        OTLPMetricExporter(endpoint=metrics_config.OTLP_ENDPOINT, insecure=metrics_config.OTLP_INSECURE),
+        export_interval_millis=metrics_config.EXPORT_INTERVAL_MS,
+    )
+    meter_provider = MeterProvider(metric_readers=[reader], resource=resource)
+    metrics.set_meter_provider(meter_provider)
+    return meter_provider
+
+
 def init_tracing_for_app(app: FastAPI, config: Config) -> TracerProvider:
     tracer = init_tracing(config=config)
     FastAPIInstrumentor.instrument_app(app, tracer_provider=tracer)
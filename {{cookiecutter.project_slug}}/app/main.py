@@ -6,6 +6,7 @@ from infrastructure.config import config
 from infrastructure.ioc.container import Container
 from infrastructure.log import configure_logging
 from infrastructure.tracing import init_tracing_for_app
+from web.admin.router import register_admin
 from web.callbacks import register_callback
 from web.handlers import register_error_handlers
 from web.healthcheck.router import register_healthcheck
@@ -23,6 +24,8 @@ def create_app(container: containers.DeclarativeContainer = None) -> FastAPI:
     register_middleware(application)
     register_error_handlers(application)
     register_healthcheck(app=application, healthcheck_config=config.HEALTHCHECK_CONFIG)
+    if config.ADMIN_CONFIG.ENABLED:
+        register_admin(app=application, admin_config=config.ADMIN_CONFIG)
     register_callback(app=application, container=container)
     configure_logging(log_level=config.LOG.LEVEL, log_format=config.LOG.FORMAT)
     init_tracing_for_app(application, config)
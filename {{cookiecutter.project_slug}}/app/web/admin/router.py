@@ -0,0 +1,51 @@
+{%- if cookiecutter.use_postgres == 'yes' -%}
+from typing import Any, Optional
+
+from fastapi import APIRouter, Depends, FastAPI, Query, Request, Response, status
+{%- else -%}
+from typing import Any
+
+from fastapi import APIRouter, Depends, FastAPI, Request
+{%- endif %}
+
+from infrastructure.config import AdminConfig
+{%- if cookiecutter.use_postgres == 'yes' %}
+from infrastructure.db.query_log import query_stats
+{%- endif %}
+from infrastructure.instrumentation import TracingLevel, traced
+from web.middlewares import RolesKeycloakMiddleware
+from web.policies import describe_route_policies
+
+
+@traced("register_admin", level=TracingLevel.COARSE)
+def register_admin(app: FastAPI, admin_config: AdminConfig) -> None:
+    """
+    Регистрация служебных эндпоинтов /admin, доступных пользователям с ролями ADMIN_ROLES
+
+    :param app: Приложение FastAPI
+    :param admin_config: Конфигурация служебных эндпоинтов
+    :return:
+    """
+    admin_router = APIRouter(
+        prefix="/admin",
+        tags=["Admin"],
+        dependencies=[Depends(RolesKeycloakMiddleware(roles=admin_config.ROLES, policy_name="admin"))],
+        include_in_schema=False,
+    )
+
+    @admin_router.get("/policies")
+    async def policies(request: Request) -> list[dict[str, Any]]:
+        return describe_route_policies(request.app)
+    {%- if cookiecutter.use_postgres == 'yes' %}
+
+    @admin_router.get("/db/query-stats")
+    async def get_query_stats(limit: Optional[int] = Query(None, gt=0)) -> list[dict[str, Any]]:
+        return query_stats.dump(limit)
+
+    @admin_router.delete("/db/query-stats", status_code=status.HTTP_204_NO_CONTENT)
+    async def reset_query_stats() -> Response:
+        query_stats.reset()
+        return Response(status_code=status.HTTP_204_NO_CONTENT)
+    {%- endif %}
+
+    app.include_router(admin_router)
@@ -1,14 +1,25 @@
+from inspect import isawaitable
+
 from fastapi import FastAPI
-from opentelemetry import trace
 
+from infrastructure.instrumentation import TracingLevel, traced
 from infrastructure.ioc.container import Container
 
-tracer = trace.get_tracer(__name__)
-
 
+@traced("register_callback", level=TracingLevel.COARSE)
 def register_callback(app: FastAPI, container: Container) -> None:
-    with tracer.start_as_current_span("register_callback"):
-        def shutdown():
-            container.shutdown_resources()
+{%- if cookiecutter.use_postgres == 'yes' %}
+    async def startup() -> None:
+        result = container.database_lifecycle.init()
+        if isawaitable(result):
+            await result
+
+    app.add_event_handler("startup", startup)
+{% endif %}
+    async def shutdown() -> None:
+        # Асинхронные ресурсы (пулы соединений) возвращают корутину
+        result = container.shutdown_resources()
+        if isawaitable(result):
+            await result
 
-        app.add_event_handler("shutdown", shutdown)
+    app.add_event_handler("shutdown", shutdown)
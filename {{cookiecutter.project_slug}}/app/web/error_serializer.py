@@ -0,0 +1,73 @@
+from functools import lru_cache
+from typing import Any
+
+import orjson
+from humps import camelize
+from starlette.responses import Response
+
+from core.errors import BaseBusinessError
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+@lru_cache(maxsize=None)
+def _camelize_key(key: str) -> str:
+    return camelize(key)
+
+
+class BusinessErrorSerializer:
+    """
+    Сериализатор ошибок одного класса BaseBusinessError в JSON с camelCase ключами.
+
+    Список полей класса и их camelCase имена вычисляются один раз, Enum значения сериализует orjson.
+    Поля recovery_type, raw_type и category берутся из экземпляра или из атрибутов класса.
+    """
+
+    __slots__ = ("_fields",)
+
+    def __init__(self, error_class: type[BaseBusinessError]) -> None:
+        self._fields = tuple((name, _camelize_key(name)) for name in _get_field_names(error_class))
+
+    def as_dict(self, exc: BaseBusinessError) -> dict[str, Any]:
+        result = {key: getattr(exc, name, None) for name, key in self._fields}
+
+        # Атрибуты, добавленные в экземпляр вне слотов
+        for name, value in vars(exc).items():
+            result[_camelize_key(name)] = value
+
+        return result
+
+    def dumps(self, exc: BaseBusinessError) -> bytes:
+        return orjson.dumps(self.as_dict(exc), option=_ORJSON_OPTIONS)
+
+
+@lru_cache(maxsize=None)
+def get_error_serializer(error_class: type[BaseBusinessError]) -> BusinessErrorSerializer:
+    return BusinessErrorSerializer(error_class)
+
+
+def business_error_response(status_code: int, exc: BaseBusinessError) -> Response:
+    """
+    Формирование JSON ответа с ошибкой
+
+    :param status_code: HTTP статус ответа
+    :param exc: Бизнес ошибка
+    :return: Ответ с сериализованной ошибкой
+    """
+    return Response(
+        content=get_error_serializer(type(exc)).dumps(exc), status_code=status_code, media_type="application/json"
+    )
+
+
+def _get_field_names(error_class: type[BaseBusinessError]) -> list[str]:
+    names = list(BaseBusinessError.response_fields)
+
+    for klass in reversed(error_class.__mro__):
+        slots = klass.__dict__.get("__slots__", ())
+        names.extend(
+            name
+            for name in ((slots,) if isinstance(slots, str) else slots)
+            if not name.startswith("__") and name not in names
+        )
+
+    return names
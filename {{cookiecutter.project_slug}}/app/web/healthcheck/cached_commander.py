@@ -0,0 +1,112 @@
+import asyncio
+import time
+from contextlib import suppress
+from typing import Callable, Optional
+
+import structlog
+
+from infrastructure.config import HealthCheckConfig
+from infrastructure.instrumentation import TracingLevel, traced
+from web.healthcheck.commander import HealthCheckCommander, WorkingCapacityResult
+from web.healthcheck.handler import CommandHandler
+from web.healthcheck.status import Status
+
+logger = structlog.get_logger(__name__)
+
+
+class CachedHealthCheckCommander(HealthCheckCommander):
+    """
+    Коммандер, выполняющий проверки в фоновой задаче раз в HEALTHCHECK_CACHE_REFRESH_INTERVAL секунд.
+
+    Эндпоинты отдают последний результат с полем staleness (возраст результата в секундах). Результат старше
+    HEALTHCHECK_CACHE_MAX_STALENESS считается нездоровым. До первого обновления проверки выполняются на запрос.
+    """
+
+    __slots__ = ("_results", "_task", "_clock")
+
+    def __init__(
+            self,
+            liveness_handler: CommandHandler,
+            readiness_handler: CommandHandler,
+            monitor_handler: CommandHandler,
+            healthcheck_config: HealthCheckConfig,
+            clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        super().__init__(liveness_handler, readiness_handler, monitor_handler, healthcheck_config)
+        self._results: dict[tuple[CommandHandler, float], tuple[WorkingCapacityResult, float]] = dict()
+        self._task: Optional[asyncio.Task] = None
+        self._clock = clock
+
+    async def start(self) -> None:
+        """
+        Запуск фонового обновления результатов проверок
+
+        :return:
+        """
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_periodically())
+
+    async def stop(self) -> None:
+        """
+        Остановка фонового обновления результатов проверок
+
+        :return:
+        """
+        if self._task is not None:
+            self._task.cancel()
+            with suppress(asyncio.CancelledError):
+                await self._task
+            self._task = None
+
+    @traced("refresh", level=TracingLevel.COARSE)
+    async def refresh(self) -> None:
+        """
+        Выполнение всех проверок и сохранение результатов
+
+        :return:
+        """
+        probes = list(
+            dict.fromkeys(
+                (
+                    (self._liveness_handler, self._config.PERCENTAGE_MINIMUM_FOR_WORKING_CAPACITY),
+                    (self._readiness_handler, self._config.PERCENTAGE_MINIMUM_FOR_WORKING_CAPACITY),
+                    (self._monitor_handler, self._config.PERCENTAGE_MAXIMUM_FOR_WORKING_CAPACITY),
+                )
+            )
+        )
+        form_working_capacity = super()._form_working_capacity
+        results = await asyncio.gather(*(form_working_capacity(*probe) for probe in probes))
+
+        refreshed_at = self._clock()
+        for probe, result in zip(probes, results):
+            self._results[probe] = (result, refreshed_at)
+
+    async def _refresh_periodically(self) -> None:
+        while True:
+            try:
+                await self.refresh()
+            except Exception:
+                # Старые результаты остаются и по истечении CACHE_MAX_STALENESS станут нездоровыми
+                logger.exception("Healthcheck refresh failed")
+
+            await asyncio.sleep(self._config.CACHE_REFRESH_INTERVAL)
+
+    async def _form_working_capacity(
+            self, command_handler: CommandHandler, need_percentage: float
+    ) -> WorkingCapacityResult:
+        """
+        Получение последнего результата проверки
+
+        :param command_handler: перехватчик команд
+        :param need_percentage: нужны процент работоспособности сервисов
+        :return: Result of working capacity
+        """
+        cached = self._results.get((command_handler, need_percentage))
+        if cached is None:
+            return await super()._form_working_capacity(command_handler, need_percentage)
+
+        result, refreshed_at = cached
+        staleness = self._clock() - refreshed_at
+        status = result.status if staleness <= self._config.CACHE_MAX_STALENESS else Status.UNHEALTHY
+
+        return result.copy(update={"status": status, "staleness": staleness})
@@ -1,19 +1,20 @@
-from opentelemetry import trace
+import asyncio
+from typing import Optional
 
 from infrastructure.config import HealthCheckConfig
+from infrastructure.instrumentation import TracingLevel, traced
 from utils.time import TimeCatcher
 from web.dto.base import BaseCamelCaseModel
-from web.healthcheck.commands import BaseCommand
+from web.healthcheck.commands import BaseCommand, CommandResult
 from web.healthcheck.handler import CommandHandler
 from web.healthcheck.status import Status
 
-tracer = trace.get_tracer(__name__)
-
 
 class WorkingCapacityResult(BaseCamelCaseModel):
     status: Status
     total_duration: float
     entries: dict[str, dict]
+    staleness: float = 0.0
 
 
 class HealthCheckCommander:
@@ -31,39 +32,40 @@ class HealthCheckCommander:
         self._monitor_handler = monitor_handler
         self._config = healthcheck_config
 
+    @traced("run_liveness_route", level=TracingLevel.COARSE)
     async def run_liveness_route(self) -> WorkingCapacityResult:
         """
         Эндпоинт для проверки liveness
 
         :return: Результат проверки
         """
-        with tracer.start_as_current_span("run_liveness_route"):
-            return await self._form_working_capacity(
-                self._liveness_handler, need_percentage=self._config.PERCENTAGE_MINIMUM_FOR_WORKING_CAPACITY
-            )
+        return await self._form_working_capacity(
+            self._liveness_handler, need_percentage=self._config.PERCENTAGE_MINIMUM_FOR_WORKING_CAPACITY
+        )
 
+    @traced("run_readiness_route", level=TracingLevel.COARSE)
     async def run_readiness_route(self) -> WorkingCapacityResult:
         """
         Эндпоинт для проверки readiness
 
         :return: Результат проверки
         """
-        with tracer.start_as_current_span("run_readiness_route"):
-            return await self._form_working_capacity(
-                self._readiness_handler, need_percentage=self._config.PERCENTAGE_MINIMUM_FOR_WORKING_CAPACITY
-            )
+        return await self._form_working_capacity(
+            self._readiness_handler, need_percentage=self._config.PERCENTAGE_MINIMUM_FOR_WORKING_CAPACITY
+        )
 
+    @traced("run_monitor_route", level=TracingLevel.COARSE)
     async def run_monitor_route(self) -> WorkingCapacityResult:
         """
         Эндпоинт для проверки monitor
 
         :return: Результат проверки
         """
-        with tracer.start_as_current_span("run_monitor_route"):
-            return await self._form_working_capacity(
-                self._monitor_handler, need_percentage=self._config.PERCENTAGE_MAXIMUM_FOR_WORKING_CAPACITY
-            )
+        return await self._form_working_capacity(
+            self._monitor_handler, need_percentage=self._config.PERCENTAGE_MAXIMUM_FOR_WORKING_CAPACITY
+        )
 
+    @traced("_form_working_capacity", level=TracingLevel.COARSE)
     async def _form_working_capacity(
             self, command_handler: CommandHandler, need_percentage: float
     ) -> WorkingCapacityResult:
@@ -74,31 +76,85 @@ class HealthCheckCommander:
         :param need_percentage: нужны процент работоспособности сервисов
         :return: Result of working capacity
         """
-        with tracer.start_as_current_span("_form_working_capacity"):
-            count_healthy_services = 0
-            entries = dict()
+        count_healthy_services = 0
+        entries = dict()
+
+        async with TimeCatcher() as catcher:  # type: TimeCatcher
+            tasks = {
+                name: asyncio.create_task(
+                    self._execute_command(command, timeout=self._get_timeout(command_handler, name))
+                )
+                for name, command in command_handler.commands.items()
+            }  # type: dict[str, asyncio.Task]
+
+            try:
+                if tasks:
+                    await asyncio.wait(tasks.values(), timeout=self._config.PROBE_TIMEOUT)
+            finally:
+                pending = [task for task in tasks.values() if not task.done()]
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        for name, task in tasks.items():
+            if task.cancelled():
+                command_result = self._timeout_result(self._config.PROBE_TIMEOUT, duration=catcher.total_duration)
+            else:
+                command_result = task.result()
 
-            async with TimeCatcher() as catcher:  # type: TimeCatcher
-                for name, command in command_handler.commands:  # type: str, BaseCommand
-                    command_result = await command.execute()
+            if command_result.status == Status.HEALTHY:
+                count_healthy_services += 1
 
-                    if command_result.status == Status.HEALTHY:
-                        count_healthy_services += 1
+            entries[name] = command_result.dict(exclude_none=True)
 
-                    entries[name] = command_result.dict(exclude_none=True)
+        if self._is_services_healthy(
+                count_healthy_services=count_healthy_services,
+                count_all_services=len(tasks),
+                need_percentage=need_percentage,
+        ):
+            status = Status.HEALTHY
+        else:
+            status = Status.UNHEALTHY
 
-            if self._is_services_healthy(
-                    count_healthy_services=count_healthy_services,
-                    count_all_services=len(command_handler.commands),
-                    need_percentage=need_percentage,
-            ):
-                status = Status.HEALTHY
-            else:
-                status = Status.UNHEALTHY
+        return WorkingCapacityResult(status=status, total_duration=catcher.total_duration, entries=entries)
+
+    def _get_timeout(self, command_handler: CommandHandler, service_name: str) -> Optional[float]:
+        timeout = command_handler.get_timeout(service_name)
+        return timeout if timeout is not None else self._config.COMMAND_TIMEOUT
+
+    @classmethod
+    @traced("_execute_command")
+    async def _execute_command(cls, command: BaseCommand, timeout: Optional[float]) -> CommandResult:
+        """
+        Запуск проверки сервиса с таймаутом
 
-            return WorkingCapacityResult(status=status, total_duration=catcher.total_duration, entries=entries)
+        :param command: Команда проверки сервиса
+        :param timeout: Таймаут проверки в секундах, None - без таймаута
+        :return: Результат проверки, UNHEALTHY при превышении таймаута
+        """
+        if timeout is None:
+            return await command.execute()
+
+        async with TimeCatcher() as catcher:  # type: TimeCatcher
+            try:
+                return await asyncio.wait_for(command.execute(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+        return cls._timeout_result(timeout, duration=catcher.total_duration)
+
+    @staticmethod
+    def _timeout_result(timeout: float, duration: float) -> CommandResult:
+        return CommandResult(
+            status=Status.UNHEALTHY,
+            data={"timeout": timeout},
+            duration=duration,
+            exception=asyncio.TimeoutError.__name__,
+            description=f"Health check did not finish in {timeout} seconds",
+        )
 
     @staticmethod
+    @traced("_is_services_healthy")
     def _is_services_healthy(*, count_healthy_services: int, count_all_services: int, need_percentage: float) -> bool:
         """
         Проверка работоспособности сервисов на основе результатов
@@ -107,9 +163,8 @@ class HealthCheckCommander:
         :param count_all_services: Количество всех сервисов
         :return: Результат проверка состояния
         """
-        with tracer.start_as_current_span("_is_services_healthy"):
-            return (
-                (count_healthy_services / count_all_services * 100) >= need_percentage
-                if count_all_services != 0
-                else count_all_services >= need_percentage
-            )
+        return (
+            (count_healthy_services / count_all_services * 100) >= need_percentage
+            if count_all_services != 0
+            else count_all_services >= need_percentage
+        )
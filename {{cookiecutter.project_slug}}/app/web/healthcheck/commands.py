@@ -1,11 +1,21 @@
 from abc import ABC, abstractmethod
+{%- if cookiecutter.use_postgres == 'yes' %}
+from typing import Callable
+{%- endif %}
 
-from dependency_injector.wiring import Closing, Provide
+{% if cookiecutter.use_postgres == 'yes' -%}
+from dependency_injector.wiring import Provide
+{% endif -%}
 from pydantic import BaseModel, Field
+{%- if cookiecutter.use_postgres == 'yes' %}
 from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
+{%- endif %}
 
+{% if cookiecutter.use_postgres == 'yes' -%}
+from infrastructure.db.scope import db_session_scope
+{% endif -%}
 from utils.time import TimeCatcher
 from web.healthcheck.status import Status
 
@@ -26,16 +36,19 @@ class BaseCommand(ABC):
         :return:
         """
         ...
+{%- if cookiecutter.use_postgres == 'yes' %}
 
 
 class DBCommand(BaseCommand):
-    def __init__(self, db_session: AsyncSession = Closing[Provide["db_session"]]):
-        self.db_session = db_session
+    def __init__(self, db_session_provider: Callable[[], AsyncSession] = Provide["db_session.provider"]):
+        self.db_session_provider = db_session_provider
 
     async def execute(self) -> CommandResult:
         async with TimeCatcher() as catcher:
             try:
-                await self.db_session.execute(select("1"))
+                # Собственная область, чтобы проверка не зависела от сессии запроса
+                async with db_session_scope():
+                    await self.db_session_provider().execute(select("1"))
                 status, exception, description = Status.HEALTHY, None, None
             except SQLAlchemyError as e:
                 status, exception, description = Status.UNHEALTHY, str(type(e)), str(e)
@@ -46,3 +59,4 @@ class DBCommand(BaseCommand):
             exception=exception,
             description=description,
         )
+{%- endif %}
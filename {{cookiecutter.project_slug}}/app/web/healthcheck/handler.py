@@ -1,27 +1,39 @@
+from typing import Optional
+
 import structlog
-from opentelemetry import trace
 
+from infrastructure.instrumentation import traced
 from web.healthcheck.commands import BaseCommand
 
 logger = structlog.get_logger(__name__)
-tracer = trace.get_tracer(__name__)
 
 
 class CommandHandler:
-    __slots__ = ("_commands",)
+    __slots__ = ("_commands", "_timeouts")
 
     def __init__(self):
         self._commands: dict[str, BaseCommand] = dict()
+        self._timeouts: dict[str, float] = dict()
 
-    def add_healthcheck_command(self, service_name: str, command: BaseCommand) -> None:
+    @traced("add_healthcheck_command")
+    def add_healthcheck_command(
+        self, service_name: str, command: BaseCommand, timeout: Optional[float] = None
+    ) -> None:
         """
         Добавление команды с проверкой сервиса
         :param service_name: Имя сервиса
         :param command: Команда проверки сервиса
+        :param timeout: Таймаут проверки в секундах, по умолчанию HEALTHCHECK_COMMAND_TIMEOUT
         :return:
         """
-        with tracer.start_as_current_span("add_healthcheck_command"):
-            self._commands[service_name] = command
+        self._commands[service_name] = command
+        if timeout is not None:
+            self._timeouts[service_name] = timeout
+        else:
+            self._timeouts.pop(service_name, None)
+
+    def get_timeout(self, service_name: str) -> Optional[float]:
+        return self._timeouts.get(service_name)
 
     @property
     def commands(self) -> dict[str, BaseCommand]:
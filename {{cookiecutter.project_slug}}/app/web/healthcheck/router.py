@@ -1,59 +1,62 @@
 from fastapi import APIRouter, Depends, FastAPI, status
 from fastapi.datastructures import Default
-from fastapi.encoders import jsonable_encoder
 from fastapi.responses import ORJSONResponse
-from opentelemetry import trace
 
 from infrastructure.config import HealthCheckConfig
+from infrastructure.instrumentation import TracingLevel, traced
+from web.healthcheck.cached_commander import CachedHealthCheckCommander
 from web.healthcheck.commander import HealthCheckCommander, WorkingCapacityResult
 from web.healthcheck.handler import CommandHandler
 from web.healthcheck.status import Status
-
-tracer = trace.get_tracer(__name__)
+from web.responses import CamelCaseModelResponse
 
 
+@traced("register_healthcheck", level=TracingLevel.COARSE)
 def register_healthcheck(app: FastAPI, healthcheck_config: HealthCheckConfig) -> None:
-    with tracer.start_as_current_span("register_healthcheck"):
-        healthcheck_router = APIRouter(prefix="/health", tags=["Healthcheck"])
-
-        liveness_command_handler = CommandHandler()
-        readiness_command_handler = CommandHandler()
-        monitor_command_handler = CommandHandler()
-
-        # TODO Need to implement your Command classes. Example:
-        # liveness_command_handler.add_healthcheck_command(command=kafka_command)
-        # readiness_command_handler.add_healthcheck_command(command=kafka_command)
-        # monitor_command_handler.add_healthcheck_command(command=kafka_command)
-
-        healthcheck_commander = HealthCheckCommander(
-            liveness_handler=liveness_command_handler,
-            readiness_handler=readiness_command_handler,
-            monitor_handler=monitor_command_handler,
-            healthcheck_config=healthcheck_config,
-        )
-
-        @healthcheck_router.get("/liveness", status_code=status.HTTP_200_OK, response_model=WorkingCapacityResult)
-        async def liveness(result: WorkingCapacityResult = Depends(healthcheck_commander.run_liveness_route)):
-            with tracer.start_as_current_span("liveness"):
-                if result.status == Status.HEALTHY:
-                    return result
-                else:
-                    return ORJSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content=jsonable_encoder(result))
-
-        @healthcheck_router.get("/readiness", status_code=status.HTTP_200_OK, response_model=WorkingCapacityResult)
-        async def readiness(result: WorkingCapacityResult = Depends(healthcheck_commander.run_readiness_route)):
-            with tracer.start_as_current_span("readiness"):
-                if result.status == Status.HEALTHY:
-                    return result
-                else:
-                    return ORJSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content=jsonable_encoder(result))
-
-        @healthcheck_router.get("/monitor", status_code=status.HTTP_200_OK, response_model=WorkingCapacityResult)
-        async def monitor(result: WorkingCapacityResult = Depends(healthcheck_commander.run_monitor_route)):
-            with tracer.start_as_current_span("monitor"):
-                if result.status == Status.HEALTHY:
-                    return result
-                else:
-                    return ORJSONResponse(status_code=status.HTTP_400_BAD_REQUEST, content=jsonable_encoder(result))
-
-        app.include_router(healthcheck_router, default_response_class=Default(ORJSONResponse))
+    healthcheck_router = APIRouter(prefix="/health", tags=["Healthcheck"])
+
+    liveness_command_handler = CommandHandler()
+    readiness_command_handler = CommandHandler()
+    monitor_command_handler = CommandHandler()
+
+    # TODO Need to implement your Command classes. Example:
+    # liveness_command_handler.add_healthcheck_command(command=kafka_command)
+    # readiness_command_handler.add_healthcheck_command(command=kafka_command)
+    # monitor_command_handler.add_healthcheck_command(command=kafka_command)
+
+    commander_class = CachedHealthCheckCommander if healthcheck_config.CACHE_ENABLED else HealthCheckCommander
+    healthcheck_commander = commander_class(
+        liveness_handler=liveness_command_handler,
+        readiness_handler=readiness_command_handler,
+        monitor_handler=monitor_command_handler,
+        healthcheck_config=healthcheck_config,
+    )
+    if isinstance(healthcheck_commander, CachedHealthCheckCommander):
+        app.add_event_handler("startup", healthcheck_commander.start)
+        app.add_event_handler("shutdown", healthcheck_commander.stop)
+
+    @healthcheck_router.get("/liveness", status_code=status.HTTP_200_OK, response_model=WorkingCapacityResult)
+    @traced("liveness", level=TracingLevel.COARSE)
+    async def liveness(result: WorkingCapacityResult = Depends(healthcheck_commander.run_liveness_route)):
+        if result.status == Status.HEALTHY:
+            return CamelCaseModelResponse(result)
+        else:
+            return CamelCaseModelResponse(result, status_code=status.HTTP_400_BAD_REQUEST)
+
+    @healthcheck_router.get("/readiness", status_code=status.HTTP_200_OK, response_model=WorkingCapacityResult)
+    @traced("readiness", level=TracingLevel.COARSE)
+    async def readiness(result: WorkingCapacityResult = Depends(healthcheck_commander.run_readiness_route)):
+        if result.status == Status.HEALTHY:
+            return CamelCaseModelResponse(result)
+        else:
+            return CamelCaseModelResponse(result, status_code=status.HTTP_400_BAD_REQUEST)
+
+    @healthcheck_router.get("/monitor", status_code=status.HTTP_200_OK, response_model=WorkingCapacityResult)
+    @traced("monitor", level=TracingLevel.COARSE)
+    async def monitor(result: WorkingCapacityResult = Depends(healthcheck_commander.run_monitor_route)):
+        if result.status == Status.HEALTHY:
+            return CamelCaseModelResponse(result)
+        else:
+            return CamelCaseModelResponse(result, status_code=status.HTTP_400_BAD_REQUEST)
+
+    app.include_router(healthcheck_router, default_response_class=Default(ORJSONResponse))
@@ -1,22 +1,36 @@
+import re
 import uuid
-from typing import Any, Callable, Coroutine, Optional
+from typing import Optional
 
-from fastapi import FastAPI, Request, Response, status
+from fastapi import FastAPI, Request, status
 from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from fastapi.security.utils import get_authorization_scheme_param
 from jose import ExpiredSignatureError, JWTError, jwt
-from opentelemetry import trace
 from sentry_sdk.integrations.asgi import SentryAsgiMiddleware
 from starlette.middleware.cors import CORSMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
 from structlog.contextvars import bind_contextvars, clear_contextvars
 
 from core.dto.auth import UserDTO
 from core.errors import SecurityBusinessError
+from infrastructure.auth.keys import IKeyProvider, get_key_provider
+from infrastructure.auth.token_cache import CachedToken, TokenCache
 from infrastructure.config import KeycloakConfig, config
+{% if cookiecutter.use_postgres == 'yes' -%}
+from infrastructure.db.scope import db_session_scope
+{% endif -%}
+from infrastructure.instrumentation import TracingLevel, traced
 from infrastructure.sentry import configure_sentry
 from web.errors import HTTPCustomError
+from web.policies import PolicyMatch, RolePolicy, RolePolicyRegistry, role_policies
 
-tracer = trace.get_tracer(__name__)
+_token_cache = TokenCache(
+    max_size=config.KEYCLOAK_CONFIG.TOKEN_CACHE_SIZE, max_ttl=config.KEYCLOAK_CONFIG.TOKEN_CACHE_MAX_TTL
+)
+
+CORRELATION_ID_HEADER = "X-Correlation-ID"
+_CORRELATION_ID_RE = re.compile(r"^[A-Za-z0-9._:-]{1,128}$")
+_TRACEPARENT_RE = re.compile(r"^[0-9a-f]{2}-([0-9a-f]{32})-[0-9a-f]{16}-[0-9a-f]{2}$")
 
 
 class RolesKeycloakMiddleware(HTTPBearer):
@@ -28,7 +42,12 @@ class RolesKeycloakMiddleware(HTTPBearer):
         self,
         *,
         roles: list[str],
+        match: PolicyMatch = PolicyMatch.ALL,
+        policy_name: Optional[str] = None,
+        policy_registry: RolePolicyRegistry = role_policies,
         keycloak_config: KeycloakConfig = config.KEYCLOAK_CONFIG,
+        token_cache: TokenCache = _token_cache,
+        key_provider: Optional[IKeyProvider] = None,
         bearer_format: str = "Bearer",
         scheme_name: Optional[str] = "Authorization",
         description: Optional[str] = "Авторизация по JWT токену",
@@ -37,70 +56,95 @@ class RolesKeycloakMiddleware(HTTPBearer):
         super().__init__(
             bearerFormat=bearer_format, scheme_name=scheme_name, description=description, auto_error=auto_error
         )
-        self._roles = roles
+        self._policies = policy_registry
+        self._policy = policy_registry.register(roles, match=match, name=policy_name)
         self._config = keycloak_config
+        self._token_cache = token_cache
+        self._key_provider = key_provider
 
+    @traced("RolesKeycloakMiddleware.__call__", level=TracingLevel.COARSE)
     async def __call__(self, request: Request) -> HTTPAuthorizationCredentials:
-        with tracer.start_as_current_span("RolesKeycloakMiddleware.__call__"):
-            token = await self._get_token_from_authorization_scheme(request)
+        token = await self._get_token_from_authorization_scheme(request)
+        verified_token = self._token_cache.get(token.credentials)
 
-            try:
-                token_payload = self._receive_token_payload(token.credentials)
-            except (ExpiredSignatureError, JWTError) as e:
-                raise HTTPCustomError(
-                    status_code=status.HTTP_401_UNAUTHORIZED,
+        if verified_token is None:
+            verified_token = await self._verify_token(token.credentials)
+
+        if not self._check_user_access_roles(self._get_roles_mask(verified_token)):
+            raise HTTPCustomError(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Not enough permissions",
+                business_error=SecurityBusinessError(
+                    status="403",
+                    detail="Not enough permissions",
+                ),
+            )
+
+        request.state.user = verified_token.user
+
+        return token
+
+    @property
+    def policy(self) -> RolePolicy:
+        return self._policy
+
+    async def _verify_token(self, token: str) -> CachedToken:
+        """
+        Проверка подписи токена и сохранение результата в кэш
+
+        :param token: JWT
+        :return: Проверенный токен
+        :raise: HTTPCustomError
+        """
+        try:
+            token_payload = await self._receive_token_payload(token)
+        except (ExpiredSignatureError, JWTError) as e:
+            raise HTTPCustomError(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail=str(e),
+                business_error=SecurityBusinessError(
+                    status="401",
                     detail=str(e),
-                    business_error=SecurityBusinessError(
-                        status="401",
-                        detail=str(e),
-                    ),
-                ) from e
+                ),
+            ) from e
 
-            roles = self._get_roles_from_token_payload(token_payload)
+        return self._token_cache.put(
+            token,
+            payload=token_payload,
+            user=UserDTO.parse_obj(token_payload),
+            roles=frozenset(self._get_roles_from_token_payload(token_payload)),
+        )
+
+    @traced("RolesKeycloakMiddleware._get_token_from_authorization_scheme")
+    async def _get_token_from_authorization_scheme(self, request: Request) -> HTTPAuthorizationCredentials:
+        authorization: str = request.headers.get("Authorization")
+        scheme, credentials = get_authorization_scheme_param(authorization)
 
-            if not self._check_user_access_roles(roles):
+        if not (authorization and scheme and credentials):
+            if self.auto_error:
                 raise HTTPCustomError(
                     status_code=status.HTTP_403_FORBIDDEN,
-                    detail="Not enough permissions",
+                    detail="Not authenticated",
                     business_error=SecurityBusinessError(
                         status="403",
-                        detail="Not enough permissions",
+                        detail="Not authenticated",
                     ),
                 )
-
-            request.state.user = UserDTO.parse_obj(token_payload)
-
-            return token
-
-    async def _get_token_from_authorization_scheme(self, request: Request) -> HTTPAuthorizationCredentials:
-        with tracer.start_as_current_span("RolesKeycloakMiddleware._get_token_from_authorization_scheme"):
-            authorization: str = request.headers.get("Authorization")
-            scheme, credentials = get_authorization_scheme_param(authorization)
-
-            if not (authorization and scheme and credentials):
-                if self.auto_error:
-                    raise HTTPCustomError(
-                        status_code=status.HTTP_403_FORBIDDEN,
-                        detail="Not authenticated",
-                        business_error=SecurityBusinessError(
-                            status="403",
-                            detail="Not authenticated",
-                        ),
-                    )
-            if scheme.lower() != "bearer":
-                if self.auto_error:
-                    raise HTTPCustomError(
-                        status_code=status.HTTP_403_FORBIDDEN,
+        if scheme.lower() != "bearer":
+            if self.auto_error:
+                raise HTTPCustomError(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="Invalid authentication credentials",
+                    business_error=SecurityBusinessError(
+                        status="403",
                         detail="Invalid authentication credentials",
-                        business_error=SecurityBusinessError(
-                            status="403",
-                            detail="Invalid authentication credentials",
-                        ),
-                    )
+                    ),
+                )
 
-            return HTTPAuthorizationCredentials(scheme=scheme, credentials=credentials)
+        return HTTPAuthorizationCredentials(scheme=scheme, credentials=credentials)
 
-    def _receive_token_payload(self, token: str) -> dict:
+    @traced("RolesKeycloakMiddleware._receive_token_payload", level=TracingLevel.COARSE)
+    async def _receive_token_payload(self, token: str) -> dict:
         """
         Получение payload токена
 
@@ -108,15 +152,18 @@ class RolesKeycloakMiddleware(HTTPBearer):
         :return: token payload
         :raise: ExpiredSignatureError, JWTError
         """
-        with tracer.start_as_current_span("RolesKeycloakMiddleware._receive_token_payload"):
-            return jwt.decode(
-                token=token,
-                key=self._config.PUBLIC_KEY,
-                algorithms=self._config.ALGORITHMS,
-                audience=self._config.CLIENT_ID,
-                options={"verify_aud": False},
-            )
+        key_provider = self._key_provider or get_key_provider()
+        key = await key_provider.get_key(jwt.get_unverified_header(token).get("kid"))
 
+        return jwt.decode(
+            token=token,
+            key=key,
+            algorithms=self._config.ALGORITHMS,
+            audience=self._config.CLIENT_ID,
+            options={"verify_aud": False},
+        )
+
+    @traced("RolesKeycloakMiddleware._get_roles_from_token_payload")
     def _get_roles_from_token_payload(self, token_payload: dict) -> list[str]:
         """
         Получить keycloak роли пользователя из JWT payload
@@ -124,27 +171,129 @@ class RolesKeycloakMiddleware(HTTPBearer):
         :param token_payload: JWT payload
         :return: Список ролей
         """
-        with tracer.start_as_current_span("RolesKeycloakMiddleware._get_roles_from_token_payload"):
-            realm_access = token_payload.get("realm_access", {})
-            resource_access = token_payload.get("resource_access", {})
-            client_access = resource_access.get(self._config.CLIENT_ID, {})
+        realm_access = token_payload.get("realm_access", {})
+        resource_access = token_payload.get("resource_access", {})
+        client_access = resource_access.get(self._config.CLIENT_ID, {})
+
+        client_roles = client_access.get("roles", []) if client_access is not None else []
+        realm_roles = realm_access.get("roles", []) if realm_access is not None else []
 
-            client_roles = client_access.get("roles", []) if client_access is not None else []
-            realm_roles = realm_access.get("roles", []) if realm_access is not None else []
+        return client_roles + realm_roles
 
-            return client_roles + realm_roles
+    def _get_roles_mask(self, verified_token: CachedToken) -> int:
+        """
+        Битовая маска ролей пользователя. Вычисляется один раз для реестра политик и его версии и хранится вместе
+        с токеном в кэше
 
-    def _check_user_access_roles(self, roles: list[str]) -> bool:
+        :param verified_token: Проверенный токен
+        :return: Битовая маска ролей
+        """
+        key = (id(self._policies), self._policies.version)
+        roles_mask = verified_token.roles_masks.get(key)
+        if roles_mask is None:
+            roles_mask = verified_token.roles_masks[key] = self._policies.roles_mask(verified_token.roles)
+
+        return roles_mask
+
+    @traced("RolesKeycloakMiddleware._check_user_access_roles")
+    def _check_user_access_roles(self, roles_mask: int) -> bool:
         """
         Проверка доступов пользователя
 
-        :param roles: Роли пользователя
+        :param roles_mask: Битовая маска ролей пользователя
         :return: Результат проверки доступа
         """
-        with tracer.start_as_current_span("RolesKeycloakMiddleware._check_user_access_roles"):
-            return set(self._roles).issubset(set(roles))
+        return self._policy.is_satisfied(roles_mask)
+
+
+class CorrelationIdMiddleware:
+    """
+    ASGI middleware для трассировки запроса.
+
+    Идентификатор берется из заголовка X-Correlation-ID или из trace-id заголовка traceparent, иначе генерируется
+    новый. Идентификатор привязывается к structlog contextvars и возвращается в заголовке ответа.
+    """
+
+    __slots__ = ("_app", "_header_name")
+
+    def __init__(self, app: ASGIApp, header_name: str = CORRELATION_ID_HEADER) -> None:
+        self._app = app
+        self._header_name = header_name.lower().encode("latin-1")
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self._app(scope, receive, send)
+            return
+
+        correlation_id = self._get_inbound_correlation_id(scope["headers"]) or str(uuid.uuid4())
+        correlation_header = (self._header_name, correlation_id.encode("latin-1"))
+
+        clear_contextvars()
+        bind_contextvars(x_correlation_id=correlation_id)
+
+        async def send_with_correlation_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                message["headers"] = [*message.get("headers", ()), correlation_header]
+            await send(message)
+
+        await self._app(scope, receive, send_with_correlation_id)
+
+    def _get_inbound_correlation_id(self, headers: list[tuple[bytes, bytes]]) -> Optional[str]:
+        """
+        Получение идентификатора из заголовков запроса
+
+        :param headers: Заголовки запроса
+        :return: Идентификатор или None, если в запросе нет корректного идентификатора
+        """
+        traceparent = None
 
+        for name, value in headers:
+            if name == self._header_name:
+                correlation_id = value.decode("latin-1")
+                if _CORRELATION_ID_RE.match(correlation_id):
+                    return correlation_id
+            elif name == b"traceparent":
+                traceparent = value.decode("latin-1")
 
+        if traceparent is not None:
+            match = _TRACEPARENT_RE.match(traceparent)
+            if match is not None:
+                return match.group(1)
+
+        return None
+
+
+{% if cookiecutter.use_postgres == 'yes' -%}
+class DBSessionMiddleware:
+    """
+    ASGI middleware, открывающая db_session_scope на время запроса.
+
+    Транзакции фиксируются перед отправкой ответа со статусом меньше 400, иначе откатываются, поэтому ошибка
+    commit приводит к ответу 500. Запросы к сессии после начала ответа (стриминг) не фиксируются.
+    """
+
+    __slots__ = ("_app",)
+
+    def __init__(self, app: ASGIApp) -> None:
+        self._app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self._app(scope, receive, send)
+            return
+
+        async with db_session_scope() as session_scope:
+
+            async def send_after_commit(message: Message) -> None:
+                if message["type"] == "http.response.start":
+                    await session_scope.finish(commit=message["status"] < status.HTTP_400_BAD_REQUEST)
+                await send(message)
+
+            await self._app(scope, receive, send_after_commit)
+
+
+{% endif -%}
+@traced("register_middlewares", level=TracingLevel.COARSE)
 def register_middleware(app: FastAPI) -> None:
     """
     Фукнция для регистрации глобальных middlewares
@@ -152,31 +301,20 @@ def register_middleware(app: FastAPI) -> None:
     :param app: Приложение FastAPI
     :return:
     """
-    with tracer.start_as_current_span("register_middlewares"):
-        if config.SENTRY_CONFIG.DSN is not None:
-            configure_sentry(dsn=config.SENTRY_CONFIG.DSN, environment=config.SENTRY_CONFIG.STAGE)
-            app.add_middleware(SentryAsgiMiddleware)
-
-        @app.middleware("http")
-        async def add_request_id(request: Request, call_next: Callable[[Any], Coroutine]) -> Response:
-            """
-            Middleware для трассировки запроса
-
-            :param request: Endpoint mock_request
-            :param call_next: Следующий вызов
-            :return:
-            """
-            clear_contextvars()
-            bind_contextvars(x_correlation_id=str(uuid.uuid4()))
-
-            response: Response = await call_next(request)
-
-            return response
-
-        app.add_middleware(
-            CORSMiddleware,
-            allow_origins=config.CORS_CONFIG.ORIGINS,
-            allow_credentials=True,
-            allow_methods=config.CORS_CONFIG.METHODS,
-            allow_headers=config.CORS_CONFIG.HEADERS,
-        )
+    {% if cookiecutter.use_postgres == 'yes' -%}
+    app.add_middleware(DBSessionMiddleware)
+
+    {% endif -%}
+    if config.SENTRY_CONFIG.DSN is not None:
+        configure_sentry(dsn=config.SENTRY_CONFIG.DSN, environment=config.SENTRY_CONFIG.STAGE)
+        app.add_middleware(SentryAsgiMiddleware)
+
+    app.add_middleware(CorrelationIdMiddleware)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=config.CORS_CONFIG.ORIGINS,
+        allow_credentials=True,
+        allow_methods=config.CORS_CONFIG.METHODS,
+        allow_headers=config.CORS_CONFIG.HEADERS,
+    )
@@ -0,0 +1,147 @@
+from enum import Enum
+from typing import Any, Iterable, Optional
+
+from fastapi import FastAPI
+from fastapi.dependencies.models import Dependant
+from fastapi.routing import APIRoute
+
+
+class PolicyMatch(str, Enum):
+    ALL = "all"
+    ANY = "any"
+
+
+class RolePolicy:
+    """
+    Требование к ролям пользователя, скомпилированное в битовую маску
+
+    name: str: Имя политики
+    roles: tuple[str, ...]: Необходимые роли
+    match: PolicyMatch: Нужны все роли (ALL) или хотя бы одна (ANY)
+    mask: int: Битовая маска необходимых ролей
+    """
+
+    __slots__ = ("name", "roles", "match", "mask")
+
+    def __init__(self, name: str, roles: tuple[str, ...], match: PolicyMatch, mask: int) -> None:
+        self.name = name
+        self.roles = roles
+        self.match = match
+        self.mask = mask
+
+    def is_satisfied(self, roles_mask: int) -> bool:
+        """
+        Проверка ролей пользователя
+
+        :param roles_mask: Битовая маска ролей пользователя
+        :return: Результат проверки доступа
+        """
+        if self.match is PolicyMatch.ALL:
+            return roles_mask & self.mask == self.mask
+        return not self.mask or roles_mask & self.mask != 0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {"name": self.name, "roles": list(self.roles), "match": self.match.value}
+
+
+class RolePolicyRegistry:
+    """
+    Реестр политик доступа. Каждая роль, упомянутая в политиках, получает свой бит, поэтому проверка доступа
+    сводится к одной операции AND над масками.
+
+    Роли токена, не упомянутые ни в одной политике, в маску не попадают. Маска зависит от набора
+    зарегистрированных ролей, поэтому ее кэш хранится по реестру и `version`.
+    """
+
+    __slots__ = ("_bits", "_policies")
+
+    def __init__(self) -> None:
+        self._bits: dict[str, int] = {}
+        self._policies: dict[str, RolePolicy] = {}
+
+    @property
+    def version(self) -> int:
+        return len(self._bits)
+
+    def register(
+        self, roles: Iterable[str], match: PolicyMatch = PolicyMatch.ALL, name: Optional[str] = None
+    ) -> RolePolicy:
+        """
+        Регистрация политики. Одинаковые требования переиспользуют одну политику
+
+        :param roles: Необходимые роли
+        :param match: Режим проверки ролей
+        :param name: Имя политики, по умолчанию строится из режима и ролей
+        :return: Скомпилированная политика
+        """
+        roles = tuple(sorted(set(roles)))
+        name = name or f"{match.value}:{','.join(roles)}"
+
+        policy = self._policies.get(name)
+        if policy is not None:
+            if policy.roles != roles or policy.match != match:
+                raise ValueError(f"Role policy {name!r} is already registered with other requirements")
+            return policy
+
+        mask = 0
+        for role in roles:
+            mask |= self._intern(role)
+
+        policy = RolePolicy(name=name, roles=roles, match=match, mask=mask)
+        self._policies[name] = policy
+        return policy
+
+    def roles_mask(self, roles: Iterable[str]) -> int:
+        """
+        Перевод ролей пользователя в битовую маску
+
+        :param roles: Роли пользователя
+        :return: Битовая маска ролей
+        """
+        mask = 0
+        for role in roles:
+            mask |= self._bits.get(role, 0)
+        return mask
+
+    def policies(self) -> list[RolePolicy]:
+        return list(self._policies.values())
+
+    def _intern(self, role: str) -> int:
+        bit = self._bits.get(role)
+        if bit is None:
+            bit = self._bits[role] = 1 << len(self._bits)
+        return bit
+
+
+def describe_route_policies(app: FastAPI) -> list[dict[str, Any]]:
+    """
+    Отчет о политиках доступа всех маршрутов приложения для аудита
+
+    :param app: Приложение FastAPI
+    :return: Список маршрутов с их политиками
+    """
+    report = []
+
+    for route in app.routes:
+        if not isinstance(route, APIRoute):
+            continue
+
+        policies = [policy.as_dict() for policy in _collect_policies(route.dependant)]
+        report.append({"path": route.path, "methods": sorted(route.methods), "policies": policies})
+
+    return report
+
+
+def _collect_policies(dependant: Dependant) -> list[RolePolicy]:
+    policies = []
+
+    for dependency in dependant.dependencies:
+        policy = getattr(dependency.call, "policy", None)
+        if isinstance(policy, RolePolicy):
+            policies.append(policy)
+        policies.extend(_collect_policies(dependency))
+
+    return policies
+
+
+role_policies = RolePolicyRegistry()
@@ -0,0 +1,152 @@
+from contextlib import aclosing
+from enum import Enum
+from typing import Any, AsyncGenerator, AsyncIterator, Callable, Mapping, Optional
+
+import orjson
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse, StreamingResponse
+from pydantic import BaseModel
+from pydantic.json import pydantic_encoder
+from starlette.background import BackgroundTask
+
+_ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME
+_ROOT_KEY = "__root__"
+
+
+class _ModelEncoder:
+    """
+    Кодирование экземпляров одного класса модели в словарь с алиасами в качестве ключей.
+
+    Словарь строится без обхода вложенных значений: вложенные модели orjson передает обратно в default.
+    """
+
+    __slots__ = ("_aliases", "_is_root")
+
+    def __init__(self, model_class: type[BaseModel]) -> None:
+        self._aliases = {name: field.alias for name, field in model_class.__fields__.items()}
+        self._is_root = model_class.__custom_root_type__
+
+    def __call__(self, model: BaseModel) -> Any:
+        if self._is_root:
+            return model.__dict__[_ROOT_KEY]
+        aliases = self._aliases
+        return {aliases.get(name, name): value for name, value in model.__dict__.items()}
+
+
+def _legacy_model_encoder(model: BaseModel) -> Any:
+    return jsonable_encoder(model)
+
+
+_model_encoders: dict[type, Callable[[BaseModel], Any]] = {}
+
+
+def _get_model_encoder(model_class: type[BaseModel]) -> Callable[[BaseModel], Any]:
+    encoder = _model_encoders.get(model_class)
+    if encoder is None:
+        # Модели с json_encoders и исключаемыми полями кодируются как раньше через jsonable_encoder
+        if model_class.__config__.json_encoders or model_class.__exclude_fields__ or model_class.__include_fields__:
+            encoder = _legacy_model_encoder
+        else:
+            encoder = _ModelEncoder(model_class)
+        _model_encoders[model_class] = encoder
+    return encoder
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, BaseModel):
+        return _get_model_encoder(type(obj))(obj)
+    return pydantic_encoder(obj)
+
+
+def dumps_model(content: Any) -> bytes:
+    """
+    Сериализация pydantic моделей в JSON с алиасами полей без промежуточного jsonable_encoder.
+    Результат совпадает с jsonable_encoder + ORJSONResponse при параметрах response_model по умолчанию
+
+    :param content: Модель, список моделей или любое значение, поддерживаемое jsonable_encoder
+    :return: JSON
+    """
+    return orjson.dumps(content, default=_default, option=_ORJSON_OPTIONS)
+
+
+class CamelCaseModelResponse(ORJSONResponse):
+    """
+    Ответ, сериализующий BaseCamelCaseModel и CustomModel напрямую в orjson.
+
+    FastAPI не валидирует и не кодирует возвращенный экземпляр Response, поэтому для больших ответов
+    модель нужно возвращать обернутой: `return CamelCaseModelResponse(result)`.
+    response_model_exclude_* и response_model_include не применяются.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return dumps_model(content)
+
+
+class StreamFormat(str, Enum):
+    NDJSON = "ndjson"
+    JSON = "json"
+
+
+_STREAM_MEDIA_TYPES = {
+    StreamFormat.NDJSON: "application/x-ndjson",
+    StreamFormat.JSON: "application/json",
+}
+
+
+class ModelStreamingResponse(StreamingResponse):
+    """
+    Потоковый ответ из асинхронного итератора моделей, например IStreamingQueryHandler.stream(query).
+
+    Модели кодируются по одной как в dumps_model и отправляются пачками не меньше `buffer_size` байт в формате
+    NDJSON (по модели на строку) или JSON массива. Следующие элементы запрашиваются у итератора только после
+    отправки пачки, поэтому медленный клиент замедляет чтение из базы, а память не зависит от размера ответа.
+
+    Статус и заголовки отправляются до первого элемента: ошибка во время выгрузки обрывает соединение,
+    и клиент получает неполный ответ.
+    """
+
+    def __init__(
+            self,
+            content: AsyncGenerator[Any, None],
+            stream_format: StreamFormat = StreamFormat.NDJSON,
+            buffer_size: int = 64 * 1024,
+            status_code: int = 200,
+            headers: Optional[Mapping[str, str]] = None,
+            background: Optional[BackgroundTask] = None,
+    ) -> None:
+        super().__init__(
+            _encode_stream(content, stream_format, buffer_size),
+            status_code=status_code,
+            headers=headers,
+            media_type=_STREAM_MEDIA_TYPES[stream_format],
+            background=background,
+        )
+
+
+async def _encode_stream(
+        items: AsyncGenerator[Any, None], stream_format: StreamFormat, buffer_size: int
+) -> AsyncIterator[bytes]:
+    is_ndjson = stream_format is StreamFormat.NDJSON
+    buffer = bytearray() if is_ndjson else bytearray(b"[")
+    is_first = True
+
+    # Итератор закрывается и при отключении клиента, освобождая курсор базы
+    async with aclosing(items):
+        async for item in items:
+            if is_ndjson:
+                buffer += dumps_model(item)
+                buffer += b"\n"
+            else:
+                if not is_first:
+                    buffer += b","
+                buffer += dumps_model(item)
+                is_first = False
+
+            if len(buffer) >= buffer_size:
+                yield bytes(buffer)
+                buffer.clear()
+
+    if not is_ndjson:
+        buffer += b"]"
+    if buffer:
+        yield bytes(buffer)
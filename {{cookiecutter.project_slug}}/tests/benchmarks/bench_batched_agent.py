@@ -0,0 +1,51 @@
+"""
+Пропускная способность обработки сообщений пачками разного размера на партиции в памяти.
+Обработчик имитирует обращение к базе: фиксированная задержка вызова (round trip и commit) и время на сообщение
+
+Запуск: PYTHONPATH=app python -m tests.benchmarks.bench_batched_agent
+"""
+import asyncio
+import time
+from typing import Sequence
+
+from tests.utils.fake_kafka import MemoryTopic
+
+from infrastructure.kafka.batching import BatchProcessor, consume_batches
+
+MESSAGES = 20_000
+BATCH_SIZES = (1, 10, 100, 500, 1000)
+CALL_LATENCY = 0.001
+MESSAGE_COST = 0.000_005
+
+
+async def _bulk_handler(batch: Sequence[dict]) -> None:
+    await asyncio.sleep(CALL_LATENCY + MESSAGE_COST * len(batch))
+
+
+async def _measure(batch_size: int, messages: int) -> float:
+    topic = MemoryTopic({"id": index, "count": index % 10, "description": "testing"} for index in range(messages))
+    topic.close()
+    processor = BatchProcessor(_bulk_handler)
+
+    start = time.perf_counter()
+    async for _ in consume_batches(topic.events(), topic.ack, processor, max_size=batch_size, max_wait=0.1):
+        ...
+    elapsed = time.perf_counter() - start
+
+    assert len(topic.acked) == messages
+    return messages / elapsed
+
+
+async def main() -> None:
+    print(f"{MESSAGES} messages, handler latency {CALL_LATENCY * 1000:.1f} ms per call")
+    baseline = None
+    for batch_size in BATCH_SIZES:
+        # Без пачек обработка медленная, поэтому сообщений меньше
+        messages = MESSAGES if batch_size > 1 else MESSAGES // 10
+        rate = await _measure(batch_size, messages)
+        baseline = baseline or rate
+        print(f"batch {batch_size:>5}  {rate:>10.0f} msg/s (x{rate / baseline:.1f})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
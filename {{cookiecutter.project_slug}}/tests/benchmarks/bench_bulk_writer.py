@@ -0,0 +1,96 @@
+"""
+Вставка строк на локальном Postgres: ORM add_all + commit и BulkWriter.copy/upsert в транзакции сессии.
+Таблица bench_bulk_items создается перед замером и удаляется после него
+
+Запуск (база из POSTGRES_* переменных окружения):
+PYTHONPATH=app python -m tests.benchmarks.bench_bulk_writer
+"""
+import asyncio
+import datetime
+import time
+from typing import Awaitable, Callable
+
+from sqlalchemy import Column, DateTime, Integer, String, text
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import declarative_base, sessionmaker
+
+from infrastructure.config import config
+from infrastructure.db.bulk import BulkWriter
+
+SIZES = (10_000, 100_000, 1_000_000)
+
+Base = declarative_base()
+
+
+class BenchItem(Base):
+    __tablename__ = "bench_bulk_items"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, nullable=False)
+    score = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), nullable=False)
+
+
+def _rows(size: int, offset: int = 0) -> list[tuple]:
+    now = datetime.datetime.now(tz=datetime.timezone.utc)
+    return [(index, f"item-{index}", index % 1000, now) for index in range(offset, offset + size)]
+
+
+async def _insert_orm(session: AsyncSession, rows: list[tuple]) -> None:
+    session.add_all(
+        BenchItem(id=id_, name=name, score=score, created_at=created_at) for id_, name, score, created_at in rows
+    )
+    await session.commit()
+
+
+async def _copy(session: AsyncSession, rows: list[tuple]) -> None:
+    await BulkWriter(session, batch_size=config.POSTGRES_CONFIG.BULK_BATCH_SIZE).copy(BenchItem, rows)
+    await session.commit()
+
+
+async def _upsert(session: AsyncSession, rows: list[tuple]) -> None:
+    await BulkWriter(session, batch_size=config.POSTGRES_CONFIG.BULK_BATCH_SIZE).upsert(
+        BenchItem, rows, conflict_columns=["id"]
+    )
+    await session.commit()
+
+
+async def main() -> None:
+    engine = create_async_engine(config.POSTGRES_CONFIG.URI)
+    session_factory = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
+
+    async def measure(write: Callable[[AsyncSession, list[tuple]], Awaitable[None]], rows: list[tuple]) -> float:
+        async with session_factory() as session:
+            start = time.perf_counter()
+            await write(session, rows)
+            return time.perf_counter() - start
+
+    async with engine.begin() as connection:
+        await connection.run_sync(Base.metadata.create_all)
+
+    try:
+        for size in SIZES:
+            rows = _rows(size)
+            timings = {}
+            for name, write in (("ORM add_all", _insert_orm), ("COPY", _copy)):
+                async with engine.begin() as connection:
+                    await connection.execute(text(f"TRUNCATE {BenchItem.__tablename__}"))
+                timings[name] = await measure(write, rows)
+
+            # Половина строк обновляется, половина вставляется
+            timings["COPY upsert"] = await measure(_upsert, _rows(size, offset=size // 2))
+
+            orm = timings["ORM add_all"]
+            print(
+                f"{size:>8} rows  " + "  ".join(
+                    f"{name} {seconds:8.2f} s (x{orm / seconds:.1f})" for name, seconds in timings.items()
+                )
+            )
+    finally:
+        async with engine.begin() as connection:
+            await connection.run_sync(Base.metadata.drop_all)
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+"""
+Пропускная способность пустого эндпоинта с BaseHTTPMiddleware (@app.middleware("http")) и с
+ASGI CorrelationIdMiddleware
+
+Запуск: PYTHONPATH=app python -m tests.benchmarks.bench_correlation_middleware
+"""
+import asyncio
+import time
+import uuid
+
+from fastapi import FastAPI, Request
+from fastapi.responses import ORJSONResponse
+from structlog.contextvars import bind_contextvars, clear_contextvars
+
+from web.middlewares import CorrelationIdMiddleware
+
+REQUESTS = 20_000
+
+
+def _create_base_http_app() -> FastAPI:
+    app = FastAPI(default_response_class=ORJSONResponse)
+
+    @app.middleware("http")
+    async def add_request_id(request: Request, call_next):
+        clear_contextvars()
+        bind_contextvars(x_correlation_id=str(uuid.uuid4()))
+        return await call_next(request)
+
+    @app.get("/empty")
+    async def empty():
+        return None
+
+    return app
+
+
+def _create_asgi_app() -> FastAPI:
+    app = FastAPI(default_response_class=ORJSONResponse)
+    app.add_middleware(CorrelationIdMiddleware)
+
+    @app.get("/empty")
+    async def empty():
+        return None
+
+    return app
+
+
+async def _run(app: FastAPI) -> float:
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/empty",
+        "raw_path": b"/empty",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"host", b"test")],
+        "client": ("127.0.0.1", 1),
+        "server": ("test", 80),
+    }
+
+    async def send(_):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(REQUESTS):
+        await app(dict(scope), _receiver(), send)
+    return REQUESTS / (time.perf_counter() - start)
+
+
+def _receiver():
+    disconnected = asyncio.Event()
+    messages = [{"type": "http.request", "body": b"", "more_body": False}]
+
+    async def receive():
+        if messages:
+            return messages.pop()
+        # Клиент не отключается до конца ответа
+        await disconnected.wait()
+
+    return receive
+
+
+async def main() -> None:
+    for name, app in (("BaseHTTPMiddleware", _create_base_http_app()), ("ASGI", _create_asgi_app())):
+        await _run(app)
+        print(f"{name:<20} {await _run(app):10.0f} req/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
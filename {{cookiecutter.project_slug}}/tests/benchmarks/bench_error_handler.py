@@ -0,0 +1,47 @@
+"""
+Сериализация BaseBusinessError в тело ответа: camelize + ORJSONResponse на каждый вызов и предвычисленный
+сериализатор класса ошибки
+
+Запуск: PYTHONPATH=app python -m tests.benchmarks.bench_error_handler
+"""
+import timeit
+from enum import Enum
+from itertools import starmap
+
+from fastapi.responses import ORJSONResponse
+from humps import camelize
+
+from core.errors import SecurityBusinessError, ValidationBusinessError
+from web.error_serializer import business_error_response
+
+NUMBER = 50_000
+
+
+def _legacy_response(status_code: int, exc) -> ORJSONResponse:
+    content = dict(
+        starmap(
+            lambda key, value: (camelize(key), value.value if isinstance(value, Enum) else value),
+            exc.as_dict().items(),
+        )
+    )
+    return ORJSONResponse(status_code=status_code, content=content)
+
+
+def main() -> None:
+    errors = (
+        ("security", 403, lambda: SecurityBusinessError(status="403", detail="Not enough permissions")),
+        (
+            "validation",
+            422,
+            lambda: ValidationBusinessError(status="422", detail="invalid", data={"errors": [{"loc": ["body"]}]}),
+        ),
+    )
+
+    for name, status_code, factory in errors:
+        legacy = timeit.timeit(lambda: _legacy_response(status_code, factory()), number=NUMBER) / NUMBER
+        current = timeit.timeit(lambda: business_error_response(status_code, factory()), number=NUMBER) / NUMBER
+        print(f"{name:<12} legacy {legacy * 1_000_000:8.2f} us  precomputed {current * 1_000_000:8.2f} us")
+
+
+if __name__ == "__main__":
+    main()
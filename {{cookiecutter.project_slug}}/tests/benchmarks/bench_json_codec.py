@@ -0,0 +1,126 @@
+"""
+Скорость чтения и записи сообщений FaustJsonSerializer и FastJsonCodec в разных режимах проверки.
+Сообщение - заказ с вложенными объектами и списком позиций, схема с обязательными полями и ограничениями
+
+Запуск: PYTHONPATH=app python -m tests.benchmarks.bench_json_codec
+"""
+import time
+from typing import Any, Callable
+
+from schema_registry.serializers.faust import FaustJsonSerializer
+from tests.utils.fake_schema_registry import FakeSchemaRegistry
+
+from infrastructure.kafka.codec import FastJsonCodec, ValidationMode
+from infrastructure.kafka.schema_store import SchemaStore
+
+MESSAGES = 20_000
+# FaustJsonSerializer проверяет саму схему для каждого сообщения, поэтому для него сообщений меньше
+BASELINE_MESSAGES = 300
+SUBJECT = "orders-value"
+ADDRESS_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "city": {"type": "string"},
+        "street": {"type": "string"},
+        "zip": {"type": "string", "pattern": "^[0-9]{6}$"},
+    },
+    "required": ["city", "street", "zip"],
+}
+ORDER_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "id": {"type": "integer", "minimum": 1},
+        "status": {"type": "string", "enum": ["new", "paid", "shipped", "cancelled"]},
+        "created_at": {"type": "string"},
+        "customer": {
+            "type": "object",
+            "properties": {
+                "id": {"type": "integer"},
+                "name": {"type": "string"},
+                "email": {"type": "string"},
+                "address": ADDRESS_SCHEMA,
+            },
+            "required": ["id", "name", "address"],
+        },
+        "items": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "sku": {"type": "string"},
+                    "title": {"type": "string"},
+                    "quantity": {"type": "integer", "minimum": 1},
+                    "price": {"type": "number", "minimum": 0},
+                },
+                "required": ["sku", "quantity", "price"],
+            },
+        },
+        "total": {"type": "number"},
+        "comment": {"type": ["string", "null"]},
+    },
+    "required": ["id", "status", "customer", "items", "total"],
+}
+
+
+def _order(index: int) -> dict[str, Any]:
+    items = [
+        {"sku": f"SKU-{index}-{item}", "title": f"Товар {item}", "quantity": item + 1, "price": 99.9 + item}
+        for item in range(8)
+    ]
+    return {
+        "id": index + 1,
+        "status": "paid",
+        "created_at": "2022-10-18T12:00:00+03:00",
+        "customer": {
+            "id": index % 1000,
+            "name": "Иван Иванов",
+            "email": "ivan@example.com",
+            "address": {"city": "Москва", "street": "Тверская, 1", "zip": "125009"},
+        },
+        "items": items,
+        "total": sum(item["price"] * item["quantity"] for item in items),
+        "comment": None,
+    }
+
+
+def _measure(operation: Callable[[Any], Any], values: list) -> float:
+    start = time.perf_counter()
+    for value in values:
+        operation(value)
+    return len(values) / (time.perf_counter() - start)
+
+
+def main() -> None:
+    registry = FakeSchemaRegistry()
+    schema_id = registry.add(SUBJECT, ORDER_SCHEMA)
+    store = SchemaStore(registry.client())
+    schema = store.get_by_id(schema_id)
+
+    orders = [_order(index) for index in range(MESSAGES)]
+    serializers = {
+        "FaustJsonSerializer": FaustJsonSerializer(store, SUBJECT, schema),
+        "FastJsonCodec always": FastJsonCodec(store, SUBJECT, schema, validation=ValidationMode.ALWAYS),
+        "FastJsonCodec sampled 1%": FastJsonCodec(
+            store, SUBJECT, schema, validation=ValidationMode.SAMPLED, sample_percent=1.0
+        ),
+        "FastJsonCodec off": FastJsonCodec(store, SUBJECT, schema, validation=ValidationMode.OFF),
+    }
+    messages = [serializers["FastJsonCodec off"].dumps(order) for order in orders]
+    print(f"{MESSAGES} messages, {len(messages[0])} bytes each")
+
+    baseline = None
+    for name, serializer in serializers.items():
+        # Прогрев: регистрация схемы и компиляция проверки
+        serializer.loads(serializer.dumps(orders[0]))
+        count = MESSAGES if isinstance(serializer, FastJsonCodec) else BASELINE_MESSAGES
+        decode_rate = _measure(serializer.loads, messages[:count])
+        encode_rate = _measure(serializer.dumps, orders[:count])
+        baseline = baseline or (decode_rate, encode_rate)
+        print(
+            f"{name:<26} decode {decode_rate:>9.0f} msg/s (x{decode_rate / baseline[0]:.1f})"
+            f"  encode {encode_rate:>9.0f} msg/s (x{encode_rate / baseline[1]:.1f})"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Пропускная способность обработки партиции с разным количеством одновременно обрабатываемых сообщений.
+Обработчик имитирует HTTP вызов с фиксированной задержкой, сообщения распределены по KEYS ключам
+
+Запуск: PYTHONPATH=app python -m tests.benchmarks.bench_key_ordered
+"""
+import asyncio
+import time
+
+from tests.utils.fake_kafka import MemoryTopic
+
+from infrastructure.kafka.ordering import consume_key_ordered
+
+MESSAGES = 2_000
+KEYS = 100
+MAX_IN_FLIGHT = (1, 10, 50, 200)
+CALL_LATENCY = 0.005
+
+
+async def _handler(message: dict) -> None:
+    await asyncio.sleep(CALL_LATENCY)
+
+
+async def _measure(max_in_flight: int, messages: int) -> float:
+    topic = MemoryTopic({"id": index, "key": index % KEYS} for index in range(messages))
+    topic.close()
+
+    start = time.perf_counter()
+    async for _ in consume_key_ordered(
+        topic.events(), topic.ack, _handler, max_in_flight, key=lambda message, offset: message["key"]
+    ):
+        ...
+    elapsed = time.perf_counter() - start
+
+    assert len(topic.acked) == messages
+    return messages / elapsed
+
+
+async def main() -> None:
+    print(f"{MESSAGES} messages, {KEYS} keys, handler latency {CALL_LATENCY * 1000:.1f} ms")
+    baseline = None
+    for max_in_flight in MAX_IN_FLIGHT:
+        # Последовательная обработка медленная, поэтому сообщений меньше
+        messages = MESSAGES if max_in_flight > 1 else MESSAGES // 10
+        rate = await _measure(max_in_flight, messages)
+        baseline = baseline or rate
+        print(f"in flight {max_in_flight:>4}  {rate:>8.0f} msg/s (x{rate / baseline:.1f})")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+"""
+Страница на глубине выборки: LIMIT/OFFSET и KeysetPaginator на локальном Postgres.
+Таблица из ROWS записей создается во временной схеме соединения и удаляется после замера
+
+Запуск (база из POSTGRES_* переменных окружения):
+PYTHONPATH=app python -m tests.benchmarks.bench_keyset_pagination
+"""
+import asyncio
+import time
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, Table, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+
+from core.usecases.pagination import Cursor, CursorCodec
+from infrastructure.config import config
+from infrastructure.db.pagination import KeysetPaginator
+
+ROWS = 1_000_000
+PAGE_SIZE = 50
+DEPTHS = (0, 1_000, 10_000, 100_000, 500_000, 990_000)
+REPEAT = 20
+
+metadata = MetaData()
+items = Table(
+    "bench_keyset_items",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("created_at", DateTime(timezone=True), nullable=False),
+    Column("score", Integer, nullable=False),
+    prefixes=["TEMPORARY"],
+)
+ORDER_BY = (items.c.created_at.desc(), items.c.id.desc())
+
+
+async def _seed(connection: AsyncConnection) -> None:
+    await connection.run_sync(metadata.create_all)
+    await connection.execute(
+        text(
+            f"INSERT INTO {items.name} (id, created_at, score) "
+            "SELECT i, now() - i * interval '1 second', i % 1000 FROM generate_series(1, :rows) AS i"
+        ),
+        {"rows": ROWS},
+    )
+    await connection.execute(text(f"CREATE INDEX ON {items.name} (created_at DESC, id DESC)"))
+    await connection.execute(text(f"ANALYZE {items.name}"))
+
+
+async def _measure(connection: AsyncConnection, statement) -> float:
+    await connection.execute(statement)
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        (await connection.execute(statement)).all()
+    return (time.perf_counter() - start) / REPEAT
+
+
+async def main() -> None:
+    engine = create_async_engine(config.POSTGRES_CONFIG.URI)
+    paginator = KeysetPaginator(ORDER_BY, CursorCodec("bench"))
+
+    async with engine.connect() as connection:
+        await _seed(connection)
+
+        for depth in DEPTHS:
+            offset_statement = select(items).order_by(*ORDER_BY).offset(depth).limit(PAGE_SIZE)
+
+            # Курсор указывает на запись перед страницей, как если бы клиент дошел до нее по next_cursor
+            cursor = None
+            if depth:
+                boundary = (await connection.execute(
+                    select(items.c.created_at, items.c.id).order_by(*ORDER_BY).offset(depth - 1).limit(1)
+                )).one()
+                cursor = Cursor(tuple(boundary))
+            keyset_statement = paginator.apply(select(items), cursor, PAGE_SIZE)
+
+            offset_rows = (await connection.execute(offset_statement)).all()
+            keyset_rows = (await connection.execute(keyset_statement)).all()[:PAGE_SIZE]
+            assert offset_rows == keyset_rows
+
+            offset_time = await _measure(connection, offset_statement)
+            keyset_time = await _measure(connection, keyset_statement)
+            print(
+                f"depth {depth:>7}  OFFSET {offset_time * 1000:9.2f} ms  "
+                f"keyset {keyset_time * 1000:9.2f} ms  x{offset_time / keyset_time:.1f}"
+            )
+
+        await connection.rollback()
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,64 @@
+"""
+Сериализация больших PaginationResult: jsonable_encoder + ORJSONResponse (путь FastAPI для response_model)
+и CamelCaseModelResponse
+
+Запуск: PYTHONPATH=app python -m tests.benchmarks.bench_model_response
+"""
+import datetime
+import timeit
+import uuid
+from decimal import Decimal
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
+
+from core.usecases.base import BaseResult
+from core.usecases.pagination import PageInfo, PaginationResult
+from web.responses import CamelCaseModelResponse
+
+SIZES = (100, 1_000, 10_000)
+
+
+class ItemResult(BaseResult):
+    item_id: uuid.UUID
+    item_name: str
+    created_at: datetime.datetime
+    unit_price: Decimal
+    is_active: bool
+    tag_names: list[str]
+
+
+def _create_payload(size: int) -> PaginationResult[ItemResult]:
+    now = datetime.datetime.now(tz=datetime.timezone.utc)
+    items = [
+        ItemResult(
+            item_id=uuid.uuid4(),
+            item_name=f"item-{index}",
+            created_at=now,
+            unit_price=Decimal("10.50"),
+            is_active=index % 2 == 0,
+            tag_names=["first", "second"],
+        )
+        for index in range(size)
+    ]
+    return PaginationResult[ItemResult](
+        items=items, total_count=size, page=PageInfo(page_number=1, page_size=size)
+    )
+
+
+def main() -> None:
+    for size in SIZES:
+        payload = _create_payload(size)
+        assert CamelCaseModelResponse(payload).body == ORJSONResponse(jsonable_encoder(payload)).body
+
+        number = max(1, 10_000 // size)
+        legacy = timeit.timeit(lambda: ORJSONResponse(jsonable_encoder(payload)), number=number) / number
+        current = timeit.timeit(lambda: CamelCaseModelResponse(payload), number=number) / number
+        print(
+            f"{size:>6} items  jsonable_encoder {legacy * 1000:9.2f} ms  "
+            f"CamelCaseModelResponse {current * 1000:9.2f} ms  x{legacy / current:.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
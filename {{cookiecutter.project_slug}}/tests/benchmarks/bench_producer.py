@@ -0,0 +1,82 @@
+"""
+Скорость отправки KafkaProducerService.send_many на локальный брокер (docker-compose) при разных задержке сбора
+пачки и сжатии. Сообщения - JSON около 1 КБ, все сообщения отправляются конвейером, время замеряется до
+подтверждения последнего сообщения. Сжатие без установленной библиотеки (lz4, zstandard) пропускается
+
+Запуск (брокер из KAFKA_BOOTSTRAP_SERVERS):
+PYTHONPATH=app python -m tests.benchmarks.bench_producer
+"""
+import asyncio
+import time
+import uuid
+from typing import Optional
+
+import orjson
+from aiokafka import codec
+from faust import App
+
+from infrastructure.config import config
+from infrastructure.kafka.producer import KafkaProducerService, ProducerRecord
+
+MESSAGES = 50_000
+BATCH_SIZE = 131_072
+SETTINGS = (
+    (0, None),
+    (5, None),
+    (20, None),
+    (5, "gzip"),
+    (5, "lz4"),
+    (5, "zstd"),
+)
+_AVAILABLE_COMPRESSION = {None: True, "gzip": codec.has_gzip(), "lz4": codec.has_lz4(), "zstd": codec.has_zstd()}
+
+
+def _record(index: int) -> ProducerRecord:
+    value = {
+        "id": index,
+        "status": "paid",
+        "customer": {"id": index % 1000, "name": "Иван Иванов", "email": "ivan@example.com"},
+        "items": [{"sku": f"SKU-{item}", "quantity": item + 1, "price": 99.9 + item} for item in range(8)],
+    }
+    return ProducerRecord(orjson.dumps(value), key=str(index % 100).encode())
+
+
+async def _measure(topic_name: str, linger_ms: int, compression: Optional[str]) -> float:
+    app = App(
+        f"bench_producer_{uuid.uuid4().hex}",
+        broker=f"kafka://{config.KAFKA_CONFIG.BOOTSTRAP_SERVERS}",
+        producer_linger=linger_ms / 1000,
+        producer_max_batch_size=BATCH_SIZE,
+        producer_compression_type=compression,
+        producer_acks=config.KAFKA_CONFIG.PRODUCER_ACKS,
+    )
+    app.producer_only = True
+    producer = KafkaProducerService(app, max_in_flight=config.KAFKA_CONFIG.PRODUCER_MAX_IN_FLIGHT)
+    topic = app.topic(topic_name, key_serializer="raw", value_serializer="raw")
+    await app.maybe_start_producer()
+    try:
+        # Прогрев: метаданные топика и соединение с брокером
+        await asyncio.gather(*await producer.send_many(topic, [_record(0)]))
+
+        start = time.perf_counter()
+        futures = await producer.send_many(topic, (_record(index) for index in range(MESSAGES)))
+        await asyncio.gather(*futures)
+        return MESSAGES / (time.perf_counter() - start)
+    finally:
+        await app.producer.stop()
+
+
+async def main() -> None:
+    topic_name = f"bench_producer_{uuid.uuid4().hex[:8]}"
+    print(f"{MESSAGES} messages to {topic_name}, batch {BATCH_SIZE} bytes, acks {config.KAFKA_CONFIG.PRODUCER_ACKS}")
+    for linger_ms, compression in SETTINGS:
+        name = f"linger {linger_ms:>3} ms  {compression or 'none':<5}"
+        if not _AVAILABLE_COMPRESSION[compression]:
+            print(f"{name}  skipped: compression library is not installed")
+            continue
+        rate = await _measure(topic_name, linger_ms, compression)
+        print(f"{name}  {rate:>9.0f} msg/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+"""
+Сравнение полной RS256 проверки токена с чтением из TokenCache
+
+Запуск: PYTHONPATH=app python -m tests.benchmarks.bench_token_cache
+"""
+import time
+import timeit
+import uuid
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwt
+
+from core.dto.auth import UserDTO
+from infrastructure.auth.token_cache import TokenCache
+
+NUMBER = 2_000
+
+
+def _generate_keys() -> tuple[str, str]:
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_pem = private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    )
+    public_pem = private_key.public_key().public_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+    return private_pem.decode(), public_pem.decode()
+
+
+def _roles(payload: dict) -> frozenset[str]:
+    client_roles = payload.get("resource_access", {}).get("client", {}).get("roles", [])
+    realm_roles = payload.get("realm_access", {}).get("roles", [])
+    return frozenset(client_roles + realm_roles)
+
+
+def main() -> None:
+    private_key, public_key = _generate_keys()
+    payload = {
+        "sub": str(uuid.uuid4()),
+        "email_verified": True,
+        "exp": int(time.time()) + 3600,
+        "realm_access": {"roles": ["user", "offline_access"]},
+        "resource_access": {"client": {"roles": ["admin"]}},
+    }
+    token = jwt.encode(payload, private_key, algorithm="RS256")
+    cache = TokenCache(max_size=1024)
+
+    def decode() -> None:
+        token_payload = jwt.decode(token, public_key, algorithms=["RS256"], options={"verify_aud": False})
+        UserDTO.parse_obj(token_payload)
+        _roles(token_payload)
+
+    def cached() -> None:
+        if cache.get(token) is None:
+            token_payload = jwt.decode(token, public_key, algorithms=["RS256"], options={"verify_aud": False})
+            cache.put(token, payload=token_payload, user=UserDTO.parse_obj(token_payload), roles=_roles(token_payload))
+
+    for name, func in (("jwt.decode", decode), ("TokenCache", cached)):
+        total = timeit.timeit(func, number=NUMBER)
+        print(f"{name:<12} {total / NUMBER * 1_000_000:10.2f} us/call")
+
+    print(f"cache stats: {cache.stats.as_dict()}")
+
+
+if __name__ == "__main__":
+    main()
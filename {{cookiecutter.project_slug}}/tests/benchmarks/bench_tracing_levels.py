@@ -0,0 +1,56 @@
+"""
+Накладные расходы трассировки на запрос при разных уровнях TRACING_LEVEL
+
+Запрос моделируется одним COARSE спаном (обработчик) и четырьмя FINE спанами (вспомогательные функции),
+как у защищенного эндпоинта с RolesKeycloakMiddleware.
+
+Запуск: PYTHONPATH=app python -m tests.benchmarks.bench_tracing_levels
+"""
+import timeit
+
+from opentelemetry import trace
+from opentelemetry.sdk.trace import TracerProvider
+
+from infrastructure.instrumentation import TracingLevel, configure_instrumentation, traced
+
+NUMBER = 50_000
+
+
+def _helper(value: int) -> int:
+    return value + 1
+
+
+@traced(level=TracingLevel.FINE)
+def _fine_helper(value: int) -> int:
+    return value + 1
+
+
+def _plain_request() -> int:
+    value = 0
+    for _ in range(4):
+        value = _helper(value)
+    return value
+
+
+@traced(level=TracingLevel.COARSE)
+def _traced_request() -> int:
+    value = 0
+    for _ in range(4):
+        value = _fine_helper(value)
+    return value
+
+
+def main() -> None:
+    trace.set_tracer_provider(TracerProvider())
+
+    baseline = timeit.timeit(_plain_request, number=NUMBER) / NUMBER
+    print(f"{'plain call':<10} {baseline * 1_000_000:8.2f} us/request")
+
+    for level in TracingLevel:
+        configure_instrumentation(level)
+        total = timeit.timeit(_traced_request, number=NUMBER) / NUMBER
+        print(f"{level.value:<10} {total * 1_000_000:8.2f} us/request (+{(total - baseline) * 1_000_000:.2f} us)")
+
+
+if __name__ == "__main__":
+    main()
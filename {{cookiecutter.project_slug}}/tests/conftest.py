@@ -1,3 +1,7 @@
+import asyncio
+from inspect import isawaitable
+from typing import Any, Callable
+
 import pytest
 from httpx import AsyncClient
 
@@ -14,12 +18,21 @@ def anyio_backend(request):
     return request.param
 
 
+async def _call_resources_method(method: Callable[[], Any]) -> None:
+    # Асинхронные ресурсы возвращают awaitable, который нужно дождаться в цикле событий
+    result = method()
+    if isawaitable(result):
+        await result
+
+
 @pytest.fixture(scope="session")
 def container():
     container = Container()
-    container.init_resources()
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(_call_resources_method(container.init_resources))
     yield container
-    container.shutdown_resources()
+    loop.run_until_complete(_call_resources_method(container.shutdown_resources))
+    loop.close()
 
 
 @pytest.fixture(scope="session")
@@ -0,0 +1,125 @@
+import asyncio
+from pathlib import Path
+
+import orjson
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jose import jwk, jwt
+from jose.exceptions import JWTError
+
+from infrastructure.auth.keys import JWKSKeyProvider
+
+
+class FakeClock:
+    def __init__(self, now: float = 0.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class CountingJWKSKeyProvider(JWKSKeyProvider):
+    __slots__ = ("loads",)
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.loads = 0
+
+    async def _load(self):
+        self.loads += 1
+        await asyncio.sleep(0)
+        return await super()._load()
+
+
+def _generate_private_key() -> str:
+    private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    ).decode()
+
+
+def _write_jwks(path: Path, keys: dict[str, str]) -> None:
+    document = {
+        "keys": [
+            {**jwk.construct(private_key, "RS256").public_key().to_dict(), "kid": kid, "use": "sig"}
+            for kid, private_key in keys.items()
+        ]
+    }
+    path.write_bytes(orjson.dumps(document))
+
+
+@pytest.fixture()
+def private_keys() -> dict[str, str]:
+    return {"first": _generate_private_key(), "second": _generate_private_key()}
+
+
+@pytest.fixture()
+def jwks_path(tmp_path, private_keys) -> Path:
+    path = tmp_path / "jwks.json"
+    _write_jwks(path, {"first": private_keys["first"]})
+    return path
+
+
+@pytest.fixture()
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.mark.asyncio
+async def test_jwks_key_verifies_token(jwks_path, private_keys, clock):
+    provider = CountingJWKSKeyProvider(str(jwks_path), clock=clock)
+    token = jwt.encode({"sub": "user"}, private_keys["first"], algorithm="RS256", headers={"kid": "first"})
+
+    key = await provider.get_key(jwt.get_unverified_header(token)["kid"])
+
+    assert jwt.decode(token, key, algorithms=["RS256"]) == {"sub": "user"}
+    assert provider.loads == 1
+
+
+@pytest.mark.asyncio
+async def test_jwks_refetches_once_on_unknown_kid(jwks_path, private_keys, clock):
+    provider = CountingJWKSKeyProvider(str(jwks_path), min_refresh_interval=10, clock=clock)
+    await provider.get_key("first")
+
+    _write_jwks(jwks_path, private_keys)
+
+    clock.now += 5
+    with pytest.raises(JWTError):
+        await provider.get_key("second")
+    assert provider.loads == 1
+
+    clock.now += 5
+    await provider.get_key("second")
+    assert provider.loads == 2
+
+
+@pytest.mark.asyncio
+async def test_jwks_refresh_is_single_flight(jwks_path, clock):
+    provider = CountingJWKSKeyProvider(str(jwks_path), clock=clock)
+
+    await asyncio.gather(*(provider.get_key("first") for _ in range(50)))
+
+    assert provider.loads == 1
+
+
+@pytest.mark.asyncio
+async def test_jwks_keeps_keys_when_refresh_fails(jwks_path, clock):
+    provider = CountingJWKSKeyProvider(str(jwks_path), refresh_interval=60, clock=clock)
+    await provider.get_key("first")
+
+    jwks_path.write_bytes(b"not a json")
+    clock.now += 60
+
+    assert await provider.get_key("first") is not None
+    assert provider.loads == 2
+
+
+@pytest.mark.asyncio
+async def test_jwks_load_failure_without_cached_keys_is_jwt_error(tmp_path, clock):
+    provider = CountingJWKSKeyProvider(str(tmp_path / "missing.json"), clock=clock)
+
+    with pytest.raises(JWTError):
+        await provider.get_key("first")
@@ -0,0 +1,52 @@
+import pytest
+
+from web.policies import PolicyMatch, RolePolicyRegistry
+
+
+@pytest.fixture()
+def registry() -> RolePolicyRegistry:
+    return RolePolicyRegistry()
+
+
+def test_all_of_policy(registry):
+    policy = registry.register(["admin", "user"])
+
+    assert policy.is_satisfied(registry.roles_mask({"admin", "user", "unknown"}))
+    assert not policy.is_satisfied(registry.roles_mask({"admin"}))
+
+
+def test_any_of_policy(registry):
+    policy = registry.register(["admin", "manager"], match=PolicyMatch.ANY)
+
+    assert policy.is_satisfied(registry.roles_mask({"manager"}))
+    assert not policy.is_satisfied(registry.roles_mask({"user"}))
+
+
+def test_empty_policy_allows_everyone(registry):
+    assert registry.register([]).is_satisfied(0)
+    assert registry.register([], match=PolicyMatch.ANY).is_satisfied(0)
+
+
+def test_same_requirements_share_policy(registry):
+    first = registry.register(["user", "admin"])
+    second = registry.register(["admin", "user"])
+
+    assert first is second
+    assert registry.version == 2
+
+
+def test_named_policy_conflict(registry):
+    registry.register(["admin"], name="admin-only")
+
+    with pytest.raises(ValueError):
+        registry.register(["user"], name="admin-only")
+
+
+def test_policies_report(registry):
+    registry.register(["admin"], name="admin-only")
+    registry.register(["admin", "user"], match=PolicyMatch.ANY)
+
+    assert [policy.as_dict() for policy in registry.policies()] == [
+        {"name": "admin-only", "roles": ["admin"], "match": "all"},
+        {"name": "any:admin,user", "roles": ["admin", "user"], "match": "any"},
+    ]
@@ -0,0 +1,68 @@
+import pytest
+from fastapi import status
+from jose import jwt
+from starlette.requests import Request
+
+from core.errors import ConfigurationBusinessError
+from infrastructure.auth.keys import JWKSKeyProvider, StaticKeyProvider, create_key_provider
+from infrastructure.auth.token_cache import TokenCache
+from infrastructure.config import KeycloakConfig
+from web.errors import HTTPCustomError
+from web.middlewares import RolesKeycloakMiddleware
+from web.policies import RolePolicyRegistry
+
+
+def _request(token: str) -> Request:
+    return Request({"type": "http", "headers": [(b"authorization", f"Bearer {token}".encode())]})
+
+
+@pytest.mark.asyncio
+async def test_unavailable_jwks_rejects_token_as_unauthorized(tmp_path):
+    middleware = RolesKeycloakMiddleware(
+        roles=["admin"],
+        policy_registry=RolePolicyRegistry(),
+        token_cache=TokenCache(max_size=10, max_ttl=60),
+        key_provider=JWKSKeyProvider(str(tmp_path / "missing.json")),
+    )
+    token = jwt.encode({"sub": "user"}, "secret", algorithm="HS256", headers={"kid": "first"})
+
+    with pytest.raises(HTTPCustomError) as error:
+        await middleware(_request(token))
+
+    assert error.value.status_code == status.HTTP_401_UNAUTHORIZED
+    assert error.value.business_error.status == "401"
+
+
+def test_missing_keys_are_configuration_error():
+    with pytest.raises(ConfigurationBusinessError):
+        create_key_provider(KeycloakConfig(CLIENT_ID="client", PUBLIC_KEY=None, JWKS_URI=None))
+
+
+@pytest.mark.asyncio
+async def test_roles_mask_is_cached_per_registry():
+    token_cache = TokenCache(max_size=10, max_ttl=60)
+    keycloak_config = KeycloakConfig(CLIENT_ID="client", ALGORITHMS=["HS256"])
+
+    def middleware(roles: list[str]) -> RolesKeycloakMiddleware:
+        return RolesKeycloakMiddleware(
+            roles=roles,
+            policy_registry=RolePolicyRegistry(),
+            keycloak_config=keycloak_config,
+            token_cache=token_cache,
+            key_provider=StaticKeyProvider("secret"),
+        )
+
+    # У обоих реестров одна роль с битом 1 и одна и та же версия
+    admin_middleware, user_middleware = middleware(["admin"]), middleware(["user"])
+    token = jwt.encode(
+        {"sub": "00000000-0000-0000-0000-000000000001", "email_verified": True, "realm_access": {"roles": ["admin"]}},
+        "secret",
+        algorithm="HS256",
+    )
+
+    await admin_middleware(_request(token))
+    with pytest.raises(HTTPCustomError) as error:
+        await user_middleware(_request(token))
+
+    assert error.value.status_code == status.HTTP_403_FORBIDDEN
+    assert len(token_cache) == 1
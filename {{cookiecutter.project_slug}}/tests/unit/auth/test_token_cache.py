@@ -0,0 +1,82 @@
+import uuid
+
+import pytest
+
+from core.dto.auth import UserDTO
+from infrastructure.auth.token_cache import TokenCache
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture()
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture()
+def user() -> UserDTO:
+    return UserDTO(sub=uuid.uuid4(), email_verified=True)
+
+
+def test_token_cache_hit_and_miss(clock, user):
+    cache = TokenCache(max_size=2, clock=clock)
+
+    assert cache.get("token") is None
+    cache.put("token", payload={"exp": clock.now + 60}, user=user, roles=frozenset({"admin"}))
+    entry = cache.get("token")
+
+    assert entry is not None
+    assert entry.user is user
+    assert entry.roles == frozenset({"admin"})
+    assert cache.stats.as_dict() == {"hits": 1, "misses": 1, "evictions": 0}
+
+
+def test_token_cache_evicts_at_exp(clock, user):
+    cache = TokenCache(max_size=2, max_ttl=300, clock=clock)
+    cache.put("token", payload={"exp": clock.now + 10}, user=user, roles=frozenset())
+
+    clock.now += 10
+
+    assert cache.get("token") is None
+    assert len(cache) == 0
+    assert cache.stats.evictions == 1
+
+
+def test_token_cache_max_ttl_for_token_without_exp(clock, user):
+    cache = TokenCache(max_size=2, max_ttl=5, clock=clock)
+    cache.put("token", payload={}, user=user, roles=frozenset())
+
+    clock.now += 4
+    assert cache.get("token") is not None
+
+    clock.now += 1
+    assert cache.get("token") is None
+
+
+def test_token_cache_lru_eviction(clock, user):
+    cache = TokenCache(max_size=2, clock=clock)
+    payload = {"exp": clock.now + 60}
+
+    cache.put("first", payload=payload, user=user, roles=frozenset())
+    cache.put("second", payload=payload, user=user, roles=frozenset())
+    cache.get("first")
+    cache.put("third", payload=payload, user=user, roles=frozenset())
+
+    assert cache.get("second") is None
+    assert cache.get("first") is not None
+    assert cache.get("third") is not None
+    assert cache.stats.evictions == 1
+
+
+def test_token_cache_disabled(clock, user):
+    cache = TokenCache(max_size=0, clock=clock)
+    cache.put("token", payload={"exp": clock.now + 60}, user=user, roles=frozenset())
+
+    assert cache.get("token") is None
+    assert len(cache) == 0
@@ -0,0 +1,29 @@
+import pytest
+
+from infrastructure.cache.backends import MemoryCacheBackend
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_evicts_least_recently_used():
+    backend = MemoryCacheBackend(max_size=2)
+    await backend.set("a", b"1", ttl=10, tags=["t"])
+    await backend.set("b", b"2", ttl=10, tags=["t"])
+    await backend.get("a")
+    await backend.set("c", b"3", ttl=10)
+
+    assert len(backend) == 2
+    assert await backend.get("b") is None
+    assert await backend.get("a") == b"1"
+    assert await backend.invalidate_tags(["t"]) == 1
+    assert await backend.get("c") == b"3"
+
+
+@pytest.mark.asyncio
+async def test_memory_backend_replaces_entry_tags():
+    backend = MemoryCacheBackend()
+    await backend.set("a", b"1", ttl=10, tags=["old"])
+    await backend.set("a", b"2", ttl=10, tags=["new"])
+
+    assert await backend.invalidate_tags(["old"]) == 0
+    assert await backend.invalidate_tags(["new"]) == 1
+    assert len(backend) == 0
@@ -0,0 +1,51 @@
+from infrastructure.cache.lru import TTLCache
+
+
+class FakeClock:
+    def __init__(self, now: float = 1000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_entry_expires_at_given_time():
+    clock = FakeClock()
+    cache: TTLCache[str, int] = TTLCache(max_size=2, clock=clock)
+    cache.put("key", 1, expires_at=clock.now + 10)
+
+    assert cache.get("key") == 1
+
+    clock.now += 10
+
+    assert cache.get("key") is None
+    assert len(cache) == 0
+    assert cache.stats.as_dict() == {"hits": 1, "misses": 1, "evictions": 1}
+
+
+def test_least_recently_read_entry_is_evicted():
+    clock = FakeClock()
+    cache: TTLCache[str, int] = TTLCache(max_size=2, clock=clock)
+
+    cache.put("first", 1, expires_at=clock.now + 60)
+    cache.put("second", 2, expires_at=clock.now + 60)
+    cache.get("first")
+    cache.put("third", 3, expires_at=clock.now + 60)
+
+    assert cache.get("second") is None
+    assert cache.get("first") == 1
+    assert cache.get("third") == 3
+    assert cache.stats.evictions == 1
+
+
+def test_expired_and_disabled_entries_are_not_stored():
+    clock = FakeClock()
+    cache: TTLCache[str, int] = TTLCache(max_size=2, clock=clock)
+    disabled: TTLCache[str, int] = TTLCache(max_size=0, clock=clock)
+
+    cache.put("key", 1, expires_at=clock.now)
+    disabled.put("key", 1, expires_at=clock.now + 60)
+
+    assert len(cache) == 0
+    assert len(disabled) == 0
+    assert disabled.get("key") is None
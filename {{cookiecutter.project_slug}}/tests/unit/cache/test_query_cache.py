@@ -0,0 +1,210 @@
+import asyncio
+import datetime
+from typing import Optional
+
+import pytest
+from tests.utils.fake_cache import FakeRemoteCacheClient
+
+from core.interfaces.query import IQueryHandler
+from core.usecases.base import BaseQuery, BaseResult
+from infrastructure.cache.backends import MemoryCacheBackend, RemoteCacheBackend
+from infrastructure.cache.query_cache import CachedQueryHandler, QueryCache
+
+
+class ItemsQuery(BaseQuery):
+    owner_id: int
+    name: Optional[str] = None
+
+
+class ItemResult(BaseResult):
+    item_id: int
+    created_at: datetime.datetime
+
+
+class ItemsQueryHandler(IQueryHandler[ItemsQuery, list[ItemResult]]):
+    def __init__(self, delay: float = 0.0) -> None:
+        self.calls = 0
+        self.delay = delay
+        self.error: Optional[Exception] = None
+
+    async def ask(self, query: ItemsQuery) -> list[ItemResult]:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return [
+            ItemResult(item_id=query.owner_id * 10 + self.calls, created_at=datetime.datetime(2022, 1, 1, 12, 0))
+        ]
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture()
+def clock() -> FakeClock:
+    return FakeClock()
+
+
+@pytest.fixture(params=["memory", "remote"])
+def cache(request, clock) -> QueryCache:
+    if request.param == "memory":
+        return QueryCache(MemoryCacheBackend(clock=clock))
+    return QueryCache(RemoteCacheBackend(FakeRemoteCacheClient(clock=clock)))
+
+
+def _cached(handler: ItemsQueryHandler, cache: QueryCache, ttl: float = 10) -> CachedQueryHandler:
+    return CachedQueryHandler(handler, cache, ttl=ttl, tags=lambda query: ["items", f"owner:{query.owner_id}"])
+
+
+@pytest.mark.asyncio
+async def test_repeated_query_is_served_from_cache(cache):
+    handler = ItemsQueryHandler()
+    cached = _cached(handler, cache)
+
+    first = await cached.ask(ItemsQuery(owner_id=1))
+    second = await cached.ask(ItemsQuery(owner_id=1))
+
+    assert first == second
+    assert first is not second
+    assert isinstance(second[0], ItemResult)
+    assert handler.calls == 1
+    assert cache.stats.as_dict() == {"hits": 1, "misses": 1, "coalesced": 0, "errors": 0, "hit_ratio": 0.5}
+
+
+@pytest.mark.asyncio
+async def test_key_depends_on_query_fields(cache):
+    assert cache.make_key(ItemsQuery(owner_id=1)) == cache.make_key(ItemsQuery(ownerId=1, name=None))
+    assert cache.make_key(ItemsQuery(owner_id=1)) != cache.make_key(ItemsQuery(owner_id=1, name="a"))
+    assert cache.make_key(ItemsQuery(owner_id=1)) != cache.make_key(ItemsQuery(owner_id=2))
+
+
+@pytest.mark.asyncio
+async def test_entry_expires_after_ttl(cache, clock):
+    handler = ItemsQueryHandler()
+    cached = _cached(handler, cache, ttl=5)
+
+    await cached.ask(ItemsQuery(owner_id=1))
+    clock.now = 4
+    await cached.ask(ItemsQuery(owner_id=1))
+    clock.now = 6
+    await cached.ask(ItemsQuery(owner_id=1))
+
+    assert handler.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_invalidate_by_tag(cache):
+    handler = ItemsQueryHandler()
+    cached = _cached(handler, cache)
+    await cached.ask(ItemsQuery(owner_id=1))
+    await cached.ask(ItemsQuery(owner_id=2))
+
+    assert await cache.invalidate("owner:1") == 1
+    await cached.ask(ItemsQuery(owner_id=1))
+    await cached.ask(ItemsQuery(owner_id=2))
+    assert handler.calls == 3
+
+    assert await cache.invalidate("items") == 2
+    await cached.ask(ItemsQuery(owner_id=2))
+    assert handler.calls == 4
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_run_query_once(cache):
+    handler = ItemsQueryHandler(delay=0.01)
+    cached = _cached(handler, cache)
+
+    results = await asyncio.gather(*(cached.ask(ItemsQuery(owner_id=1)) for _ in range(50)))
+
+    assert handler.calls == 1
+    assert all(result == results[0] for result in results)
+    assert len({id(result) for result in results}) == 50
+    assert cache.stats.misses == 1
+    assert cache.stats.coalesced == 49
+
+
+@pytest.mark.asyncio
+async def test_concurrent_waiters_receive_query_error(cache):
+    handler = ItemsQueryHandler(delay=0.01)
+    handler.error = ValueError("boom")
+    cached = _cached(handler, cache)
+
+    results = await asyncio.gather(*(cached.ask(ItemsQuery(owner_id=1)) for _ in range(3)), return_exceptions=True)
+
+    assert handler.calls == 1
+    assert all(isinstance(result, ValueError) for result in results)
+
+    handler.error = None
+    await cached.ask(ItemsQuery(owner_id=1))
+    assert handler.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_waiter_runs_query_when_leader_is_cancelled(cache):
+    handler = ItemsQueryHandler(delay=0.05)
+    cached = _cached(handler, cache)
+
+    leader = asyncio.create_task(cached.ask(ItemsQuery(owner_id=1)))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(cached.ask(ItemsQuery(owner_id=1)))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    assert (await waiter)[0].item_id == 12
+    assert handler.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_invalidation_during_query_skips_store(cache):
+    handler = ItemsQueryHandler(delay=0.01)
+    cached = _cached(handler, cache)
+
+    task = asyncio.create_task(cached.ask(ItemsQuery(owner_id=1)))
+    await asyncio.sleep(0)
+    await cache.invalidate("items")
+    await task
+    await cached.ask(ItemsQuery(owner_id=1))
+
+    assert handler.calls == 2
+
+
+@pytest.mark.asyncio
+async def test_invalidation_of_other_tag_keeps_store(cache):
+    handler = ItemsQueryHandler(delay=0.01)
+    cached = _cached(handler, cache)
+
+    task = asyncio.create_task(cached.ask(ItemsQuery(owner_id=1)))
+    await asyncio.sleep(0)
+    await cache.invalidate("owner:2")
+    await task
+    await cached.ask(ItemsQuery(owner_id=1))
+
+    assert handler.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_backend_errors_fall_back_to_handler():
+    client = FakeRemoteCacheClient()
+    cache = QueryCache(RemoteCacheBackend(client))
+    handler = ItemsQueryHandler()
+    client.fail = True
+
+    await _cached(handler, cache).ask(ItemsQuery(owner_id=1))
+    await _cached(handler, cache).ask(ItemsQuery(owner_id=1))
+
+    assert handler.calls == 2
+    assert cache.stats.errors == 4
+
+
+def test_result_type_must_be_known(cache):
+    class UntypedHandler(IQueryHandler):
+        async def ask(self, query):
+            ...
+
+    with pytest.raises(TypeError):
+        CachedQueryHandler(UntypedHandler(), cache, ttl=1)
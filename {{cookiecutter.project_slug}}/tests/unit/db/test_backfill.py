@@ -0,0 +1,231 @@
+from typing import Optional
+from unittest.mock import MagicMock, call
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, event, insert, select, update
+from sqlalchemy.exc import OperationalError
+
+from infrastructure.db.migrations import backfill
+from infrastructure.db.migrations.backfill import (
+    BatchedBackfill,
+    checkpoints,
+    create_index_concurrently,
+    drop_index_concurrently,
+)
+
+metadata = MetaData()
+users = Table(
+    "users",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("full_name", String),
+)
+
+
+class LockNotAvailable(Exception):
+    pgcode = "55P03"
+
+
+@pytest.fixture()
+def connection():
+    engine = create_engine("sqlite://", future=True)
+    metadata.create_all(engine)
+    with engine.connect() as connection:
+        # Пропуски в ключах: пачки строятся по строкам, а не по диапазонам значений
+        connection.execute(insert(users), [{"id": index * 3, "name": f"user-{index}"} for index in range(1, 26)])
+        connection.commit()
+        yield connection
+
+
+def _backfill(**kwargs) -> BatchedBackfill:
+    kwargs.setdefault("sleep", lambda seconds: None)
+    return BatchedBackfill(
+        "users_full_name",
+        update(users).values(full_name="Full " + users.c.name).where(users.c.full_name.is_(None)),
+        key_column=users.c.id,
+        **kwargs,
+    )
+
+
+def _statements(connection, prefix: str) -> list[str]:
+    statements = []
+
+    @event.listens_for(connection, "before_cursor_execute")
+    def record(conn, cursor, statement, *args):
+        if statement.startswith(prefix):
+            statements.append(statement)
+
+    return statements
+
+
+def _not_filled(connection) -> int:
+    return len(connection.execute(select(users.c.id).where(users.c.full_name.is_(None))).all())
+
+
+def test_rows_are_updated_in_batches(connection):
+    updates = _statements(connection, "UPDATE users")
+
+    progress = _backfill(batch_size=10).run(connection)
+
+    assert (progress.rows, progress.batches, progress.finished, progress.last_key) == (25, 3, True, "75")
+    assert len(updates) == 3
+    assert _not_filled(connection) == 0
+    checkpoint = connection.execute(select(checkpoints)).one()
+    assert (checkpoint.last_key, checkpoint.rows_processed) == ("75", 25)
+    assert checkpoint.finished_at is not None
+
+
+def test_finished_backfill_is_skipped(connection):
+    _backfill(batch_size=10).run(connection)
+    updates = _statements(connection, "UPDATE users")
+
+    progress = _backfill(batch_size=10).run(connection)
+
+    assert progress.finished
+    assert updates == []
+
+
+def test_interrupted_backfill_resumes_from_checkpoint(connection):
+    batches = 0
+
+    def interrupt(seconds):
+        nonlocal batches
+        batches += 1
+        if batches == 2:
+            raise KeyboardInterrupt
+
+    with pytest.raises(KeyboardInterrupt):
+        _backfill(batch_size=5, sleep=interrupt).run(connection)
+    assert _not_filled(connection) == 15
+    assert connection.execute(select(checkpoints.c.last_key)).scalar() == "30"
+    connection.rollback()
+
+    updates = _statements(connection, "UPDATE users")
+    progress = _backfill(batch_size=5).run(connection)
+
+    assert (progress.rows, progress.batches, progress.finished) == (25, 3, True)
+    assert len(updates) == 3
+    assert _not_filled(connection) == 0
+
+
+def test_batch_interrupted_by_lock_timeout_is_retried(connection):
+    failures = 1
+
+    @event.listens_for(connection, "before_cursor_execute")
+    def fail_first_update(conn, cursor, statement, *args):
+        nonlocal failures
+        if statement.startswith("UPDATE users") and failures:
+            failures -= 1
+            raise OperationalError(statement, None, LockNotAvailable())
+
+    delays = []
+    progress = _backfill(batch_size=10, pause=0, sleep=delays.append).run(connection)
+
+    assert (progress.rows, progress.retries, progress.finished) == (25, 1, True)
+    assert delays == [0.5]
+    assert _not_filled(connection) == 0
+
+
+def test_other_errors_are_not_retried(connection):
+    @event.listens_for(connection, "before_cursor_execute")
+    def fail_update(conn, cursor, statement, *args):
+        if statement.startswith("UPDATE users"):
+            raise OperationalError(statement, None, Exception("disk full"))
+
+    with pytest.raises(OperationalError):
+        _backfill(batch_size=10).run(connection)
+    assert connection.execute(select(checkpoints.c.last_key)).scalar() is None
+
+
+def test_empty_table_is_finished_immediately(connection):
+    connection.execute(users.delete())
+    connection.commit()
+
+    progress = _backfill().run(connection)
+
+    assert progress.finished
+    assert progress.batches == 0
+
+
+def _mock_op(monkeypatch, is_valid: Optional[bool], as_sql: bool = False) -> MagicMock:
+    op = MagicMock()
+    op.get_context.return_value.as_sql = as_sql
+    op.get_bind.return_value.execute.return_value.scalar.return_value = is_valid
+    monkeypatch.setattr(backfill, "op", op)
+    return op
+
+
+def _index_calls(op: MagicMock) -> list:
+    return [item for item in op.mock_calls if item[0] in ("execute", "drop_index", "create_index")]
+
+
+def test_invalid_index_is_dropped_and_rebuilt(monkeypatch):
+    op = _mock_op(monkeypatch, is_valid=False)
+
+    create_index_concurrently("ix_users_name", "users", ["name"], postgresql_where="name IS NOT NULL")
+
+    assert _index_calls(op) == [
+        call.execute("SET statement_timeout = 0"),
+        call.drop_index("ix_users_name", table_name="users", schema=None, postgresql_concurrently=True),
+        call.create_index(
+            "ix_users_name",
+            "users",
+            ["name"],
+            unique=False,
+            postgresql_concurrently=True,
+            postgresql_where="name IS NOT NULL",
+        ),
+        call.execute("RESET statement_timeout"),
+    ]
+    op.get_context.return_value.autocommit_block.assert_called_once_with()
+
+
+def test_missing_index_is_created(monkeypatch):
+    op = _mock_op(monkeypatch, is_valid=None)
+
+    create_index_concurrently("ix_users_name", "users", ["name"], unique=True)
+
+    op.drop_index.assert_not_called()
+    op.create_index.assert_called_once_with(
+        "ix_users_name", "users", ["name"], unique=True, postgresql_concurrently=True
+    )
+
+
+def test_valid_index_is_not_rebuilt(monkeypatch):
+    op = _mock_op(monkeypatch, is_valid=True)
+
+    create_index_concurrently("ix_users_name", "users", ["name"])
+
+    op.drop_index.assert_not_called()
+    op.create_index.assert_not_called()
+    op.execute.assert_has_calls([call("SET statement_timeout = 0"), call("RESET statement_timeout")])
+
+
+@pytest.mark.parametrize("is_valid", [True, False])
+def test_existing_index_is_dropped_concurrently(monkeypatch, is_valid):
+    op = _mock_op(monkeypatch, is_valid=is_valid)
+
+    drop_index_concurrently("ix_users_name", "users", schema="public")
+
+    op.drop_index.assert_called_once_with(
+        "ix_users_name", table_name="users", schema="public", postgresql_concurrently=True
+    )
+
+
+def test_missing_index_drop_is_skipped(monkeypatch):
+    op = _mock_op(monkeypatch, is_valid=None)
+
+    drop_index_concurrently("ix_users_name", "users")
+
+    op.drop_index.assert_not_called()
+
+
+def test_concurrent_index_operations_require_online_mode(monkeypatch):
+    op = _mock_op(monkeypatch, is_valid=None, as_sql=True)
+
+    with pytest.raises(RuntimeError, match="offline"):
+        create_index_concurrently("ix_users_name", "users", ["name"])
+    with pytest.raises(RuntimeError, match="offline"):
+        drop_index_concurrently("ix_users_name", "users")
+    op.execute.assert_not_called()
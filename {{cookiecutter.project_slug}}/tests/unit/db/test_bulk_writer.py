@@ -0,0 +1,136 @@
+import re
+
+import pytest
+from sqlalchemy import Column, Integer, MetaData, String, Table
+from sqlalchemy.dialects import postgresql
+
+from infrastructure.db.bulk import BulkWriter
+
+metadata = MetaData()
+items = Table(
+    "items",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("name", String, nullable=False),
+    Column("score", Integer, nullable=False),
+    schema="catalog",
+)
+
+
+class FakeDriverConnection:
+    def __init__(self) -> None:
+        self.in_transaction = False
+        self.copies = []
+
+    def is_in_transaction(self) -> bool:
+        return self.in_transaction
+
+    async def copy_records_to_table(self, table_name, *, records, columns, schema_name):
+        assert self.in_transaction, "COPY outside of the session transaction"
+        self.copies.append((schema_name, table_name, list(columns), list(records)))
+        return f"COPY {len(records)}"
+
+
+class FakeRawConnection:
+    def __init__(self, driver_connection: FakeDriverConnection) -> None:
+        self.driver_connection = driver_connection
+
+
+class FakeResult:
+    rowcount = 42
+
+
+class FakeConnection:
+    dialect = postgresql.dialect()
+
+    def __init__(self) -> None:
+        self.driver_connection = FakeDriverConnection()
+        self.statements = []
+
+    async def get_raw_connection(self) -> FakeRawConnection:
+        return FakeRawConnection(self.driver_connection)
+
+    async def exec_driver_sql(self, statement: str) -> FakeResult:
+        self.driver_connection.in_transaction = True
+        self.statements.append(statement)
+        return FakeResult()
+
+
+class FakeSession:
+    def __init__(self) -> None:
+        self.flushed = False
+        self._connection = FakeConnection()
+
+    async def flush(self) -> None:
+        self.flushed = True
+
+    async def connection(self) -> FakeConnection:
+        assert self.flushed, "pending ORM changes must be flushed before COPY"
+        return self._connection
+
+
+@pytest.fixture()
+def session() -> FakeSession:
+    return FakeSession()
+
+
+@pytest.mark.asyncio
+async def test_copy_in_batches_inside_session_transaction(session):
+    writer = BulkWriter(session, batch_size=4)
+
+    count = await writer.copy(items, ((index, f"item-{index}", index) for index in range(10)))
+
+    assert count == 10
+    copies = session._connection.driver_connection.copies
+    assert [len(records) for *_, records in copies] == [4, 4, 2]
+    assert copies[0][:3] == ("catalog", "items", ["id", "name", "score"])
+    # Транзакция asyncpg начата через соединение сессии
+    assert session._connection.statements == ["SELECT 1"]
+
+
+@pytest.mark.asyncio
+async def test_copy_joins_started_transaction(session):
+    session._connection.driver_connection.in_transaction = True
+
+    assert await BulkWriter(session).copy(items, [(1, "a", 1)], columns=["id", "name", "score"]) == 1
+    assert session._connection.statements == []
+
+
+@pytest.mark.asyncio
+async def test_copy_empty_rows(session):
+    assert await BulkWriter(session).copy(items, []) == 0
+    assert session._connection.driver_connection.copies == []
+
+
+@pytest.mark.asyncio
+async def test_upsert_merges_through_temp_table(session):
+    writer = BulkWriter(session, batch_size=2)
+
+    count = await writer.upsert(items, [(1, "a", 1), (2, "b", 2), (3, "c", 3)], conflict_columns=["id"])
+
+    assert count == 42
+    create, insert, drop = session._connection.statements[-3:]
+    staging = re.search(r"CREATE TEMP TABLE (\w+) ON COMMIT DROP", create).group(1)
+    assert create.endswith('AS SELECT id, name, score FROM catalog.items WITH NO DATA')
+    assert insert == (
+        f"INSERT INTO catalog.items (id, name, score) SELECT id, name, score FROM {staging} "
+        "ON CONFLICT (id) DO UPDATE SET name = EXCLUDED.name, score = EXCLUDED.score"
+    )
+    assert drop == f"DROP TABLE {staging}"
+    copies = session._connection.driver_connection.copies
+    assert [(schema, table, len(records)) for schema, table, _, records in copies] == [
+        (None, staging, 2),
+        (None, staging, 1),
+    ]
+
+
+@pytest.mark.asyncio
+async def test_upsert_do_nothing(session):
+    await BulkWriter(session).upsert(items, [(1, "a", 1)], conflict_columns=["id"], update_columns=[])
+
+    assert session._connection.statements[-2].endswith("ON CONFLICT (id) DO NOTHING")
+
+
+def test_batch_size_must_be_positive(session):
+    with pytest.raises(ValueError):
+        BulkWriter(session, batch_size=0)
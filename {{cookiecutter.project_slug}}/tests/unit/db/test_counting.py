@@ -0,0 +1,176 @@
+import pytest
+from sqlalchemy import Column, Integer, MetaData, Table, create_engine, insert, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from core.usecases.pagination import CountStrategy, PaginationQuery
+from infrastructure.db.counting import (
+    CountCache,
+    PageCounter,
+    _ExplainJSON,
+    fetch_offset_page,
+    fingerprint_statement,
+)
+
+metadata = MetaData()
+items = Table("items", metadata, Column("id", Integer, primary_key=True), Column("score", Integer, nullable=False))
+
+
+class SyncSessionAdapter:
+    """
+    Асинхронный интерфейс AsyncSession.execute поверх синхронной сессии sqlite
+    """
+
+    def __init__(self, session: Session) -> None:
+        self.session = session
+        self.statements = []
+
+    async def execute(self, statement, params=None):
+        self.statements.append(statement)
+        return self.session.execute(statement, params)
+
+
+class FakeResult:
+    def __init__(self, value) -> None:
+        self._value = value
+
+    def scalar(self):
+        return self._value
+
+    def scalar_one(self):
+        return self._value
+
+
+class FakeSession:
+    def __init__(self, *values) -> None:
+        self._values = list(values)
+        self.statements = []
+
+    async def execute(self, statement, params=None):
+        self.statements.append(statement)
+        return FakeResult(self._values.pop(0))
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture()
+def session() -> SyncSessionAdapter:
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    with Session(engine) as session:
+        session.execute(insert(items), [{"id": index, "score": index % 5} for index in range(1, 24)])
+        yield SyncSessionAdapter(session)
+
+
+@pytest.mark.asyncio
+async def test_exact_count_ignores_order_and_limit(session):
+    statement = select(items).where(items.c.score > 1).order_by(items.c.id).limit(5).offset(5)
+
+    total = await PageCounter().count(session, statement, CountStrategy.EXACT)
+
+    assert total.value == 14
+    assert total.strategy == CountStrategy.EXACT
+
+
+@pytest.mark.asyncio
+async def test_skipped_count_does_not_query(session):
+    total = await PageCounter().count(session, select(items), CountStrategy.SKIPPED)
+
+    assert total.value is None
+    assert total.strategy == CountStrategy.SKIPPED
+    assert session.statements == []
+
+
+@pytest.mark.asyncio
+async def test_cached_count_per_filter(session):
+    clock = FakeClock()
+    counter = PageCounter(CountCache(ttl=10, clock=clock))
+
+    for _ in range(3):
+        assert (await counter.count(session, select(items).where(items.c.score == 1), CountStrategy.CACHED)).value == 5
+    assert (await counter.count(session, select(items).where(items.c.score == 2), CountStrategy.CACHED)).value == 5
+    assert len(session.statements) == 2
+
+    session.session.execute(insert(items).values(id=100, score=1))
+    assert (await counter.count(session, select(items).where(items.c.score == 1), CountStrategy.CACHED)).value == 5
+
+    clock.now = 11
+    total = await counter.count(session, select(items).where(items.c.score == 1), CountStrategy.CACHED)
+    assert total.value == 6
+    assert total.strategy == CountStrategy.CACHED
+
+
+def test_fingerprint_depends_on_parameters():
+    first = fingerprint_statement(select(items).where(items.c.score == 1))
+
+    assert first == fingerprint_statement(select(items).where(items.c.score == 1))
+    assert first != fingerprint_statement(select(items).where(items.c.score == 2))
+
+
+def test_count_cache_is_bounded():
+    cache = CountCache(max_size=2)
+    for key in (b"a", b"b", b"c"):
+        cache.put(key, 1)
+
+    assert len(cache) == 2
+    assert cache.get(b"a") is None
+    assert cache.stats.evictions == 1
+
+
+@pytest.mark.asyncio
+async def test_estimated_count_uses_table_statistics_without_filters():
+    session = FakeSession(1_000_000)
+
+    total = await PageCounter().count(session, select(items), CountStrategy.ESTIMATED)
+
+    assert total.value == 1_000_000
+    assert total.strategy == CountStrategy.ESTIMATED
+    assert "pg_class" in str(session.statements[0])
+
+
+@pytest.mark.asyncio
+async def test_estimated_count_uses_planner_for_filters():
+    session = FakeSession('[{"Plan": {"Node Type": "Seq Scan", "Plan Rows": 4321}}]')
+    statement = select(items).where(items.c.score > 3).order_by(items.c.id).limit(10)
+
+    total = await PageCounter().count(session, statement, CountStrategy.ESTIMATED)
+
+    assert total.value == 4321
+    sql = str(session.statements[0].compile(dialect=postgresql.dialect()))
+    assert sql.startswith("EXPLAIN (FORMAT JSON) SELECT items.id, items.score")
+    assert "ORDER BY" not in sql and "LIMIT" not in sql
+
+
+@pytest.mark.asyncio
+async def test_estimated_count_falls_back_to_planner_for_not_analyzed_table():
+    session = FakeSession(-1, [{"Plan": {"Plan Rows": 17}}])
+
+    total = await PageCounter().count(session, select(items), CountStrategy.ESTIMATED)
+
+    assert total.value == 17
+    assert isinstance(session.statements[1], _ExplainJSON)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "offset, has_next_page, page_number", [(0, True, 1), (10, True, 2), (20, False, 3), (30, False, 4)]
+)
+async def test_fetch_offset_page(session, offset, has_next_page, page_number):
+    page = await fetch_offset_page(
+        session,
+        select(items).order_by(items.c.id),
+        PaginationQuery(offset=offset, limit=10),
+        PageCounter(),
+        CountStrategy.SKIPPED,
+    )
+
+    assert [row.id for row in page.rows] == list(range(offset + 1, min(offset + 10, 23) + 1))
+    assert page.page.has_next_page is has_next_page
+    assert page.page.page_number == page_number
+    assert page.total_count.strategy == CountStrategy.SKIPPED
@@ -0,0 +1,97 @@
+import os
+
+import pytest
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from infrastructure.config import PostgresConfig
+from infrastructure.db import session
+from infrastructure.db.session import Database, trace_engine
+
+
+@pytest.fixture()
+def database() -> Database:
+    return Database(PostgresConfig(USER="user", PASSWORD="password", DB="db"))
+
+
+def test_engine_is_created_lazily(database):
+    assert not database.is_initialized
+
+    engine = database.engine
+
+    assert database.is_initialized
+    assert database.engine is engine
+    assert database.session_factory is database.replica_session_factory
+
+
+def test_engine_is_recreated_after_fork(database, monkeypatch):
+    engine = database.engine
+    monkeypatch.setattr(os, "getpid", lambda: -1)
+
+    assert database.engine is not engine
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="fork is not supported")
+def test_forked_child_does_not_reuse_parent_pool(database):
+    parent_pool = database.engine.sync_engine.pool
+    read_fd, write_fd = os.pipe()
+
+    pid = os.fork()
+    if pid == 0:
+        # Дочерний процесс: движок сброшен обработчиком register_at_fork
+        try:
+            reused = database.is_initialized or database.engine.sync_engine.pool is parent_pool
+            os.write(write_fd, b"1" if reused else b"0")
+        finally:
+            os._exit(0)
+
+    os.close(write_fd)
+    os.waitpid(pid, 0)
+    with os.fdopen(read_fd, "rb") as pipe:
+        assert pipe.read() == b"0"
+
+
+@pytest.mark.asyncio
+async def test_dispose_resets_engines(database):
+    database.engine
+
+    await database.dispose()
+
+    assert not database.is_initialized
+
+
+def test_every_engine_is_traced(monkeypatch):
+    traced = []
+    monkeypatch.setattr(session, "trace_engine", traced.append)
+    database = Database(
+        PostgresConfig(USER="user", PASSWORD="password", DB="db", REPLICA_URI="postgresql+asyncpg://u:p@replica/db")
+    )
+
+    database.engine
+    database.forget()
+    database.engine
+
+    assert [engine.url.host for engine in traced] == ["localhost", "replica", "localhost", "replica"]
+
+
+@pytest.mark.asyncio
+async def test_replica_query_produces_span():
+    exporter = InMemorySpanExporter()
+    tracer_provider = TracerProvider()
+    tracer_provider.add_span_processor(SimpleSpanProcessor(exporter))
+    primary = create_async_engine("sqlite+aiosqlite://")
+    replica = create_async_engine("sqlite+aiosqlite://")
+    trace_engine(primary, tracer_provider)
+    trace_engine(replica, tracer_provider)
+
+    async with replica.connect() as connection:
+        await connection.execute(text("SELECT 1"))
+    await primary.dispose()
+    await replica.dispose()
+
+    spans = exporter.get_finished_spans()
+    assert len(spans) == 1
+    assert spans[0].attributes["db.statement"] == "SELECT 1"
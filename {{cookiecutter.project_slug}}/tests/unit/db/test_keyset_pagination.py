@@ -0,0 +1,151 @@
+import pytest
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, insert, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session, registry
+
+from core.errors import ConfigurationBusinessError, ValidationBusinessError
+from core.usecases.pagination import Cursor, CursorCodec, CursorDirection
+from infrastructure.db.pagination import KeysetPaginator
+
+metadata = MetaData()
+items = Table(
+    "items",
+    metadata,
+    Column("id", Integer, primary_key=True),
+    Column("score", Integer, nullable=False),
+    Column("name", String, nullable=False),
+)
+
+
+
+class Item:
+    pass
+
+
+registry().map_imperatively(Item, items)
+
+
+@pytest.fixture()
+def codec() -> CursorCodec:
+    return CursorCodec("secret")
+
+
+@pytest.fixture()
+def session():
+    # Проверка построенных запросов на настоящей базе: sqlite поддерживает сравнение кортежей
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    with Session(engine) as session:
+        session.execute(
+            insert(items), [{"id": index, "score": index % 7, "name": f"item-{index}"} for index in range(1, 51)]
+        )
+        yield session
+
+
+def _compile(statement) -> str:
+    return str(statement.compile(dialect=postgresql.dialect()))
+
+
+def _walk(session, paginator, codec, limit, token=None):
+    cursor = codec.decode(token) if token else None
+    rows = session.execute(paginator.apply(select(items), cursor, limit)).all()
+    return paginator.build_page(rows, cursor, limit)
+
+
+def test_same_direction_uses_row_comparison(codec):
+    paginator = KeysetPaginator([items.c.score.desc(), items.c.id.desc()], codec)
+
+    sql = _compile(paginator.apply(select(items), Cursor((3, 10)), 20))
+
+    assert "(items.score, items.id) < (%(param_1)s, %(param_2)s)" in sql
+    assert "ORDER BY items.score DESC, items.id DESC" in sql
+    assert "OFFSET" not in sql
+
+
+def test_mixed_directions_expand_to_or(codec):
+    paginator = KeysetPaginator([items.c.score.desc(), items.c.id], codec)
+
+    sql = _compile(paginator.apply(select(items), Cursor((3, 10)), 20))
+
+    assert "items.score < %(score_1)s OR items.score = %(score_2)s AND items.id > %(id_1)s" in sql
+
+
+def test_prev_cursor_reverses_ordering(codec):
+    paginator = KeysetPaginator([items.c.score, items.c.id], codec)
+
+    sql = _compile(paginator.apply(select(items), Cursor((3, 10), CursorDirection.PREV), 20))
+
+    assert "(items.score, items.id) < (%(param_1)s, %(param_2)s)" in sql
+    assert "ORDER BY items.score DESC, items.id DESC" in sql
+
+
+def test_cursor_must_match_ordering(codec):
+    paginator = KeysetPaginator([items.c.score, items.c.id], codec)
+
+    with pytest.raises(ValidationBusinessError):
+        paginator.apply(select(items), Cursor((3,)), 20)
+
+
+@pytest.mark.parametrize(
+    "order_by",
+    [
+        [items.c.id],
+        [items.c.score.desc(), items.c.id.desc()],
+        [items.c.score.desc(), items.c.id.asc()],
+        [items.c.score, items.c.name.desc(), items.c.id],
+    ],
+)
+def test_forward_and_backward_walk_matches_offset(session, codec, order_by):
+    paginator = KeysetPaginator(order_by, codec)
+    expected = session.execute(select(items).order_by(*order_by)).all()
+
+    pages, token = [], None
+    while True:
+        page = _walk(session, paginator, codec, 8, token)
+        pages.append(page)
+        if page.next_cursor is None:
+            break
+        token = page.next_cursor
+
+    assert [row for page in pages for row in page.rows] == expected
+    assert pages[0].prev_cursor is None
+    assert all(page.prev_cursor for page in pages[1:])
+
+    # Обратно от последней страницы по prev_cursor
+    backward, token = [pages[-1].rows], pages[-1].prev_cursor
+    while token is not None:
+        page = _walk(session, paginator, codec, 8, token)
+        assert page.next_cursor is not None
+        backward.insert(0, page.rows)
+        token = page.prev_cursor
+
+    assert [row for rows in backward for row in rows] == expected
+
+
+def test_empty_result(session, codec):
+    paginator = KeysetPaginator([items.c.id], codec)
+
+    page = _walk(session, paginator, codec, 8, codec.encode(Cursor((50,))))
+
+    assert page.rows == []
+    assert page.next_cursor is None
+    assert page.prev_cursor is None
+
+
+def test_keys_are_read_from_orm_entity_rows(session, codec):
+    paginator = KeysetPaginator([items.c.score, items.c.id], codec)
+    statement = paginator.apply(select(Item), None, 8)
+
+    entity_rows = paginator.build_page(session.execute(statement).all(), None, 8)
+    entities = paginator.build_page(session.execute(statement).scalars().all(), None, 8)
+
+    assert entity_rows.next_cursor == entities.next_cursor
+    assert codec.decode(entities.next_cursor).keys == (1, 1)
+
+
+def test_missing_keys_are_rejected(session, codec):
+    paginator = KeysetPaginator([items.c.id], codec)
+    rows = session.execute(paginator.apply(select(items.c.name), None, 8)).all()
+
+    with pytest.raises(ConfigurationBusinessError):
+        paginator.build_page(rows, None, 8)
@@ -0,0 +1,46 @@
+import pytest
+from opentelemetry.sdk.trace import TracerProvider
+from opentelemetry.sdk.trace.export import SimpleSpanProcessor
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from sqlalchemy.util import greenlet_spawn
+
+from infrastructure.db.pool import InstrumentedAsyncAdaptedQueuePool
+
+
+class FakeConnection:
+    def rollback(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+@pytest.mark.asyncio
+async def test_checkout_sets_pool_span_attributes():
+    pool = InstrumentedAsyncAdaptedQueuePool(creator=FakeConnection, pool_size=1, max_overflow=1)
+    pool.pool_name = "test"
+    exporter = InMemorySpanExporter()
+    tracer_provider = TracerProvider()
+    tracer_provider.add_span_processor(SimpleSpanProcessor(exporter))
+
+    def checkout_two_connections():
+        with tracer_provider.get_tracer(__name__).start_as_current_span("request"):
+            first, second = pool.connect(), pool.connect()
+            first.close()
+            second.close()
+
+    await greenlet_spawn(checkout_two_connections)
+
+    attributes = exporter.get_finished_spans()[0].attributes
+    assert attributes["db.pool.name"] == "test"
+    assert attributes["db.pool.checked_out"] == 2
+    assert attributes["db.pool.overflow"] == 1
+    assert attributes["db.pool.wait_time_ms"] >= 0
+    assert pool.checkedout() == 0
+
+
+def test_recreated_pool_keeps_name():
+    pool = InstrumentedAsyncAdaptedQueuePool(creator=FakeConnection)
+    pool.pool_name = "replica"
+
+    assert pool.recreate().pool_name == "replica"
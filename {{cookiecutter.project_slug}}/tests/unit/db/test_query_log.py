@@ -0,0 +1,149 @@
+import pytest
+from sqlalchemy import Column, Integer, MetaData, String, Table, create_engine, insert, select
+from sqlalchemy.exc import OperationalError
+from structlog.testing import capture_logs
+
+from infrastructure.db.query_log import QueryStatsRegistry, SlowQueryLog, normalize_sql, use_case
+
+metadata = MetaData()
+items = Table("items", metadata, Column("id", Integer, primary_key=True), Column("name", String))
+
+
+@pytest.fixture()
+def registry() -> QueryStatsRegistry:
+    return QueryStatsRegistry()
+
+
+def _engine(registry: QueryStatsRegistry, **kwargs):
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    SlowQueryLog(registry=registry, **kwargs).install(engine)
+    return engine
+
+
+def test_normalize_sql():
+    statement = """
+        SELECT items.id FROM items
+        WHERE items.name = 'it''s' AND items.id IN (%s, %s, %s) AND items.score > 10 LIMIT $1
+    """
+
+    assert normalize_sql(statement) == (
+        "SELECT items.id FROM items WHERE items.name = ? AND items.id IN (...) AND items.score > ? LIMIT $1"
+    )
+
+
+def test_statements_are_aggregated_by_fingerprint(registry):
+    engine = _engine(registry, threshold_ms=10_000)
+
+    with engine.begin() as connection:
+        for index in range(10):
+            connection.execute(select(items).where(items.c.id == index))
+        connection.execute(select(items).where(items.c.id.in_([1, 2, 3])))
+        connection.execute(select(items).where(items.c.id.in_([1, 2])))
+
+    stats = {entry["statement"]: entry for entry in registry.dump()}
+    by_id = stats["SELECT items.id, items.name FROM items WHERE items.id = ?"]
+    assert by_id["count"] == 10
+    assert by_id["slow_count"] == 0
+    assert 0 <= by_id["p50_ms"] <= by_id["p99_ms"] <= by_id["max_ms"]
+    assert stats["SELECT items.id, items.name FROM items WHERE items.id IN (...)"]["count"] == 2
+
+
+def test_slow_query_is_logged_with_use_case(registry):
+    engine = _engine(registry, threshold_ms=0)
+
+    with capture_logs() as logs, use_case("ListItemsQueryHandler"), engine.begin() as connection:
+        connection.execute(insert(items), [{"id": 1, "name": "secret"}, {"id": 2, "name": "other"}])
+        connection.execute(select(items).where(items.c.name == "secret"))
+
+    select_log = [log for log in logs if log["event"] == "Slow query"][-1]
+    assert select_log["statement"] == "SELECT items.id, items.name FROM items WHERE items.name = ?"
+    assert select_log["parameters"] == ["<str>"]
+    assert select_log["use_case"] == "ListItemsQueryHandler"
+    assert select_log["duration_ms"] >= 0
+    assert "row_count" in select_log
+    assert select_log["plan"] is None
+
+    insert_log = [log for log in logs if log["event"] == "Slow query"][0]
+    assert insert_log["parameters"] == [["<int>", "<str>"], ["<int>", "<str>"]]
+
+
+def test_parameters_are_logged_when_redaction_is_disabled(registry):
+    engine = _engine(registry, threshold_ms=0, redact_parameters=False)
+
+    with capture_logs() as logs, engine.connect() as connection:
+        connection.execute(select(items).where(items.c.name == "visible"))
+
+    assert logs[-1]["parameters"] == ("visible",)
+
+
+def test_explain_failure_does_not_break_query(registry):
+    # sqlite не поддерживает EXPLAIN (ANALYZE, BUFFERS), ошибка только логируется
+    engine = _engine(registry, threshold_ms=0, explain_sample_rate=1.0, random_=lambda: 0.0)
+
+    with capture_logs() as logs, engine.connect() as connection:
+        assert connection.execute(select(items)).all() == []
+
+    assert [log["event"] for log in logs] == ["EXPLAIN of slow query failed", "Slow query"]
+
+
+def test_explain_failure_is_rolled_back_to_savepoint(registry):
+    engine = _engine(registry, threshold_ms=0, explain_sample_rate=1.0, random_=lambda: 0.0)
+    statements = []
+
+    with engine.begin() as connection:
+        connection.connection.dbapi_connection.set_trace_callback(statements.append)
+        connection.execute(insert(items).values(id=1, name="a"))
+        connection.execute(select(items))
+        connection.execute(insert(items).values(id=2, name="b"))
+
+    assert [statement for statement in statements if "SAVEPOINT" in statement] == [
+        "SAVEPOINT slow_query_explain",
+        "ROLLBACK TO SAVEPOINT slow_query_explain",
+        "RELEASE SAVEPOINT slow_query_explain",
+    ]
+    with engine.connect() as connection:
+        assert connection.execute(select(items.c.id)).scalars().all() == [1, 2]
+
+
+def test_explain_runs_only_for_sampled_selects(registry):
+    explained = []
+
+    class RecordingSlowQueryLog(SlowQueryLog):
+        @staticmethod
+        def _explain(conn, statement, parameters):
+            explained.append(statement)
+            return [{"Plan": {}}]
+
+    engine = create_engine("sqlite://")
+    metadata.create_all(engine)
+    samples = iter([0.9, 0.1, 0.1])
+    RecordingSlowQueryLog(
+        threshold_ms=0, explain_sample_rate=0.5, registry=registry, random_=lambda: next(samples)
+    ).install(engine)
+
+    with engine.begin() as connection:
+        connection.execute(insert(items).values(id=1, name="a"))
+        connection.execute(select(items))
+        connection.execute(select(items.c.id))
+
+    assert explained == ["SELECT items.id \nFROM items"]
+
+
+def test_failed_statement_does_not_leak_timer(registry):
+    engine = _engine(registry, threshold_ms=10_000)
+
+    with engine.connect() as connection:
+        with pytest.raises(OperationalError):
+            connection.exec_driver_sql("SELECT * FROM missing")
+        connection.execute(select(items))
+
+        assert connection.info["query_log_start_times"] == []
+
+
+def test_registry_is_bounded():
+    registry = QueryStatsRegistry(max_statements=2, samples=3)
+    for fingerprint in ("a", "b", "a", "c"):
+        registry.record(fingerprint, fingerprint, 1.0, is_slow=False)
+
+    assert [entry["fingerprint"] for entry in registry.dump()] == ["a", "c"]
@@ -0,0 +1,149 @@
+import asyncio
+import gc
+import tracemalloc
+
+import pytest
+import pytest_asyncio
+from httpx import AsyncClient
+from fastapi import FastAPI
+from sqlalchemy import Column, Integer, MetaData, String, Table, select
+from sqlalchemy.engine import Row
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.sql import Executable
+
+from core.usecases.base import BaseQuery, BaseResult
+from infrastructure.db.streaming import StreamingQueryHandler, stream_partitions
+from web.responses import ModelStreamingResponse
+
+metadata = MetaData()
+items = Table("items", metadata, Column("id", Integer, primary_key=True), Column("name", String, nullable=False))
+
+
+class ExportItemsQuery(BaseQuery):
+    min_id: int = 0
+
+
+class ItemResult(BaseResult):
+    item_id: int
+    item_name: str
+
+
+class ExportItemsQueryHandler(StreamingQueryHandler[ExportItemsQuery, ItemResult]):
+    def build_statement(self, query: ExportItemsQuery) -> Executable:
+        return select(items.c.id, items.c.name).where(items.c.id > query.min_id).order_by(items.c.id)
+
+    def to_result(self, row: Row) -> ItemResult:
+        return ItemResult(item_id=row.id, item_name=row.name)
+
+
+@pytest_asyncio.fixture()
+async def engine():
+    engine = create_async_engine("sqlite+aiosqlite://")
+    async with engine.begin() as connection:
+        await connection.run_sync(metadata.create_all)
+    yield engine
+    await engine.dispose()
+
+
+async def _seed(engine, count: int) -> None:
+    async with engine.begin() as connection:
+        await connection.execute(items.delete())
+        await connection.exec_driver_sql(
+            "WITH RECURSIVE seq(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM seq WHERE x < ?) "
+            "INSERT INTO items SELECT x, 'item-' || x FROM seq",
+            (count,),
+        )
+
+
+def _app(engine) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/items/export")
+    async def export_items(min_id: int = 0) -> ModelStreamingResponse:
+        session = AsyncSession(engine)
+        handler = ExportItemsQueryHandler(session, chunk_size=500)
+        return ModelStreamingResponse(handler.stream(ExportItemsQuery(min_id=min_id)))
+
+    return app
+
+
+async def _export_peak_memory(engine) -> tuple[int, int]:
+    # ASGITransport httpx собирает тело ответа целиком, поэтому приложение вызывается напрямую
+    app = _app(engine)
+    lines = 0
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/items/export",
+        "raw_path": b"/items/export",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [],
+        "server": ("test", 80),
+        "client": ("test", 1),
+    }
+
+    async def receive() -> dict:
+        await asyncio.Event().wait()
+
+    async def send(message: dict) -> None:
+        nonlocal lines
+        if message["type"] == "http.response.body":
+            lines += message.get("body", b"").count(b"\n")
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        await app(scope, receive, send)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return lines, peak
+
+
+@pytest.mark.asyncio
+async def test_stream_partitions_reads_all_rows_in_chunks(engine):
+    await _seed(engine, 1050)
+
+    async with AsyncSession(engine) as session:
+        sizes = [
+            len(partition)
+            async for partition in stream_partitions(session, select(items).order_by(items.c.id), chunk_size=500)
+        ]
+
+    assert sizes == [500, 500, 50]
+
+
+@pytest.mark.asyncio
+async def test_export_is_streamed_as_ndjson(engine):
+    await _seed(engine, 10)
+
+    async with AsyncClient(app=_app(engine), base_url="http://test") as client:
+        response = await client.get("/items/export", params={"min_id": 7})
+
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.text.splitlines() == [
+        '{"itemId":8,"itemName":"item-8"}',
+        '{"itemId":9,"itemName":"item-9"}',
+        '{"itemId":10,"itemName":"item-10"}',
+    ]
+
+
+@pytest.mark.asyncio
+async def test_export_peak_memory_does_not_depend_on_result_size(engine):
+    # Первый запрос создает соединения и кэши компиляции
+    await _seed(engine, 10)
+    await _export_peak_memory(engine)
+
+    await _seed(engine, 5_000)
+    small_lines, small_peak = await _export_peak_memory(engine)
+    await _seed(engine, 50_000)
+    large_lines, large_peak = await _export_peak_memory(engine)
+
+    assert (small_lines, large_lines) == (5_000, 50_000)
+    # Список из 50 000 результатов занимает больше 10 Мб, стриминг - сотни килобайт
+    assert large_peak < 2 * 1024 * 1024
+    assert large_peak < small_peak * 1.5
@@ -1,5 +1,6 @@
+import asyncio
 import random
-from typing import Type
+from typing import Callable
 
 import pytest
 
@@ -27,6 +28,15 @@ class FailedMockCommand(BaseCommand):
         )
 
 
+class SlowMockCommand(BaseCommand):
+    def __init__(self, delay: float):
+        self.delay = delay
+
+    async def execute(self) -> CommandResult:
+        await asyncio.sleep(self.delay)
+        return CommandResult(status=Status.HEALTHY, duration=self.delay)
+
+
 @pytest.fixture()
 def successful_mock_command() -> SuccessfulMockCommand:
     return SuccessfulMockCommand()
@@ -37,11 +47,17 @@ def failed_mock_command() -> FailedMockCommand:
     return FailedMockCommand()
 
 
+@pytest.fixture()
+def slow_mock_command() -> Callable[[float], SlowMockCommand]:
+    # Фабрика: задержка команды задается в тесте
+    return SlowMockCommand
+
+
 @pytest.fixture()
 def command_handler() -> CommandHandler:
     return CommandHandler()
 
 
 @pytest.fixture()
-def healthcheck_config() -> Type[HealthCheckConfig]:
-    return HealthCheckConfig
+def healthcheck_config() -> HealthCheckConfig:
+    return HealthCheckConfig(COMMAND_TIMEOUT=0.5, PROBE_TIMEOUT=1.0)
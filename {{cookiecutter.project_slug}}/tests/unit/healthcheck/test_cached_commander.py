@@ -0,0 +1,99 @@
+import asyncio
+
+import pytest
+
+from web.healthcheck.cached_commander import CachedHealthCheckCommander
+from web.healthcheck.commands import BaseCommand, CommandResult
+from web.healthcheck.status import Status
+
+
+class CountingMockCommand(BaseCommand):
+    def __init__(self):
+        self.calls = 0
+
+    async def execute(self) -> CommandResult:
+        self.calls += 1
+        return CommandResult(status=Status.HEALTHY, duration=0.0)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def _create_commander(command_handler, healthcheck_config, clock=None) -> CachedHealthCheckCommander:
+    return CachedHealthCheckCommander(
+        liveness_handler=command_handler,
+        readiness_handler=command_handler,
+        monitor_handler=command_handler,
+        healthcheck_config=healthcheck_config,
+        clock=clock or FakeClock(),
+    )
+
+
+@pytest.mark.asyncio
+async def test_cached_result_is_returned(command_handler, healthcheck_config):
+    command = CountingMockCommand()
+    command_handler.add_healthcheck_command("counting", command)
+    clock = FakeClock()
+    commander = _create_commander(command_handler, healthcheck_config, clock)
+    await commander.refresh()
+    # liveness и readiness используют один обработчик и процент, monitor - другой процент
+    assert command.calls == 2
+
+    clock.now = 3.0
+    for _ in range(10):
+        result = await commander.run_liveness_route()
+
+    assert command.calls == 2
+    assert result.status == Status.HEALTHY
+    assert result.staleness == 3.0
+    assert "counting" in result.entries
+
+
+@pytest.mark.asyncio
+async def test_stale_result_is_unhealthy(command_handler, healthcheck_config):
+    healthcheck_config.CACHE_MAX_STALENESS = 10.0
+    command_handler.add_healthcheck_command("counting", CountingMockCommand())
+    clock = FakeClock()
+    commander = _create_commander(command_handler, healthcheck_config, clock)
+    await commander.refresh()
+
+    clock.now = 11.0
+    result = await commander.run_readiness_route()
+
+    assert result.status == Status.UNHEALTHY
+    assert result.staleness == 11.0
+
+
+@pytest.mark.asyncio
+async def test_checks_run_live_before_first_refresh(command_handler, healthcheck_config):
+    command = CountingMockCommand()
+    command_handler.add_healthcheck_command("counting", command)
+    commander = _create_commander(command_handler, healthcheck_config)
+
+    result = await commander.run_monitor_route()
+
+    assert command.calls == 1
+    assert result.status == Status.HEALTHY
+    assert result.staleness == 0.0
+
+
+@pytest.mark.asyncio
+async def test_background_refresh(command_handler, healthcheck_config):
+    healthcheck_config.CACHE_REFRESH_INTERVAL = 0.01
+    command = CountingMockCommand()
+    command_handler.add_healthcheck_command("counting", command)
+    commander = _create_commander(command_handler, healthcheck_config)
+
+    await commander.start()
+    await asyncio.sleep(0.1)
+    await commander.stop()
+    calls = command.calls
+    await asyncio.sleep(0.05)
+
+    assert calls > 2
+    assert command.calls == calls
@@ -1,6 +1,78 @@
+import time
+
 import pytest
 
+from web.healthcheck.commander import HealthCheckCommander
+from web.healthcheck.status import Status
+
+
+def _create_commander(command_handler, healthcheck_config) -> HealthCheckCommander:
+    return HealthCheckCommander(
+        liveness_handler=command_handler,
+        readiness_handler=command_handler,
+        monitor_handler=command_handler,
+        healthcheck_config=healthcheck_config,
+    )
+
 
 @pytest.mark.asyncio
-async def test_commander():
-    ...
+async def test_commander(command_handler, healthcheck_config, successful_mock_command, failed_mock_command):
+    for index in range(4):
+        command_handler.add_healthcheck_command(f"successful_{index}", successful_mock_command)
+    command_handler.add_healthcheck_command("failed", failed_mock_command)
+    commander = _create_commander(command_handler, healthcheck_config)
+
+    readiness = await commander.run_readiness_route()
+    monitor = await commander.run_monitor_route()
+
+    assert readiness.status == Status.HEALTHY
+    assert monitor.status == Status.UNHEALTHY
+    assert list(readiness.entries) == ["successful_0", "successful_1", "successful_2", "successful_3", "failed"]
+    assert readiness.entries["failed"]["exception"] == "SomethingError"
+
+
+@pytest.mark.asyncio
+async def test_commands_run_concurrently(command_handler, healthcheck_config, slow_mock_command):
+    for index in range(5):
+        command_handler.add_healthcheck_command(f"slow_{index}", slow_mock_command(0.2))
+    commander = _create_commander(command_handler, healthcheck_config)
+
+    start = time.perf_counter()
+    result = await commander.run_liveness_route()
+
+    assert time.perf_counter() - start < 0.6
+    assert result.status == Status.HEALTHY
+    assert all(entry["duration"] == 0.2 for entry in result.entries.values())
+
+
+@pytest.mark.asyncio
+async def test_command_timeout(command_handler, healthcheck_config, successful_mock_command, slow_mock_command):
+    command_handler.add_healthcheck_command("successful", successful_mock_command)
+    command_handler.add_healthcheck_command("slow", slow_mock_command(10), timeout=0.05)
+    commander = _create_commander(command_handler, healthcheck_config)
+
+    result = await commander.run_monitor_route()
+
+    assert result.status == Status.UNHEALTHY
+    assert result.entries["successful"]["status"] == Status.HEALTHY
+    assert result.entries["slow"]["status"] == Status.UNHEALTHY
+    assert result.entries["slow"]["exception"] == "TimeoutError"
+    assert result.entries["slow"]["data"] == {"timeout": 0.05}
+    assert result.entries["slow"]["duration"] < 0.5
+
+
+@pytest.mark.asyncio
+async def test_probe_deadline(command_handler, healthcheck_config, slow_mock_command):
+    healthcheck_config.COMMAND_TIMEOUT = None
+    healthcheck_config.PROBE_TIMEOUT = 0.1
+    command_handler.add_healthcheck_command("fast", slow_mock_command(0.01))
+    command_handler.add_healthcheck_command("slow", slow_mock_command(10))
+    commander = _create_commander(command_handler, healthcheck_config)
+
+    start = time.perf_counter()
+    result = await commander.run_liveness_route()
+
+    assert time.perf_counter() - start < 0.5
+    assert result.status == Status.UNHEALTHY
+    assert result.entries["fast"]["status"] == Status.HEALTHY
+    assert result.entries["slow"]["data"] == {"timeout": 0.1}
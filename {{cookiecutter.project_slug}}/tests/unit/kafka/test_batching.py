@@ -0,0 +1,164 @@
+import asyncio
+from contextlib import asynccontextmanager
+from typing import Sequence
+
+import faust
+import pytest
+from tests.utils.fake_kafka import MemoryTopic
+
+from infrastructure.kafka.batching import BatchProcessor, batched_agent, consume_batches, iterate_batches
+
+
+class BulkHandler:
+    def __init__(self, bad: Sequence[int] = (), outages: int = 0) -> None:
+        self.bad = set(bad)
+        self.outages = outages
+        self.calls: list[list[int]] = []
+        self.processed: list[int] = []
+
+    async def __call__(self, batch: Sequence[int]) -> None:
+        self.calls.append(list(batch))
+        if self.outages:
+            self.outages -= 1
+            raise ConnectionRefusedError("database is unavailable")
+        if self.bad.intersection(batch):
+            raise ValueError("bad message")
+        self.processed.extend(batch)
+
+
+async def _collect(items, max_size: int, max_wait: float) -> list[list[int]]:
+    return [batch async for batch in iterate_batches(items, max_size, max_wait)]
+
+
+async def _values(values, delays=None):
+    for index, value in enumerate(values):
+        if delays:
+            await asyncio.sleep(delays[index])
+        yield value
+
+
+@pytest.mark.asyncio
+async def test_batches_are_limited_by_size():
+    assert await _collect(_values(range(7)), max_size=3, max_wait=10) == [[0, 1, 2], [3, 4, 5], [6]]
+
+
+@pytest.mark.asyncio
+async def test_batch_is_flushed_after_max_wait():
+    batches = await _collect(_values(range(4), delays=[0, 0, 0.2, 0]), max_size=10, max_wait=0.05)
+
+    assert batches == [[0, 1], [2, 3]]
+
+
+@pytest.mark.asyncio
+async def test_source_error_is_raised():
+    async def broken():
+        yield 1
+        raise ConnectionError("broker is unavailable")
+
+    with pytest.raises(ConnectionError):
+        await _collect(broken(), max_size=10, max_wait=10)
+
+
+@pytest.mark.asyncio
+async def test_failing_message_is_isolated_by_splitting():
+    handler = BulkHandler(bad=[5])
+    failed = []
+
+    async def on_failure(message, error):
+        failed.append((message, type(error)))
+
+    assert await BatchProcessor(handler, on_failure=on_failure).process(list(range(8))) == 1
+
+    assert failed == [(5, ValueError)]
+    assert sorted(handler.processed) == [0, 1, 2, 3, 4, 6, 7]
+    assert handler.calls == [[0, 1, 2, 3, 4, 5, 6, 7], [0, 1, 2, 3], [4, 5, 6, 7], [4, 5], [4], [5], [6, 7]]
+
+
+@pytest.mark.asyncio
+async def test_transient_error_retries_whole_batch():
+    handler = BulkHandler(outages=2)
+    failed = []
+
+    async def on_failure(message, error):
+        failed.append(message)
+
+    processor = BatchProcessor(handler, on_failure=on_failure, retry_delay=0)
+
+    assert await processor.process(list(range(8))) == 0
+    assert handler.calls == [list(range(8))] * 3
+    assert failed == []
+
+
+@pytest.mark.asyncio
+async def test_persistent_transient_error_is_raised_without_failure_handler_calls():
+    handler = BulkHandler(outages=10)
+    failed = []
+
+    async def on_failure(message, error):
+        failed.append(message)
+
+    with pytest.raises(ConnectionRefusedError):
+        await BatchProcessor(handler, on_failure=on_failure, max_retries=2, retry_delay=0).process(list(range(8)))
+
+    assert len(handler.calls) == 3
+    assert failed == []
+
+
+@pytest.mark.asyncio
+async def test_each_call_runs_in_own_scope():
+    scopes = []
+
+    @asynccontextmanager
+    async def scope():
+        try:
+            yield
+        except Exception:
+            scopes.append("rollback")
+            raise
+        else:
+            scopes.append("commit")
+
+    async def on_failure(message, error):
+        ...
+
+    await BatchProcessor(BulkHandler(bad=[0]), on_failure=on_failure, scope=scope).process([0, 1])
+
+    assert scopes == ["rollback", "rollback", "commit"]
+
+
+@pytest.mark.asyncio
+async def test_batch_is_acked_after_processing():
+    topic = MemoryTopic(range(5))
+    topic.close()
+    handler = BulkHandler()
+
+    sizes = [size async for size in consume_batches(topic.events(), topic.ack, BatchProcessor(handler), 2, 10)]
+
+    assert sizes == [2, 2, 1]
+    assert topic.acked == [0, 1, 2, 3, 4]
+
+
+@pytest.mark.asyncio
+async def test_failed_batch_is_not_acked_without_failure_handler():
+    topic = MemoryTopic(range(5))
+    topic.close()
+
+    with pytest.raises(ValueError):
+        async for _ in consume_batches(topic.events(), topic.ack, BatchProcessor(BulkHandler(bad=[3])), 2, 10):
+            ...
+
+    assert topic.acked == [0, 1]
+
+
+@pytest.mark.asyncio
+async def test_faust_agent_processes_and_acks_batches():
+    app = faust.App("test-batching", broker="kafka://localhost", store="memory://", loop=asyncio.get_running_loop())
+    handler = BulkHandler()
+    agent = batched_agent(app, app.topic("test", value_type=int), handler, max_size=3, max_wait=0.05)
+
+    async with agent.test_context() as test_agent:
+        events = [await test_agent.put(value, wait=False) for value in range(7)]
+        await asyncio.sleep(0.2)
+
+    assert handler.calls == [[0, 1, 2], [3, 4, 5], [6]]
+    assert all(event.message.acked for event in events)
@@ -0,0 +1,119 @@
+import fastjsonschema
+import faust
+import pytest
+from fastjsonschema import JsonSchemaValueException
+from schema_registry.serializers.errors import SerializerError
+from schema_registry.serializers.faust import FaustJsonSerializer
+
+from infrastructure.kafka.codec import FastJsonCodec, ValidationMode
+from infrastructure.kafka.schema_store import SchemaNotAvailableError, SchemaStore
+from infrastructure.kafka.serializer import get_codec
+from tests.utils.fake_schema_registry import FakeSchemaRegistry
+
+TESTING_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "id": {"type": "integer"},
+        "name": {"type": "string"},
+        "tags": {"type": "array", "items": {"type": "object", "properties": {"value": {"type": "string"}}}},
+    },
+    "required": ["id", "name"],
+}
+MESSAGE = {"id": 1, "name": "testing", "tags": [{"value": "a"}]}
+
+
+class Tag(faust.Record):
+    value: str
+
+
+@pytest.fixture()
+def store() -> SchemaStore:
+    registry = FakeSchemaRegistry()
+    schema_id = registry.add("testing-value", TESTING_SCHEMA)
+    store = SchemaStore(registry.client())
+    store.get_by_id(schema_id)
+    return store
+
+
+def _codec(store: SchemaStore, **kwargs) -> FastJsonCodec:
+    return FastJsonCodec(store, "testing-value", store.get_by_id(1), **kwargs)
+
+
+def test_codec_is_wire_compatible_with_faust_serializer(store):
+    codec = _codec(store)
+    serializer = FaustJsonSerializer(store, "testing-value", store.get_by_id(1))
+
+    message = codec.dumps(MESSAGE)
+
+    assert message[:5] == b"\x00\x00\x00\x00\x01"
+    assert serializer.loads(message) == MESSAGE
+    assert codec.loads(serializer.dumps(MESSAGE)) == MESSAGE
+
+
+def test_nested_records_are_serialized_as_faust_serializer_does(store):
+    codec = _codec(store)
+    serializer = FaustJsonSerializer(store, "testing-value", store.get_by_id(1))
+    payload = {"id": 1, "name": "testing", "tags": [Tag(value="a")]}
+
+    decoded = codec.loads(codec.dumps(payload))
+
+    assert decoded["tags"][0]["value"] == "a"
+    assert decoded == serializer.loads(serializer.dumps(payload))
+
+
+@pytest.mark.parametrize("invalid", [{"id": "1", "name": "testing"}, {"id": 1}])
+def test_invalid_messages_are_rejected(store, invalid):
+    codec = _codec(store)
+    message = _codec(store, validation=ValidationMode.OFF).dumps(invalid)
+
+    with pytest.raises(JsonSchemaValueException):
+        codec.loads(message)
+    with pytest.raises(JsonSchemaValueException):
+        codec.dumps(invalid)
+
+
+def test_validation_can_be_disabled(store):
+    codec = _codec(store, validation="off")
+
+    assert codec.loads(codec.dumps({"id": "1"})) == {"id": "1"}
+
+
+def test_sampled_validation(store):
+    samples = iter([0.5, 0.01])
+    codec = _codec(store, validation=ValidationMode.SAMPLED, sample_percent=10, random_=lambda: next(samples))
+    message = _codec(store, validation=ValidationMode.OFF).dumps({"id": "1"})
+
+    assert codec.loads(message) == {"id": "1"}
+    with pytest.raises(JsonSchemaValueException):
+        codec.loads(message)
+
+
+def test_schema_is_compiled_once_per_schema_id(store, monkeypatch):
+    compiled = []
+    compile_ = fastjsonschema.compile
+    monkeypatch.setattr(fastjsonschema, "compile", lambda schema: compiled.append(schema) or compile_(schema))
+    codec = _codec(store)
+
+    for _ in range(10):
+        codec.loads(codec.dumps(MESSAGE))
+
+    assert compiled == [TESTING_SCHEMA]
+
+
+@pytest.mark.parametrize(
+    ("message", "error"),
+    [(b"\x00\x00", "too small"), (b"\x01\x00\x00\x00\x01{}", "magic byte")],
+)
+def test_malformed_messages(store, message, error):
+    with pytest.raises(SerializerError, match=error):
+        _codec(store).loads(message)
+
+
+def test_unknown_schema_id(store):
+    with pytest.raises(SerializerError, match="unable to fetch schema with id 7"):
+        _codec(store).loads(b"\x00\x00\x00\x00\x07{}")
+
+
+def test_codec_requires_registered_schema(store):
+    with pytest.raises(SchemaNotAvailableError):
+        get_codec("test-value", 7, store=store)
@@ -0,0 +1,185 @@
+import asyncio
+from typing import Optional
+
+import faust
+import pytest
+from tests.utils.fake_kafka import MemoryTopic
+
+from infrastructure.kafka.ordering import consume_key_ordered, key_ordered_agent
+
+
+class SlowHandler:
+    def __init__(self, delays: Optional[dict[int, float]] = None, default_delay: float = 0.0, bad=()) -> None:
+        self.delays = delays or {}
+        self.default_delay = default_delay
+        self.bad = set(bad)
+        self.active: dict[str, int] = {}
+        self.started: list[int] = []
+        self.processed: list[int] = []
+        self.max_active = 0
+
+    async def __call__(self, message: dict) -> None:
+        key = message["key"]
+        assert not self.active.get(key), "messages with the same key must not run concurrently"
+        self.active[key] = self.active.get(key, 0) + 1
+        self.started.append(message["id"])
+        self.max_active = max(self.max_active, sum(self.active.values()))
+        try:
+            await asyncio.sleep(self.delays.get(message["id"], self.default_delay))
+            if message["id"] in self.bad:
+                raise ValueError("bad message")
+            self.processed.append(message["id"])
+        finally:
+            self.active[key] -= 1
+
+    def processed_for(self, key: str, messages: list[dict]) -> list[int]:
+        ids = {message["id"] for message in messages if message["key"] == key}
+        return [message_id for message_id in self.processed if message_id in ids]
+
+
+def _messages(keys: str) -> list[dict]:
+    return [{"id": index, "key": key} for index, key in enumerate(keys)]
+
+
+def _key(message: dict, event) -> str:
+    return message["key"]
+
+
+async def _consume(topic: MemoryTopic, handler, max_in_flight: int, **kwargs) -> list[dict]:
+    return [
+        message
+        async for message in consume_key_ordered(topic.events(), topic.ack, handler, max_in_flight, key=_key, **kwargs)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_messages_are_processed_concurrently():
+    topic = MemoryTopic(_messages("abcdefghij"))
+    topic.close()
+    handler = SlowHandler(default_delay=0.05)
+
+    started = asyncio.get_running_loop().time()
+    processed = await _consume(topic, handler, max_in_flight=5)
+
+    assert asyncio.get_running_loop().time() - started < 0.2
+    assert handler.max_active == 5
+    assert len(processed) == 10
+    assert topic.acked == list(range(10))
+
+
+@pytest.mark.asyncio
+async def test_messages_with_same_key_keep_order():
+    messages = _messages("abababcccab")
+    topic = MemoryTopic(messages)
+    topic.close()
+    # Ранние сообщения медленнее поздних, без порядка по ключу они бы завершились позже
+    handler = SlowHandler(delays={index: 0.03 * (len(messages) - index) / len(messages) for index in range(11)})
+
+    await _consume(topic, handler, max_in_flight=10)
+
+    for key in "abc":
+        assert handler.processed_for(key, messages) == [message["id"] for message in messages if message["key"] == key]
+    assert handler.max_active == 3
+    assert topic.acked == list(range(11))
+
+
+@pytest.mark.asyncio
+async def test_acks_stop_at_lowest_unfinished_offset():
+    topic = MemoryTopic(_messages("abcde"))
+    handler = SlowHandler(delays={0: 0.1})
+    consuming = asyncio.create_task(_consume(topic, handler, max_in_flight=5))
+
+    await asyncio.sleep(0.05)
+    assert handler.processed == [1, 2, 3, 4]
+    assert topic.acked == []
+
+    await asyncio.sleep(0.1)
+    assert topic.acked == [0, 1, 2, 3, 4]
+    topic.close()
+    await consuming
+
+
+@pytest.mark.asyncio
+async def test_failed_message_is_passed_to_failure_handler_and_acked():
+    topic = MemoryTopic(_messages("aab"))
+    topic.close()
+    failed = []
+
+    async def on_failure(message, error):
+        failed.append((message["id"], type(error)))
+
+    handler = SlowHandler(bad=[0])
+    await _consume(topic, handler, max_in_flight=3, on_failure=on_failure)
+
+    assert failed == [(0, ValueError)]
+    assert sorted(handler.processed) == [1, 2]
+    assert topic.acked == [0, 1, 2]
+
+
+@pytest.mark.asyncio
+async def test_failure_without_handler_stops_processing_without_acks():
+    topic = MemoryTopic(_messages("abab"))
+    topic.close()
+    handler = SlowHandler(delays={0: 0.01, 1: 0.05}, bad=[1])
+
+    with pytest.raises(ValueError):
+        await _consume(topic, handler, max_in_flight=4)
+
+    # Сообщение 3 ждало сообщение 1 с тем же ключом и не обрабатывалось
+    assert 3 not in handler.started
+    assert topic.acked == [0]
+
+
+@pytest.mark.asyncio
+async def test_failure_handler_error_stops_processing_without_acks():
+    topic = MemoryTopic(_messages("abab"))
+    topic.close()
+    handler = SlowHandler(delays={0: 0.01, 1: 0.05}, bad=[1])
+
+    async def on_failure(message, error):
+        raise RuntimeError("dead letter topic is unavailable")
+
+    with pytest.raises(RuntimeError):
+        await asyncio.wait_for(_consume(topic, handler, max_in_flight=4, on_failure=on_failure), timeout=1)
+
+    assert 3 not in handler.started
+    assert topic.acked == [0]
+
+
+@pytest.mark.asyncio
+async def test_acks_are_tracked_per_partition():
+    topic = MemoryTopic(_messages("abcd"))
+    topic.close()
+    handler = SlowHandler(delays={0: 0.05})
+    acked = []
+
+    async def ack(offset):
+        acked.append(offset)
+
+    # Четные смещения - партиция 0, нечетные - партиция 1
+    events = ((message, offset) async for message, offset in topic.events())
+    async for _ in consume_key_ordered(events, ack, handler, 4, key=_key, partition=lambda offset: offset % 2):
+        ...
+
+    assert acked == [1, 3, 0, 2]
+
+
+@pytest.mark.asyncio
+async def test_faust_agent_processes_messages_by_key():
+    app = faust.App("test-ordering", broker="kafka://localhost", store="memory://", loop=asyncio.get_running_loop())
+    processed = []
+
+    async def handler(value: int) -> None:
+        await asyncio.sleep(0.02 if value == 0 else 0)
+        processed.append(value)
+
+    agent = key_ordered_agent(app, app.topic("test", value_type=int), handler, max_in_flight=4)
+
+    async with agent.test_context() as test_agent:
+        events = [await test_agent.put(value, key=f"{value % 2}", wait=False) for value in range(6)]
+        await asyncio.sleep(0.2)
+
+    assert processed.index(0) < processed.index(2) < processed.index(4)
+    assert processed.index(1) < processed.index(3) < processed.index(5)
+    assert processed.index(1) < processed.index(0)
+    assert all(event.message.acked for event in events)
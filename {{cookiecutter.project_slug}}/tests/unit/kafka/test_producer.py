@@ -0,0 +1,95 @@
+import asyncio
+
+import pytest
+from tests.utils.fake_kafka import MemoryProducerApp
+
+from infrastructure.kafka.producer import KafkaProducerService, ProducerRecord
+
+
+@pytest.mark.asyncio
+async def test_send_many_returns_futures_in_record_order():
+    app = MemoryProducerApp()
+    producer = KafkaProducerService(app)
+
+    futures = await producer.send_many("events", [ProducerRecord({"id": index}, key=index) for index in range(3)])
+
+    assert await asyncio.gather(*futures) == [0, 1, 2]
+    assert [(sent["key"], sent["value"]) for sent in app.topics["events"].sent] == [
+        (0, {"id": 0}),
+        (1, {"id": 1}),
+        (2, {"id": 2}),
+    ]
+    assert all(sent["force"] for sent in app.topics["events"].sent)
+
+
+@pytest.mark.asyncio
+async def test_send_many_accepts_async_iterable_and_topic():
+    app = MemoryProducerApp()
+    topic = app.topic("events")
+
+    async def records():
+        for index in range(3):
+            yield ProducerRecord(index, headers={"source": b"test"})
+
+    futures = await KafkaProducerService(app).send_many(topic, records(), value_serializer="raw")
+
+    assert await asyncio.gather(*futures) == [0, 1, 2]
+    assert topic.sent[0]["value_serializer"] == "raw"
+    assert topic.sent[0]["headers"] == {"source": b"test"}
+
+
+@pytest.mark.asyncio
+async def test_sending_waits_for_acks_when_in_flight_limit_is_reached():
+    app = MemoryProducerApp(auto_ack=False)
+    topic = app.topic("events")
+    producer = KafkaProducerService(app, max_in_flight=2)
+
+    sending = asyncio.create_task(producer.send_many(topic, [ProducerRecord(index) for index in range(5)]))
+    await asyncio.sleep(0.01)
+    assert len(topic.sent) == 2
+
+    topic.ack(1)
+    await asyncio.sleep(0.01)
+    assert len(topic.sent) == 3
+    assert not sending.done()
+
+    while not sending.done():
+        topic.ack()
+        await asyncio.sleep(0.01)
+    topic.ack()
+    assert await asyncio.gather(*sending.result()) == [0, 1, 2, 3, 4]
+
+
+@pytest.mark.asyncio
+async def test_failed_record_does_not_stop_other_records():
+    app = MemoryProducerApp()
+    producer = KafkaProducerService(app, max_in_flight=1)
+    records = [ProducerRecord(1), ProducerRecord(ValueError("cannot serialize")), ProducerRecord(3)]
+
+    futures = await producer.send_many("events", records)
+
+    results = await asyncio.gather(*futures, return_exceptions=True)
+    assert results[0] == 0 and results[2] == 1
+    with pytest.raises(ValueError, match="cannot serialize"):
+        futures[1].result()
+
+
+@pytest.mark.asyncio
+async def test_cancelled_send_releases_in_flight_slot():
+    app = MemoryProducerApp()
+    producer = KafkaProducerService(app, max_in_flight=1)
+
+    with pytest.raises(asyncio.CancelledError):
+        await producer.send_many("events", [ProducerRecord(asyncio.CancelledError())])
+
+    futures = await asyncio.wait_for(producer.send_many("events", [ProducerRecord(1)]), timeout=1)
+    assert await futures[0] == 0
+
+
+@pytest.mark.asyncio
+async def test_flush():
+    app = MemoryProducerApp()
+
+    await KafkaProducerService(app).flush()
+
+    assert app.flushed == 1
@@ -0,0 +1,137 @@
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from schema_registry.client.utils import JSON_SCHEMA_TYPE
+from schema_registry.serializers.faust import FaustJsonSerializer
+
+from infrastructure.kafka.schema_store import SchemaNotAvailableError, SchemaStore
+from tests.utils.fake_schema_registry import FakeSchemaRegistry
+
+TESTING_SCHEMA = {"type": "object", "properties": {"name": {"type": "string"}}}
+
+
+@pytest.fixture()
+def registry() -> FakeSchemaRegistry:
+    return FakeSchemaRegistry()
+
+
+def test_schema_by_id_is_requested_once(registry):
+    schema_id = registry.add("testing-value", TESTING_SCHEMA)
+    store = SchemaStore(registry.client())
+
+    for _ in range(3):
+        assert store.get_by_id(schema_id).raw_schema == TESTING_SCHEMA
+
+    assert registry.requests == [f"GET /schemas/ids/{schema_id}"]
+
+
+def test_cache_file_allows_start_without_registry(registry, tmp_path):
+    cache_path = str(tmp_path / "schemas.json")
+    schema_id = registry.add("testing-value", TESTING_SCHEMA)
+    SchemaStore(registry.client(), cache_path=cache_path).prefetch(
+        schema_ids=[schema_id], subjects=["testing-value"]
+    )
+
+    registry.available = False
+    registry.requests.clear()
+    store = SchemaStore(registry.client(), cache_path=cache_path)
+
+    assert store.get_by_id(schema_id).raw_schema == TESTING_SCHEMA
+    assert store.get_schema("testing-value", 1).schema_id == schema_id
+    latest = store.get_schema("testing-value")
+    assert (latest.schema_id, latest.version) == (schema_id, 1)
+    assert registry.requests == ["GET /subjects/testing-value/versions/latest"]
+
+
+def test_latest_version_is_refreshed_while_registry_is_available(registry):
+    store = SchemaStore(registry.client())
+    registry.add("testing-value", TESTING_SCHEMA)
+    assert store.get_schema("testing-value").version == 1
+
+    new_id = registry.add("testing-value", {**TESTING_SCHEMA, "required": ["name"]})
+
+    latest = store.get_schema("testing-value")
+    assert (latest.schema_id, latest.version) == (new_id, 2)
+
+
+def test_unknown_schema_without_registry_raises(registry):
+    registry.available = False
+    store = SchemaStore(registry.client())
+
+    with pytest.raises(SchemaNotAvailableError):
+        store.get_by_id(1)
+    with pytest.raises(SchemaNotAvailableError):
+        store.get_schema("testing-value")
+
+
+def test_prefetch_loads_schemas_concurrently_and_writes_cache_once(registry, tmp_path, monkeypatch):
+    cache_path = tmp_path / "schemas.json"
+    schema_ids = [
+        registry.add(f"subject-{index}-value", {**TESTING_SCHEMA, "title": str(index)}) for index in range(20)
+    ]
+    store = SchemaStore(registry.client(), cache_path=str(cache_path))
+    writes = []
+    monkeypatch.setattr(
+        "infrastructure.kafka.schema_store._write_atomically", lambda path, content: writes.append(content)
+    )
+
+    store.prefetch(schema_ids=schema_ids + [404], max_workers=4)
+
+    assert len(writes) == 1
+    assert sorted(json.loads(writes[0])["schemas"]) == sorted(str(schema_id) for schema_id in schema_ids)
+    registry.requests.clear()
+    store.prefetch(schema_ids=schema_ids)
+    assert registry.requests == []
+
+
+def test_register_is_memoized_and_persisted(registry, tmp_path):
+    cache_path = str(tmp_path / "schemas.json")
+    store = SchemaStore(registry.client(), cache_path=cache_path)
+
+    schema_id = store.register("testing-value", json.dumps(TESTING_SCHEMA), schema_type=JSON_SCHEMA_TYPE)
+    # Порядок ключей не влияет на отпечаток схемы
+    reordered = json.dumps(dict(reversed(TESTING_SCHEMA.items())))
+    assert store.register("testing-value", reordered, schema_type=JSON_SCHEMA_TYPE) == schema_id
+    assert len(registry.requests) == 2
+
+    registry.available = False
+    restarted = SchemaStore(registry.client(), cache_path=cache_path)
+    assert restarted.register("testing-value", json.dumps(TESTING_SCHEMA), schema_type=JSON_SCHEMA_TYPE) == schema_id
+
+
+def test_serializer_works_offline_through_store(registry, tmp_path):
+    cache_path = str(tmp_path / "schemas.json")
+    schema_id = registry.add("testing-value", TESTING_SCHEMA)
+    online = SchemaStore(registry.client(), cache_path=cache_path)
+    message = FaustJsonSerializer(online, "testing-value", online.get_by_id(schema_id))._dumps({"name": "test"})
+
+    registry.available = False
+    offline = SchemaStore(registry.client(), cache_path=cache_path)
+    serializer = FaustJsonSerializer(offline, "testing-value", offline.get_by_id(schema_id))
+
+    assert serializer._loads(message) == {"name": "test"}
+    assert serializer._dumps({"name": "test"}) == message
+
+
+def test_corrupted_cache_is_ignored(registry, tmp_path):
+    cache_path = tmp_path / "schemas.json"
+    cache_path.write_text("{not json")
+    schema_id = registry.add("testing-value", TESTING_SCHEMA)
+
+    store = SchemaStore(registry.client(), cache_path=str(cache_path))
+
+    assert store.get_by_id(schema_id).raw_schema == TESTING_SCHEMA
+    assert json.loads(cache_path.read_text())["schemas"][str(schema_id)]["type"] == JSON_SCHEMA_TYPE
+
+
+def test_concurrent_reads_share_cache(registry):
+    schema_id = registry.add("testing-value", TESTING_SCHEMA)
+    store = SchemaStore(registry.client())
+    store.get_by_id(schema_id)
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        schemas = list(executor.map(lambda _: store.get_by_id(schema_id), range(100)))
+
+    assert all(schema is schemas[0] for schema in schemas)
+    assert len(registry.requests) == 1
@@ -0,0 +1,84 @@
+import datetime
+import uuid
+from decimal import Decimal
+from enum import Enum, IntEnum
+
+import pytest
+from pydantic import SecretStr
+
+from core.errors import ConfigurationBusinessError, ValidationBusinessError
+from core.usecases.pagination import Cursor, CursorCodec, CursorDirection
+
+
+@pytest.fixture()
+def codec() -> CursorCodec:
+    return CursorCodec(SecretStr("secret"))
+
+
+def test_roundtrip_keeps_key_types(codec):
+    cursor = Cursor(
+        (
+            1, 1.5, "name", True, None, Decimal("10.20"), uuid.uuid4(),
+            datetime.datetime(2022, 1, 2, 3, 4, 5, tzinfo=datetime.timezone.utc), datetime.date(2022, 1, 2),
+        ),
+        CursorDirection.PREV,
+    )
+
+    decoded = codec.decode(codec.encode(cursor))
+
+    assert decoded == cursor
+    assert [type(key) for key in decoded.keys] == [type(key) for key in cursor.keys]
+
+
+class Priority(IntEnum):
+    HIGH = 1
+
+
+class Status(str, Enum):
+    ACTIVE = "active"
+
+
+class Timestamp(datetime.datetime):
+    pass
+
+
+def test_subclasses_of_supported_types_are_encoded_as_base_type(codec):
+    cursor = Cursor((Priority.HIGH, Status.ACTIVE, Timestamp(2022, 1, 2, 3, 4, 5)))
+
+    assert codec.decode(codec.encode(cursor)).keys == (1, "active", datetime.datetime(2022, 1, 2, 3, 4, 5))
+
+
+def test_unsupported_key_type_is_rejected(codec):
+    with pytest.raises(ConfigurationBusinessError):
+        codec.encode(Cursor((b"bytes",)))
+
+
+def test_token_is_url_safe(codec):
+    token = codec.encode(Cursor(("?&/+=" * 10,)))
+
+    assert all(char.isalnum() or char in "-_." for char in token)
+
+
+@pytest.mark.parametrize("token", ["", "garbage", "a.b.c", "e30.AAAA"])
+def test_malformed_cursor_rejected(codec, token):
+    with pytest.raises(ValidationBusinessError):
+        codec.decode(token)
+
+
+def test_tampered_cursor_rejected(codec):
+    _, signature = codec.encode(Cursor((1,))).split(".")
+    forged_payload = CursorCodec("other").encode(Cursor((1000,))).split(".")[0]
+
+    with pytest.raises(ValidationBusinessError):
+        codec.decode(f"{forged_payload}.{signature}")
+
+
+def test_cursor_signed_with_other_secret_rejected(codec):
+    with pytest.raises(ValidationBusinessError):
+        codec.decode(CursorCodec("other").encode(Cursor((1,))))
+
+
+@pytest.mark.parametrize("secret", [None, "", SecretStr("")])
+def test_secret_required(secret):
+    with pytest.raises(ConfigurationBusinessError):
+        CursorCodec(secret)
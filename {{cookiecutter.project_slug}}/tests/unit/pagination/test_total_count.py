@@ -0,0 +1,25 @@
+from core.usecases.base import BaseResult
+from core.usecases.pagination import CountStrategy, PageInfo, PaginationResult, TotalCount
+
+
+class Item(BaseResult):
+    item_id: int
+
+
+def test_int_total_count_is_exact():
+    result = PaginationResult[Item](items=[], total_count=5, page=PageInfo(page_number=1, page_size=10))
+
+    assert result.dict(by_alias=True)["totalCount"] == 5
+    assert result.total_count_strategy == CountStrategy.EXACT
+
+
+def test_total_count_carries_strategy():
+    result = PaginationResult[Item](
+        items=[Item(item_id=1)],
+        total_count=TotalCount(strategy=CountStrategy.SKIPPED),
+        page=PageInfo(page_number=1, page_size=10, has_next_page=True),
+    )
+
+    assert result.dict(by_alias=True)["totalCount"] is None
+    assert result.dict(by_alias=True)["totalCountStrategy"] == CountStrategy.SKIPPED
+    assert result.dict(by_alias=True)["page"]["hasNextPage"] is True
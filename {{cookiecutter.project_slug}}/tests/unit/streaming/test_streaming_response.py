@@ -0,0 +1,83 @@
+import asyncio
+import uuid
+from typing import AsyncGenerator
+
+import orjson
+import pytest
+
+from core.usecases.base import BaseResult
+from web.responses import ModelStreamingResponse, StreamFormat, dumps_model
+
+
+class Item(BaseResult):
+    item_id: uuid.UUID
+    item_name: str
+
+
+def _items(count: int) -> list[Item]:
+    return [Item(item_id=uuid.UUID(int=index), item_name=f"item-{index}") for index in range(count)]
+
+
+async def _iterate(items: list[Item]) -> AsyncGenerator[Item, None]:
+    for item in items:
+        yield item
+
+
+async def _body_chunks(response: ModelStreamingResponse) -> list[bytes]:
+    return [chunk async for chunk in response.body_iterator]
+
+
+@pytest.mark.asyncio
+async def test_ndjson_lines_match_model_serialization():
+    items = _items(3)
+    response = ModelStreamingResponse(_iterate(items))
+
+    body = b"".join(await _body_chunks(response))
+
+    assert response.media_type == "application/x-ndjson"
+    assert body.splitlines() == [dumps_model(item) for item in items]
+    assert orjson.loads(body.splitlines()[0]) == {"itemId": str(uuid.UUID(int=0)), "itemName": "item-0"}
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("count", [0, 1, 100])
+async def test_json_array_matches_list_serialization(count):
+    items = _items(count)
+    response = ModelStreamingResponse(_iterate(items), stream_format=StreamFormat.JSON, buffer_size=256)
+
+    body = b"".join(await _body_chunks(response))
+
+    assert response.media_type == "application/json"
+    assert body == dumps_model(items)
+
+
+@pytest.mark.asyncio
+async def test_body_is_sent_in_buffered_chunks():
+    response = ModelStreamingResponse(_iterate(_items(100)), buffer_size=1024)
+
+    chunks = await _body_chunks(response)
+
+    assert len(chunks) > 1
+    assert all(len(chunk) >= 1024 for chunk in chunks[:-1])
+    assert all(chunk.endswith(b"\n") for chunk in chunks)
+
+
+@pytest.mark.asyncio
+async def test_items_are_pulled_lazily_and_closed_on_disconnect():
+    pulled = []
+    closed = asyncio.Event()
+
+    async def items() -> AsyncGenerator[Item, None]:
+        try:
+            for item in _items(1000):
+                pulled.append(item)
+                yield item
+        finally:
+            closed.set()
+
+    body = ModelStreamingResponse(items(), buffer_size=1).body_iterator
+    await body.__anext__()
+    await body.aclose()
+
+    assert len(pulled) == 1
+    assert closed.is_set()
@@ -0,0 +1,26 @@
+import os
+import subprocess
+import sys
+
+IMPORT_TIME_LIMIT = float(os.getenv("TEST_IMPORT_TIME_LIMIT", "5.0"))
+
+_CODE = """
+import sys
+import time
+
+start = time.perf_counter()
+import main
+
+print(time.perf_counter() - start)
+pool = sys.modules.get("infrastructure.db.pool")
+print(bool(pool and pool._instrumented_engines))
+"""
+
+
+def test_import_main_is_cheap():
+    result = subprocess.run([sys.executable, "-c", _CODE], capture_output=True, text=True, check=True)
+    import_time, engines_created = result.stdout.split()[-2:]
+
+    # Импорт не создает движки и пулы соединений
+    assert engines_created == "False"
+    assert float(import_time) < IMPORT_TIME_LIMIT
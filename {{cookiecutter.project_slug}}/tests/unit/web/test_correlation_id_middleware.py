@@ -0,0 +1,51 @@
+import uuid
+from typing import Optional
+
+import pytest
+from structlog.contextvars import get_contextvars
+
+from web.middlewares import CorrelationIdMiddleware
+
+
+async def _call(headers: list[tuple[bytes, bytes]]) -> tuple[str, Optional[str]]:
+    bound = {}
+    messages = []
+
+    async def app(scope, receive, send):
+        bound.update(get_contextvars())
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-length", b"0")]})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await CorrelationIdMiddleware(app)({"type": "http", "headers": headers}, receive, send)
+
+    response_headers = dict(messages[0]["headers"])
+    return bound["x_correlation_id"], response_headers.get(b"x-correlation-id", b"").decode()
+
+
+@pytest.mark.asyncio
+async def test_inbound_correlation_id_is_reused():
+    bound, echoed = await _call([(b"x-correlation-id", b"request-42")])
+
+    assert bound == echoed == "request-42"
+
+
+@pytest.mark.asyncio
+async def test_traceparent_trace_id_is_used():
+    trace_id = "4bf92f3577b34da6a3ce929d0e0e4736"
+    bound, echoed = await _call([(b"traceparent", f"00-{trace_id}-00f067aa0ba902b7-01".encode())])
+
+    assert bound == echoed == trace_id
+
+
+@pytest.mark.asyncio
+async def test_correlation_id_is_generated():
+    bound, echoed = await _call([(b"x-correlation-id", b"bad id\r\nwith spaces")])
+
+    assert bound == echoed
+    assert uuid.UUID(bound)
@@ -0,0 +1,59 @@
+from enum import Enum
+
+import orjson
+import pytest
+from humps import camelize
+
+from core.errors import (
+    BusinessError,
+    ErrorCategories,
+    ExternalServiceBusinessError,
+    SecurityBusinessError,
+    ValidationBusinessError,
+)
+from web.error_serializer import business_error_response, get_error_serializer
+
+
+def _legacy_dumps(exc) -> bytes:
+    content = {camelize(key): value.value if isinstance(value, Enum) else value for key, value in exc.as_dict().items()}
+    return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+
+
+@pytest.mark.parametrize(
+    "exc",
+    [
+        SecurityBusinessError(status="403", detail="Not enough permissions"),
+        ValidationBusinessError(status="422", detail="invalid", data={"errors": [{"loc": ["body", "id"]}]}),
+        BusinessError(status="409", detail="conflict", recovery_type="retry", raw_type="ConflictError"),
+        ExternalServiceBusinessError(status="502", detail="bad gateway", error_type="https://wiki/502"),
+    ],
+)
+def test_serializer_matches_legacy_output(exc):
+    assert get_error_serializer(type(exc)).dumps(exc) == _legacy_dumps(exc)
+
+
+def test_subclass_category_is_used_as_default():
+    class CustomError(BusinessError):
+        __slots__ = ()
+        category = ErrorCategories.CONFIGURATION_EXCEPTION
+
+    assert CustomError.category is ErrorCategories.CONFIGURATION_EXCEPTION
+    assert SecurityBusinessError.category is ErrorCategories.SECURITY_EXCEPTION
+    assert CustomError(status="400", detail="").category is ErrorCategories.CONFIGURATION_EXCEPTION
+    assert CustomError(status="400", detail="", category=ErrorCategories.SECURITY_EXCEPTION).category is (
+        ErrorCategories.SECURITY_EXCEPTION
+    )
+
+
+def test_extra_attributes_are_serialized():
+    class ErrorWithDict(BusinessError):
+        pass
+
+    exc = ErrorWithDict(status="400", detail="")
+    exc.retry_after = 10
+
+    content = orjson.loads(business_error_response(400, exc).body)
+
+    assert content["retryAfter"] == 10
+    assert content["rawType"] == "ErrorWithDict"
+    assert content["category"] == ErrorCategories.BUSINESS_EXCEPTION.value
@@ -0,0 +1,78 @@
+import datetime
+import uuid
+from decimal import Decimal
+from enum import Enum
+from typing import Optional
+
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import ORJSONResponse
+from pydantic import BaseModel
+
+from core.usecases.base import BaseResult
+from core.usecases.pagination import PageInfo, PaginationResult
+from web.dto.base import BaseCamelCaseModel
+from web.responses import CamelCaseModelResponse
+
+
+class Color(str, Enum):
+    RED = "red"
+
+
+class Size(Enum):
+    SMALL = 1
+
+
+class Tag(BaseCamelCaseModel):
+    tag_name: str
+    size: Size
+
+
+class Item(BaseResult):
+    item_id: uuid.UUID
+    created_at: datetime.datetime
+    created_on: datetime.date
+    price: Decimal
+    color: Color
+    tags: list[Tag]
+    labels: set[str]
+    parent_tag: Optional[Tag] = None
+    meta: dict[str, dict]
+
+
+class Root(BaseModel):
+    __root__: list[Tag]
+
+
+class WithEncoders(BaseCamelCaseModel):
+    created_at: datetime.datetime
+
+    class Config:
+        json_encoders = {datetime.datetime: lambda value: value.timestamp()}
+
+
+def _item(index: int) -> Item:
+    return Item(
+        item_id=uuid.UUID(int=index),
+        created_at=datetime.datetime(2022, 1, 1, 12, 30, 15, index, tzinfo=datetime.timezone.utc),
+        created_on=datetime.date(2022, 1, 1),
+        price=Decimal("10.25"),
+        color=Color.RED,
+        tags=[Tag(tag_name="first", size=Size.SMALL)],
+        labels={"a"},
+        meta={"nested": {"key_name": [1, 2.5, None]}},
+    )
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        PaginationResult[Item](items=[_item(i) for i in range(5)], total_count=5, page=PageInfo(page_number=1, page_size=5)),
+        _item(0).copy(update={"parent_tag": Tag(tag_name="parent", size=Size.SMALL)}),
+        Root(__root__=[Tag(tag_name="root", size=Size.SMALL)]),
+        WithEncoders(created_at=datetime.datetime(2022, 1, 1)),
+        [_item(1), _item(2)],
+    ],
+)
+def test_response_matches_jsonable_encoder(content):
+    assert CamelCaseModelResponse(content).body == ORJSONResponse(jsonable_encoder(content)).body
@@ -0,0 +1,70 @@
+import time
+from typing import Callable, Optional
+
+
+class FakeRemoteCacheClient:
+    """
+    Redis-совместимый клиент в памяти для RemoteCacheBackend в тестах
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self._values: dict[str, object] = dict()
+        self._expires_at: dict[str, float] = dict()
+        self.commands: list[str] = []
+        self.fail = False
+
+    async def get(self, name: str) -> Optional[bytes]:
+        self._command("get")
+        value = self._live(name)
+        return value if isinstance(value, bytes) else None
+
+    async def set(self, name: str, value: bytes, px: Optional[int] = None) -> bool:
+        self._command("set")
+        self._values[name] = value
+        self._expires_at.pop(name, None)
+        if px is not None:
+            self._expires_at[name] = self._clock() + px / 1000
+        return True
+
+    async def delete(self, *names: str) -> int:
+        self._command("delete")
+        count = 0
+        for name in names:
+            if self._live(name) is not None:
+                count += 1
+            self._values.pop(name, None)
+            self._expires_at.pop(name, None)
+        return count
+
+    async def sadd(self, name: str, *values: str) -> int:
+        self._command("sadd")
+        members = self._live(name)
+        if members is None:
+            members = self._values[name] = set()
+        before = len(members)
+        members.update(value.encode() for value in values)
+        return len(members) - before
+
+    async def smembers(self, name: str) -> set:
+        self._command("smembers")
+        return set(self._live(name) or ())
+
+    async def pexpire(self, name: str, time: int) -> bool:
+        self._command("pexpire")
+        if self._live(name) is None:
+            return False
+        self._expires_at[name] = self._clock() + time / 1000
+        return True
+
+    def _live(self, name: str) -> Optional[object]:
+        expires_at = self._expires_at.get(name)
+        if expires_at is not None and expires_at <= self._clock():
+            self._values.pop(name, None)
+            self._expires_at.pop(name, None)
+        return self._values.get(name)
+
+    def _command(self, name: str) -> None:
+        if self.fail:
+            raise ConnectionError("cache is unavailable")
+        self.commands.append(name)
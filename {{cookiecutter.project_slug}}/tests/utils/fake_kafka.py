@@ -0,0 +1,94 @@
+import asyncio
+from typing import AsyncIterator, Generic, Iterable, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class MemoryTopic(Generic[T]):
+    """
+    Партиция топика в памяти: сообщения со смещениями и подтверждения обработчика
+    """
+
+    def __init__(self, values: Iterable[T] = (), delay: float = 0.0) -> None:
+        """
+        :param values: Сообщения, доступные сразу
+        :param delay: Задержка перед каждым сообщением из send
+        """
+        self._queue: asyncio.Queue[Optional[T]] = asyncio.Queue()
+        self._delay = delay
+        self._offset = 0
+        self.acked: list[int] = []
+        for value in values:
+            self._queue.put_nowait(value)
+
+    def send(self, value: T) -> None:
+        self._queue.put_nowait(value)
+
+    def close(self) -> None:
+        self._queue.put_nowait(None)
+
+    async def events(self) -> AsyncIterator[tuple[T, int]]:
+        while True:
+            if self._queue.empty() and self._delay:
+                await asyncio.sleep(self._delay)
+            value = await self._queue.get()
+            if value is None:
+                return
+            yield value, self._offset
+            self._offset += 1
+
+    async def ack(self, offset: int) -> None:
+        self.acked.append(offset)
+
+
+class MemoryProducerTopic:
+    """
+    Топик для producer: отправленные сообщения и futures подтверждений брокера, которые завершает тест
+    """
+
+    def __init__(self, name: str, auto_ack: bool = True) -> None:
+        """
+        :param name: Имя топика
+        :param auto_ack: Подтверждать сообщения сразу после отправки
+        """
+        self.name = name
+        self.auto_ack = auto_ack
+        self.sent: list[dict] = []
+        self.pending: list[asyncio.Future] = []
+        self._acked = 0
+
+    async def send(self, *, value=None, force: bool = False, **kwargs) -> asyncio.Future:
+        if isinstance(value, BaseException):
+            raise value
+        future = asyncio.get_running_loop().create_future()
+        self.sent.append({"value": value, "force": force, **kwargs})
+        self.pending.append(future)
+        if self.auto_ack:
+            self.ack()
+        return future
+
+    def ack(self, count: Optional[int] = None) -> None:
+        # Брокер подтверждает сообщения по порядку, результат - смещение сообщения
+        count = len(self.pending) if count is None else count
+        for future in self.pending[:count]:
+            future.set_result(self._acked)
+            self._acked += 1
+        del self.pending[:count]
+
+
+class MemoryProducerApp:
+    """
+    Приложение faust для KafkaProducerService: топики по именам и producer с flush
+    """
+
+    def __init__(self, auto_ack: bool = True) -> None:
+        self.auto_ack = auto_ack
+        self.topics: dict[str, MemoryProducerTopic] = dict()
+        self.producer = self
+        self.flushed = 0
+
+    def topic(self, name: str) -> MemoryProducerTopic:
+        return self.topics.setdefault(name, MemoryProducerTopic(name, self.auto_ack))
+
+    async def flush(self) -> None:
+        self.flushed += 1
@@ -0,0 +1,104 @@
+import json
+import re
+import threading
+from typing import Optional
+
+import httpx
+from schema_registry.client import SchemaRegistryClient
+from schema_registry.client.utils import JSON_SCHEMA_TYPE
+
+_SCHEMA_BY_ID_RE = re.compile(r"^/schemas/ids/(\d+)$")
+_SUBJECT_VERSION_RE = re.compile(r"^/subjects/([^/]+)/versions/([^/]+)$")
+_SUBJECT_RE = re.compile(r"^/subjects/([^/]+)$")
+_REGISTER_RE = re.compile(r"^/subjects/([^/]+)/versions$")
+
+
+class FakeSchemaRegistry:
+    """
+    Schema Registry в памяти для SchemaRegistryClient через httpx.MockTransport
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        # schema_id -> (схема, тип)
+        self._schemas: dict[int, tuple[str, str]] = dict()
+        # subject -> ID схем по версиям
+        self._subjects: dict[str, list[int]] = dict()
+        self.available = True
+        self.requests: list[str] = []
+
+    def add(self, subject: str, schema: dict, schema_type: str = JSON_SCHEMA_TYPE) -> int:
+        """
+        Новая версия схемы subject
+
+        :param subject: Subject
+        :param schema: Схема
+        :param schema_type: Тип схемы
+        :return: ID схемы
+        """
+        with self._lock:
+            return self._add(subject, json.dumps(schema), schema_type)
+
+    def client(self) -> SchemaRegistryClient:
+        client = SchemaRegistryClient(url="http://schema-registry")
+        client.client_kwargs["transport"] = httpx.MockTransport(self._handle)
+        return client
+
+    def _add(self, subject: str, schema: str, schema_type: str) -> int:
+        schema_id = len(self._schemas) + 1
+        self._schemas[schema_id] = (schema, schema_type)
+        self._subjects.setdefault(subject, []).append(schema_id)
+        return schema_id
+
+    def _find(self, subject: str, schema: str) -> Optional[tuple[int, int]]:
+        for version, schema_id in enumerate(self._subjects.get(subject, []), start=1):
+            if json.loads(self._schemas[schema_id][0]) == json.loads(schema):
+                return schema_id, version
+        return None
+
+    def _handle(self, request: httpx.Request) -> httpx.Response:
+        with self._lock:
+            self.requests.append(f"{request.method} {request.url.path}")
+            if not self.available:
+                raise httpx.ConnectError("Schema registry is unavailable", request=request)
+            return self._route(request)
+
+    def _route(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if request.method == "GET" and (match := _SCHEMA_BY_ID_RE.match(path)):
+            stored = self._schemas.get(int(match.group(1)))
+            if stored is None:
+                return httpx.Response(404, json={"error_code": 40403})
+            return httpx.Response(200, json={"schema": stored[0], "schemaType": stored[1]})
+
+        if request.method == "GET" and (match := _SUBJECT_VERSION_RE.match(path)):
+            subject, version = match.groups()
+            schema_ids = self._subjects.get(subject, [])
+            index = len(schema_ids) if version == "latest" else int(version)
+            if not 0 < index <= len(schema_ids):
+                return httpx.Response(404, json={"error_code": 40402})
+            schema, schema_type = self._schemas[schema_ids[index - 1]]
+            return httpx.Response(
+                200,
+                json={
+                    "subject": subject,
+                    "id": schema_ids[index - 1],
+                    "version": index,
+                    "schema": schema,
+                    "schemaType": schema_type,
+                },
+            )
+
+        if request.method == "POST" and (match := _SUBJECT_RE.match(path)):
+            body = json.loads(request.content)
+            found = self._find(match.group(1), body["schema"])
+            if found is None:
+                return httpx.Response(404, json={"error_code": 40403})
+            return httpx.Response(200, json={"id": found[0], "version": found[1], "schema": body["schema"]})
+
+        if request.method == "POST" and (match := _REGISTER_RE.match(path)):
+            body = json.loads(request.content)
+            schema_id = self._add(match.group(1), body["schema"], body.get("schemaType", JSON_SCHEMA_TYPE))
+            return httpx.Response(200, json={"id": schema_id})
+
+        return httpx.Response(404, json={"error_code": 404})